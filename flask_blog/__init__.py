@@ -1,42 +1,109 @@
+import time
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
-from flask_mail import Mail
 from flask_blog.config import Config
+from flask_blog.cache import FragmentCache, IdentityCache
+from flask_blog.users.passwords import PasswordHasher
+from flask_blog.mail_queue import MailDispatcher
+from flask_blog.users.avatars import AvatarPipeline
+from flask_blog.assets import AssetBundles
+from flask_blog.database import SQLitePragmas
+from flask_blog.metrics import RequestMetrics
+from flask_blog.slow_queries import SlowQueryLog
+from flask_blog.templating import TemplateCache
+from flask_blog.ratelimit import AuthRateLimit
+from flask_blog.compression import ResponseCompression
 
 ### Configurations: ###
 # create database instance
 db = SQLAlchemy()
+# WAL / busy_timeout / cache PRAGMAs on every SQLite connection (config SQLITE_PRAGMAS)
+sqlite_pragmas = SQLitePragmas()
 # configure Bcrypt
 bcrypt = Bcrypt()
+# runs bcrypt on a bounded worker pool
+password_hasher = PasswordHasher()
 # configure Login Manager
 login_manager = LoginManager()
 # configure login view of login_manager
 login_manager.login_view = 'users.login' # 'login' => function name of route
 login_manager.login_message_category = 'info'
-mail = Mail()
+# queues outbound mail for a background sender (Flask-Mail, MAIL_* settings, is loaded on first send)
+mail_dispatcher = MailDispatcher()
+# cache of rendered post list / article fragments
+fragment_cache = FragmentCache()
+# cache of users loaded by login_manager.user_loader
+identity_cache = IdentityCache()
+# resizes uploaded profile pictures on a worker pool
+avatar_pipeline = AvatarPipeline()
+# fingerprinted, precompressed css/js bundles
+asset_bundles = AssetBundles()
+# request / SQL / render timings, served at /metrics
+request_metrics = RequestMetrics()
+# statements over SLOW_QUERY_THRESHOLD_MS, with their query plan
+slow_query_log = SlowQueryLog()
+# on-disk Jinja bytecode cache and template warm-up (TEMPLATE_WARMUP)
+template_cache = TemplateCache()
+# per IP / per account limits of login, register and password reset submissions
+rate_limiter = AuthRateLimit()
+# gzip / brotli compression of HTML, JSON and feeds (WSGI middleware)
+response_compression = ResponseCompression()
 
 # defining creation of app into a function to allow creation of different instances of application with different configurations
 def create_app(config_class=Config):
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(config_class)
 
     db.init_app(app)
+    sqlite_pragmas.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     login_manager.init_app(app)
-    mail.init_app(app)
+    mail_dispatcher.init_app(app)
+    fragment_cache.init_app(app)
+    identity_cache.init_app(app)
+    avatar_pipeline.init_app(app)
+    asset_bundles.init_app(app)
+    request_metrics.init_app(app)
+    slow_query_log.init_app(app)
+    template_cache.init_app(app)
+    rate_limiter.init_app(app)
+    response_compression.init_app(app)
 
     # import blueprints instances
     from flask_blog.users.routes import users
     from flask_blog.posts.routes import posts
     from flask_blog.main.routes import main
     from flask_blog.errors.handlers import errors
+    from flask_blog.api.routes import api
 
     # register blueprints
     app.register_blueprint(users)
     app.register_blueprint(posts)
     app.register_blueprint(main)
     app.register_blueprint(errors)
+    app.register_blueprint(api)
+
+    # register cli commands => `flask db upgrade`, `flask assets build`, `flask search rebuild`, `flask blog import`, `flask queries report`, `flask templates warm`
+    from flask_blog.migrations.migrate import db_cli
+    from flask_blog.assets import assets_cli
+    from flask_blog.search import search_cli
+    from flask_blog.bulk import blog_cli
+    from flask_blog.slow_queries import queries_cli
+    from flask_blog.templating import templates_cli
+    app.cli.add_command(db_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(blog_cli)
+    app.cli.add_command(queries_cli)
+    app.cli.add_command(templates_cli)
+
+    # compile every template before the worker takes traffic (TEMPLATE_WARMUP), then report startup time
+    warmup = template_cache.warm_up(app)
+    app.logger.info('App created in %.1f ms (%d templates warmed in %.1f ms)',
+                    (time.perf_counter() - started) * 1000, warmup['templates'], warmup['seconds'] * 1000)
 
     return app
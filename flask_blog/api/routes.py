@@ -0,0 +1,210 @@
+from flask import Blueprint, abort, jsonify, request, url_for
+from werkzeug.exceptions import HTTPException
+from flask_blog import db
+from flask_blog.conditional import as_utc
+from flask_blog.models import Post, User
+from flask_blog.pagination import paginate_keyset
+
+'''
+JSON read API
+Rows are selected as plain column tuples (no Post/User entities, no identity map) and written
+straight into JSON objects. Listings use the same keyset cursors as the HTML pages.
+    fields=id,title,...   only these fields are selected and returned (e.g. skip content)
+    ids=1,2,3             batch lookup of several posts in one query
+    limit=N               page size, 1..MAX_LIMIT
+'''
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_IDS = 100
+
+# field name -> columns it needs
+FIELDS = {
+    'id': (Post.id,),
+    'title': (Post.title,),
+    'date_posted': (Post.date_posted,),
+    'updated_at': (Post.updated_at,),
+    'excerpt': (Post.excerpt,),
+    'content': (Post.content,),
+    'author': (User.username, User.image_file),
+    'url': (),
+}
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+@api.errorhandler(HTTPException)
+def api_error(error):
+    """
+        Answer errors raised by API views as JSON instead of the HTML error pages.
+
+        Args:
+            error (HTTPException): The raised HTTP error.
+
+        Returns:
+            Response: {"error": ..., "message": ...} with the error's status code.
+    """
+    response = jsonify(error=error.name, message=error.description)
+    response.status_code = error.code
+    # keep headers such as Retry-After of a 503
+    for name, value in error.get_headers():
+        if name.lower() != 'content-type':
+            response.headers[name] = value
+    return response
+
+
+# the errors blueprint's app-wide handlers for these codes would win over the class handler above
+for code in (403, 404, 500, 503):
+    api.register_error_handler(code, api_error)
+
+
+def requested_fields():
+    """
+        Parse the fields= query parameter.
+
+        Returns:
+            list[str]: Requested field names, every field if the parameter is absent.
+
+        Raises:
+            400 Bad Request: If an unknown field is requested.
+    """
+    value = request.args.get('fields')
+    if not value:
+        return list(FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        abort(400, description=f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(FIELDS)}')
+    return fields
+
+
+def requested_limit():
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    if not 1 <= limit <= MAX_LIMIT:
+        abort(400, description=f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def post_rows(fields):
+    """
+        Build a column query joining each post to its author, selecting only what `fields` needs.
+
+        Args:
+            fields (list[str]): Requested field names.
+
+        Returns:
+            Query: Query of Row tuples; id and date_posted are always selected for cursors.
+    """
+    columns = {Post.id: None, Post.date_posted: None}
+    for field in fields:
+        columns.update(dict.fromkeys(FIELDS[field]))
+    return db.session.query(*columns).join(User, User.id == Post.user_id)
+
+
+def serialize(row, fields):
+    """
+        Turn a selected row into the JSON object of a post.
+
+        Args:
+            row (Row): Row from post_rows().
+            fields (list[str]): Requested field names.
+
+        Returns:
+            dict: JSON-ready post.
+    """
+    post = {}
+    for field in fields:
+        if field == 'author':
+            post['author'] = {'username': row.username,
+                              'image_url': url_for('static', filename='profile_pics/' + row.image_file,
+                                                   _external=True)}
+        elif field == 'url':
+            post['url'] = url_for('posts.post', post_id=row.id, _external=True)
+        elif field in ('date_posted', 'updated_at'):
+            post[field] = as_utc(getattr(row, field)).isoformat()
+        else:
+            post[field] = getattr(row, field)
+    return post
+
+
+def page_response(page, fields, endpoint, **endpoint_args):
+    def page_url(cursor):
+        if cursor is None:
+            return None
+        return url_for(endpoint, cursor=cursor, limit=request.args.get('limit'),
+                       fields=request.args.get('fields'), _external=True, **endpoint_args)
+
+    return jsonify(posts=[serialize(row, fields) for row in page.items],
+                   next=page_url(page.next_cursor), prev=page_url(page.prev_cursor))
+
+
+@api.route("/posts")
+def posts():
+    """
+        List posts newest first, or fetch several posts by id.
+
+        - ?ids=1,2,3 returns those posts (in the requested order) from a single query;
+          ids that do not exist are left out.
+        - Otherwise posts are paginated by keyset cursor (?cursor=, ?limit=).
+
+        Returns:
+            Response: {"posts": [...], "next": url | null, "prev": url | null},
+                      or {"posts": [...]} for an ids lookup.
+    """
+    fields = requested_fields()
+    ids = request.args.get('ids')
+    if ids:
+        try:
+            post_ids = [int(post_id) for post_id in ids.split(',')]
+        except ValueError:
+            abort(400, description='ids must be a comma separated list of integers')
+        if len(post_ids) > MAX_IDS:
+            abort(400, description=f'At most {MAX_IDS} ids per request')
+        rows = {row.id: row for row in post_rows(fields).filter(Post.id.in_(post_ids))}
+        return jsonify(posts=[serialize(rows[post_id], fields) for post_id in post_ids if post_id in rows])
+
+    page = paginate_keyset(post_rows(fields), cursor=request.args.get('cursor'), per_page=requested_limit())
+    return page_response(page, fields, 'api.posts')
+
+
+@api.route("/posts/<int:post_id>")
+def post(post_id):
+    """
+        Fetch a single post.
+
+        Args:
+            post_id (int): ID of the post.
+
+        Returns:
+            Response: The post as a JSON object.
+
+        Raises:
+            404 Resource Not Found: If post does not exist.
+    """
+    fields = requested_fields()
+    row = post_rows(fields).filter(Post.id == post_id).first()
+    if row is None:
+        abort(404, description=f'Post {post_id} does not exist')
+    return jsonify(serialize(row, fields))
+
+
+@api.route("/users/<string:username>/posts")
+def user_posts(username):
+    """
+        List the posts of one author newest first, paginated by keyset cursor.
+
+        Args:
+            username (str): Author of the posts.
+
+        Returns:
+            Response: {"posts": [...], "next": url | null, "prev": url | null}
+
+        Raises:
+            404 Resource Not Found: If the user does not exist.
+    """
+    fields = requested_fields()
+    page = paginate_keyset(post_rows(fields).filter(User.username == username),
+                           cursor=request.args.get('cursor'), per_page=requested_limit())
+    # the join already filters by author: only an empty page needs to check the user exists
+    if not page.items and not db.session.query(User.id).filter_by(username=username).first():
+        abort(404, description=f'User {username} does not exist')
+    return page_response(page, fields, 'api.user_posts', username=username)
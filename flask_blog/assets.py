@@ -0,0 +1,241 @@
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+'''
+Static asset bundles
+`flask assets build` turns the stylesheets and scripts of layout.html into two bundles:
+    1. third party files (Bootstrap, jQuery, Popper) are downloaded once into static/<ASSETS_VENDOR>
+       and checked against their pinned subresource integrity hash, so pages no longer depend on CDNs
+    2. the files of each bundle are concatenated (and own CSS minified) into
+       static/<ASSETS_DIST>/<name>.<content hash>.<ext>, with precompressed .gz and .br siblings
+    3. manifest.json maps each bundle name to its fingerprinted file
+At runtime url_for('static', filename='site.css') resolves through the manifest to the fingerprinted
+file, served with a one year immutable Cache-Control; a new build changes the hash and so the URL.
+The .br / .gz sibling is sent instead when the browser accepts it. Before the first build
+layout.html keeps using the CDN links and main.css (see assets_built()).
+'''
+
+# file name -> (download URL, sha384 subresource integrity)
+VENDOR_FILES = {
+    'bootstrap.min.css': ('https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css',
+                          'sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm'),
+    'jquery-3.2.1.slim.min.js': ('https://code.jquery.com/jquery-3.2.1.slim.min.js',
+                                 'sha384-KJ3o2DKtIkvYIK3UENzmM7KCkRr/rE9/Qpg6aAZGJwFDMVNA/GpGFF93hXpG5KkN'),
+    'popper.min.js': ('https://cdnjs.cloudflare.com/ajax/libs/popper.js/1.12.9/umd/popper.min.js',
+                      'sha384-ApNbgh9B+Y1QKtv3Rn7W3mgPxhU9K/ScQsAP7hUibX39j7fakFPskvXusvfa0b4Q'),
+    'bootstrap.min.js': ('https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/js/bootstrap.min.js',
+                         'sha384-JZR6Spejh4U02d8jOt6vLEHfe/JQGiRRSQQxSfFWpi1MquVdAyjUar5+76PVCmYl'),
+}
+
+# bundle name -> files in load order ('vendor/' files come from VENDOR_FILES, others from static/)
+BUNDLES = {
+    'site.css': ['vendor/bootstrap.min.css', 'main.css'],
+    'site.js': ['vendor/jquery-3.2.1.slim.min.js', 'vendor/popper.min.js', 'vendor/bootstrap.min.js'],
+}
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MANIFEST = 'manifest.json'
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static asset bundles.')
+
+
+def minify_css(css):
+    """
+        Strip comments and redundant whitespace from a stylesheet.
+
+        Args:
+            css (str): Stylesheet source.
+
+        Returns:
+            str: Minified stylesheet.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # only after ':', a space before it is a descendant selector ('a :hover')
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def fetch_vendor_file(name, folder):
+    """
+        Download a third party file unless present, verifying its pinned integrity hash.
+
+        Args:
+            name (str): Key of VENDOR_FILES.
+            folder (str): Vendor directory.
+
+        Returns:
+            str: Path of the local copy.
+    """
+    path = os.path.join(folder, name)
+    if os.path.exists(path):
+        return path
+    url, integrity = VENDOR_FILES[name]
+    import urllib.request  # only `flask assets build` downloads, the app itself never does
+    with urllib.request.urlopen(url, timeout=30) as response:
+        content = response.read()
+    digest = 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+    if digest != integrity:
+        raise click.ClickException(f'Integrity check failed for {url}')
+    os.makedirs(folder, exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(content)
+    return path
+
+
+def build_bundle(name, sources, static_folder, vendor, dist):
+    """
+        Concatenate the sources of one bundle and write it fingerprinted and precompressed.
+
+        Args:
+            name (str): Bundle name, e.g. 'site.css'.
+            sources (list[str]): Files relative to static/ ('vendor/...' for third party files).
+            static_folder (str): App static folder.
+            vendor (str): Vendor directory name under static/.
+            dist (str): Output directory name under static/.
+
+        Returns:
+            str: Path of the fingerprinted file relative to static/.
+    """
+    stem, extension = os.path.splitext(name)
+    parts = []
+    for source in sources:
+        if source.startswith('vendor/'):
+            path = fetch_vendor_file(source[len('vendor/'):], os.path.join(static_folder, vendor))
+        else:
+            path = os.path.join(static_folder, source)
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        # vendor files are minified upstream already
+        if extension == '.css' and not source.startswith('vendor/'):
+            text = minify_css(text)
+        parts.append(text)
+    # ';' guards against scripts relying on automatic semicolon insertion at the end
+    content = ('\n' if extension == '.css' else ';\n').join(parts).encode('utf-8')
+
+    fingerprinted = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+    output_dir = os.path.join(static_folder, dist)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, fingerprinted)
+    with open(output_path, 'wb') as file:
+        file.write(content)
+    # mtime=0: identical content gives identical .gz bytes across builds
+    with open(output_path + '.gz', 'wb') as file:
+        file.write(gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        with open(output_path + '.br', 'wb') as file:
+            file.write(brotli.compress(content, quality=11))
+    return f'{dist}/{fingerprinted}'
+
+
+class AssetBundles:
+    """
+        Flask extension resolving static URLs to fingerprinted bundles and serving them.
+
+        Configuration:
+            ASSETS_VENDOR (str): Directory under static/ for third party files. Defaults to 'vendor'.
+            ASSETS_DIST (str): Directory under static/ for built bundles. Defaults to 'dist'.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_VENDOR', 'vendor')
+        app.config.setdefault('ASSETS_DIST', 'dist')
+        app.extensions['asset_bundles'] = self._read_manifest(app)
+        app.url_defaults(self._fingerprint_url)
+        app.before_request(self._serve_precompressed)
+        app.after_request(self._cache_forever)
+        app.add_template_global(self.assets_built)
+
+    @property
+    def manifest(self):
+        return current_app.extensions['asset_bundles']
+
+    @staticmethod
+    def _read_manifest(app):
+        path = os.path.join(app.static_folder, app.config['ASSETS_DIST'], MANIFEST)
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def build(self):
+        """
+            Build every bundle of BUNDLES and make the new manifest current.
+
+            Returns:
+                dict[str, str]: Bundle name -> fingerprinted path relative to static/.
+        """
+        app = current_app._get_current_object()
+        manifest = {name: build_bundle(name, sources, app.static_folder, app.config['ASSETS_VENDOR'],
+                                       app.config['ASSETS_DIST'])
+                    for name, sources in BUNDLES.items()}
+        path = os.path.join(app.static_folder, app.config['ASSETS_DIST'], MANIFEST)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(path + '.tmp', path)
+        app.extensions['asset_bundles'] = manifest
+        return manifest
+
+    def assets_built(self):
+        """Template global: True once `flask assets build` has produced the bundles."""
+        return bool(self.manifest)
+
+    def _fingerprint_url(self, endpoint, values):
+        # url_for('static', filename='site.css') -> /static/dist/site.<hash>.css
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def _is_fingerprinted(self, filename):
+        return filename in self.manifest.values()
+
+    def _serve_precompressed(self):
+        if request.endpoint != 'static' or not self._is_fingerprinted(request.view_args.get('filename')):
+            return None
+        filename = request.view_args['filename']
+        # by the client's q-values (q=0 refuses an encoding); sorted() is stable, so br wins ties
+        encodings = sorted((('br', '.br'), ('gzip', '.gz')), key=lambda item: -request.accept_encodings[item[0]])
+        for encoding, suffix in encodings:
+            if request.accept_encodings[encoding] > 0 and \
+                    os.path.exists(os.path.join(current_app.static_folder, filename + suffix)):
+                response = send_from_directory(current_app.static_folder, filename + suffix,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+        return None
+
+    def _cache_forever(self, response):
+        if request.endpoint == 'static' and self._is_fingerprinted(request.view_args.get('filename')):
+            # the URL changes whenever the content does
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+@assets_cli.command('build')
+def build_command():
+    """Vendor, bundle, fingerprint and precompress the static assets."""
+    from flask_blog import asset_bundles
+
+    for name, path in asset_bundles.build().items():
+        click.echo(f'✅ Built {name} -> {path}')
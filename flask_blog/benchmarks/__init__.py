@@ -0,0 +1,12 @@
+'''
+Benchmarks for the hot routes
+    datagen.py    deterministic synthetic dataset (N users, M posts), imported with the bulk loader
+    scenarios.py  one timed request per scenario: index (shallow / deep page), post, user_posts,
+                  login, account upload
+    runner.py     builds the app on a file database, runs every scenario, writes results as JSON,
+                  and compares two result files against a p50 / p95 regression threshold
+
+Usage:
+    python -m flask_blog.benchmarks run --users 1000 --posts 1000000 --output bench.json
+    python -m flask_blog.benchmarks compare baseline.json bench.json --threshold 0.10
+'''
@@ -0,0 +1,47 @@
+import json
+import click
+from flask_blog.benchmarks.runner import run_benchmarks, compare, load
+from flask_blog.benchmarks.scenarios import SCENARIOS
+
+
+@click.group()
+def cli():
+    """Benchmarks of the hot routes (python -m flask_blog.benchmarks)."""
+
+
+@cli.command('run')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--posts', default=100000, show_default=True)
+@click.option('--seed', default=0, show_default=True)
+@click.option('--iterations', default=100, show_default=True)
+@click.option('--warmup', default=10, show_default=True)
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(SCENARIOS)),
+              help='Run only these scenarios (repeatable).')
+@click.option('--data-dir', default='.benchmarks', show_default=True, help='Where generated datasets are kept.')
+@click.option('--fragment-cache/--no-fragment-cache', default=False, show_default=True)
+@click.option('--output', type=click.File('w'), default='-', help='JSON results file (default: stdout).')
+def run_command(users, posts, seed, iterations, warmup, scenarios, data_dir, fragment_cache, output):
+    """Generate (or reuse) the dataset and time every scenario."""
+    results = run_benchmarks(users, posts, seed, iterations, warmup, scenarios, data_dir, fragment_cache)
+    json.dump(results, output, indent=2)
+    output.write('\n')
+    for name, timings in results['scenarios'].items():
+        click.echo(f'{name:<16} p50 {timings["p50_ms"]:8.2f} ms   p95 {timings["p95_ms"]:8.2f} ms', err=True)
+
+
+@cli.command('compare')
+@click.argument('baseline', type=click.Path(exists=True))
+@click.argument('current', type=click.Path(exists=True))
+@click.option('--threshold', default=0.10, show_default=True, help='Allowed slowdown, 0.10 = 10%.')
+def compare_command(baseline, current, threshold):
+    """Exit with status 1 if CURRENT regressed against BASELINE."""
+    regressions = compare(load(baseline), load(current), threshold)
+    for name, metric, before, after in regressions:
+        click.echo(f'❌ {name} {metric}: {before:.2f} ms -> {after:.2f} ms (+{(after / before - 1) * 100:.0f}%)')
+    if regressions:
+        raise SystemExit(1)
+    click.echo(f'✅ No regression beyond {threshold:.0%}')
+
+
+if __name__ == '__main__':
+    cli()
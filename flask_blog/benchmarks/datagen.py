@@ -0,0 +1,53 @@
+import json
+import random
+from datetime import datetime, timedelta
+from flask_bcrypt import generate_password_hash
+
+'''
+Deterministic synthetic data: the same (users, posts, seed) always gives the same rows,
+so results of two runs are comparable. Rows are produced as JSONL lines for bulk.import_rows.
+'''
+PASSWORD = 'password'
+START = datetime(2020, 1, 1)
+WORDS = ('flask', 'python', 'sqlite', 'cache', 'index', 'query', 'template', 'request', 'session',
+         'blueprint', 'cursor', 'feed', 'search', 'latency', 'throughput', 'worker', 'deploy', 'the',
+         'a', 'of', 'and', 'to', 'in', 'is', 'for', 'with', 'on', 'post', 'blog', 'page')
+
+
+def username(number):
+    return f'user{number}'
+
+
+def generate_lines(users, posts, seed=0, log_rounds=4):
+    """
+        Yield JSONL records of `users` users and `posts` posts.
+
+        - Every user has the password PASSWORD (hashed once, shared by all users).
+        - Posts are assigned to authors with a skewed distribution (a few prolific authors)
+          and posted one minute apart, oldest first.
+
+        Args:
+            users (int): Number of users.
+            posts (int): Number of posts.
+            seed (int): Random seed.
+            log_rounds (int): bcrypt cost of the shared password hash.
+
+        Yields:
+            str: One JSON line per row, users first.
+    """
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD, log_rounds).decode('utf-8')
+    for number in range(1, users + 1):
+        yield json.dumps({'type': 'user', 'id': number, 'username': username(number),
+                          'email': f'{username(number)}@example.com', 'image_file': 'default.jpg',
+                          'password': password_hash})
+    for number in range(1, posts + 1):
+        date_posted = (START + timedelta(minutes=number)).isoformat()
+        # paretovariate: most posts by few users, like a real blog platform
+        author = min(int(rng.paretovariate(1.2)), users)
+        paragraphs = rng.randint(1, 6)
+        content = '\n\n'.join(' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+                              for _ in range(paragraphs))
+        yield json.dumps({'type': 'post', 'id': number, 'title': ' '.join(rng.choices(WORDS, k=5)).title(),
+                          'date_posted': date_posted, 'updated_at': date_posted,
+                          'content': content, 'user_id': author})
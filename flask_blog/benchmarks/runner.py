@@ -0,0 +1,154 @@
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from flask_blog import create_app, db
+from flask_blog.config import ProductionConfig, TestingConfig
+from flask_blog.bulk import import_rows
+from flask_blog.benchmarks.datagen import generate_lines
+from flask_blog.benchmarks.scenarios import SCENARIOS, prepare
+
+
+def make_config(db_path, static_folder, fragment_cache=False):
+    """
+        TestingConfig on a database file with the production SQLite pragmas and bcrypt cost.
+
+        Args:
+            db_path (str): SQLite file of the dataset.
+            static_folder (str): Scratch static folder (uploads land here, not in the source tree).
+            fragment_cache (bool): Measure with the fragment cache on (warm) or off (render every time).
+
+        Returns:
+            type: Config class for create_app.
+    """
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+        # the login scenario measures password checks at their real cost, not the tests' minimum
+        BCRYPT_LOG_ROUNDS = ProductionConfig.BCRYPT_LOG_ROUNDS
+        FRAGMENT_CACHE_ENABLED = fragment_cache
+        MAIL_SPOOL_DIR = os.path.join(static_folder, 'mail_spool')
+        SLOW_QUERY_LOG = os.path.join(static_folder, 'slow_queries.jsonl')
+        JINJA_BYTECODE_CACHE_DIR = os.path.join(static_folder, 'jinja_cache')
+        # the login scenario repeats one account from one IP: measure the hashing, not the 429s
+        RATELIMIT_ENABLED = False
+        BENCHMARK_STATIC_FOLDER = static_folder
+    return BenchmarkConfig
+
+
+def create_benchmark_app(config):
+    app = create_app(config)
+    app.static_folder = config.BENCHMARK_STATIC_FOLDER
+    os.makedirs(os.path.join(app.static_folder, 'profile_pics'), exist_ok=True)
+    return app
+
+
+def build_dataset(data_dir, users, posts, seed):
+    """
+        Create (or reuse) the SQLite file of a dataset.
+
+        Args:
+            data_dir (str): Directory holding datasets, keyed by size and seed.
+            users (int): Number of users.
+            posts (int): Number of posts.
+            seed (int): Generator seed.
+
+        Returns:
+            str: Path of the database file.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    # the bcrypt cost is part of the name: hashes made at another cost would be rehashed on login
+    db_path = os.path.join(data_dir, f'blog-{users}u-{posts}p-{seed}-b{ProductionConfig.BCRYPT_LOG_ROUNDS}.db')
+    if os.path.exists(db_path):
+        return db_path
+    partial = db_path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    app = create_benchmark_app(make_config(partial, os.path.join(data_dir, 'static')))
+    with app.app_context():
+        db.create_all()
+        import_rows(db.engine, generate_lines(users, posts, seed, app.config['BCRYPT_LOG_ROUNDS']))
+        db.engine.dispose()
+    os.replace(partial, db_path)
+    return db_path
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_scenario(run, iterations, warmup):
+    """
+        Time repeated calls of a prepared scenario.
+
+        Args:
+            run (callable): Prepared scenario.
+            iterations (int): Timed calls.
+            warmup (int): Untimed calls first (caches, SQLite page cache, JIT-less warm paths).
+
+        Returns:
+            dict: p50 / p95 / mean / min / max in milliseconds.
+    """
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {'iterations': iterations, 'p50_ms': percentile(samples, 0.50), 'p95_ms': percentile(samples, 0.95),
+            'mean_ms': statistics.fmean(samples), 'min_ms': samples[0], 'max_ms': samples[-1]}
+
+
+def run_benchmarks(users, posts, seed=0, iterations=100, warmup=10, scenarios=None,
+                   data_dir='.benchmarks', fragment_cache=False):
+    """
+        Build the dataset, run the scenarios and return the results.
+
+        Returns:
+            dict: {"meta": {...}, "scenarios": {name: timings}}
+    """
+    db_path = build_dataset(data_dir, users, posts, seed)
+    app = create_benchmark_app(make_config(db_path, os.path.join(data_dir, 'static'), fragment_cache))
+    results = {}
+    for name in scenarios or SCENARIOS:
+        results[name] = time_scenario(prepare(name, app, seed), iterations, warmup)
+    with app.app_context():
+        db.engine.dispose()
+    meta = {'users': users, 'posts': posts, 'seed': seed, 'iterations': iterations, 'warmup': warmup,
+            'fragment_cache': fragment_cache, 'python': platform.python_version(),
+            'platform': platform.platform(), 'created_at': datetime.now(timezone.utc).isoformat()}
+    return {'meta': meta, 'scenarios': results}
+
+
+def compare(baseline, current, threshold=0.10, metrics=('p50_ms', 'p95_ms')):
+    """
+        Find scenarios whose p50 / p95 got slower than the baseline by more than `threshold`.
+
+        Args:
+            baseline (dict): Results of the reference run.
+            current (dict): Results of the run to check.
+            threshold (float): Allowed relative slowdown, 0.10 = 10%.
+            metrics (tuple[str]): Timings compared.
+
+        Returns:
+            list[tuple[str, str, float, float]]: (scenario, metric, baseline ms, current ms) of each regression.
+    """
+    regressions = []
+    for name, timings in current['scenarios'].items():
+        reference = baseline['scenarios'].get(name)
+        if reference is None:
+            continue
+        for metric in metrics:
+            if timings[metric] > reference[metric] * (1 + threshold):
+                regressions.append((name, metric, reference[metric], timings[metric]))
+    return regressions
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,101 @@
+import io
+import random
+from PIL import Image
+from flask_blog import avatar_pipeline
+from flask_blog.models import User, Post
+from flask_blog.pagination import NEXT, encode_cursor
+from flask_blog.benchmarks.datagen import PASSWORD, username
+
+'''
+Timed scenarios. Each scenario is prepared once (setup) and returns a callable making one
+request with a test client; only that call is timed. Every request must succeed, a scenario
+measuring error pages would be meaningless. The whole body is read: for streamed pages the
+timing covers the full render, not just the first chunk.
+'''
+
+
+def check(response, status=200):
+    response.get_data()
+    response.close()
+    assert response.status_code == status, f'{response.request.path}: {response.status_code}'
+    return response
+
+
+def login(client, number=1):
+    check(client.post('/login', data={'email': f'{username(number)}@example.com', 'password': PASSWORD}), 302)
+
+
+def index_shallow(app, client, rng):
+    return lambda: check(client.get('/'))
+
+
+def index_deep(app, client, rng):
+    # cursor of a post 90% of the way down the feed: the keyset seek must stay as fast as page 1
+    with app.app_context():
+        total = Post.query.count()
+        edge = Post.query.order_by(Post.date_posted.desc(), Post.id.desc()).offset(int(total * 0.9)).first()
+        cursor = encode_cursor(NEXT, edge.date_posted, edge.id)
+    return lambda: check(client.get(f'/?cursor={cursor}'))
+
+
+def post(app, client, rng):
+    with app.app_context():
+        last_id = Post.query.order_by(Post.id.desc()).first().id
+    return lambda: check(client.get(f'/post/{rng.randint(1, last_id)}'))
+
+
+def user_posts(app, client, rng):
+    # user1 is the most prolific author of the generated data
+    return lambda: check(client.get(f'/user/{username(1)}'))
+
+
+def login_logout(app, client, rng):
+    # bcrypt at the production cost (BenchmarkConfig), hashes of the dataset included: the
+    # timings show what a real login costs, not the cheapest work factor of the tests
+    with app.app_context():
+        users = min(User.query.count(), 10)
+
+    def run():
+        login(client, rng.randint(1, users))
+        check(client.get('/logout'), 302)
+    return run
+
+
+def account_upload(app, client, rng):
+    login(client)
+    image = io.BytesIO()
+    Image.new('RGB', (1200, 900), 'teal').save(image, 'JPEG')
+
+    def run():
+        data = {'username': username(1), 'email': f'{username(1)}@example.com',
+                'picture': (io.BytesIO(image.getvalue()), 'photo.jpg')}
+        check(client.post('/account', data=data, content_type='multipart/form-data'), 302)
+        # the request only queues the upload: time it until the variants are built
+        with app.app_context():
+            assert avatar_pipeline.wait(timeout=60), 'avatar job still running after 60 s'
+    return run
+
+
+SCENARIOS = {
+    'index_shallow': index_shallow,
+    'index_deep': index_deep,
+    'post': post,
+    'user_posts': user_posts,
+    'login': login_logout,
+    'account_upload': account_upload,
+}
+
+
+def prepare(name, app, seed=0):
+    """
+        Set up a scenario on its own test client.
+
+        Args:
+            name (str): Key of SCENARIOS.
+            app (Flask): Application to benchmark.
+            seed (int): Seed of the scenario's random choices.
+
+        Returns:
+            callable: Makes one request.
+    """
+    return SCENARIOS[name](app, app.test_client(), random.Random(seed))
@@ -0,0 +1,209 @@
+import json
+import time
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from flask_blog import db
+from flask_blog.cache import bump_fragment_version
+from flask_blog.models import User, Post
+from flask_blog.posts.utils import make_excerpt, repair_counters
+from flask_blog.search import rebuild_index
+
+'''
+Bulk import / export
+JSON Lines, one object per row, users before posts:
+    {"type": "user", "id": 1, "username": ..., "email": ..., "image_file": ..., "password": <bcrypt hash>}
+    {"type": "post", "id": 1, "title": ..., "date_posted": <iso>, "updated_at": <iso>, "content": ..., "user_id": 1}
+Both directions stream in constant memory: export reads with a server-side cursor in chunks,
+import parses line by line and inserts with executemany in batches of BATCH_SIZE rows, committing
+every TRANSACTION_SIZE rows. Ids and password hashes are kept as they are, so the target database
+must not already contain the same ids. Derived data (excerpts, post counters, search index) is
+recomputed by the import rather than read from the file: counters and index once at the end, as
+they are rebuilt from the whole tables. If the import fails after some transactions were committed,
+they are rebuilt for the committed rows before the error is raised.
+'''
+BATCH_SIZE = 1000
+TRANSACTION_SIZE = 50000
+
+USER_COLUMNS = ('id', 'username', 'email', 'image_file', 'password')
+POST_COLUMNS = ('id', 'title', 'date_posted', 'updated_at', 'content', 'user_id')
+DATE_COLUMNS = ('date_posted', 'updated_at')
+
+blog_cli = AppGroup('blog', help='Bulk import and export of users and posts.')
+
+
+def export_rows(conn):
+    """
+        Yield every user then every post as a JSON-ready dict.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+
+        Yields:
+            dict: One row with its "type".
+    """
+    for record_type, table, columns in (('user', User.__table__, USER_COLUMNS),
+                                        ('post', Post.__table__, POST_COLUMNS)):
+        query = db.select(*(table.c[column] for column in columns)).order_by(table.c.id)
+        # stream_results + partitions: rows are fetched BATCH_SIZE at a time, never all at once
+        result = conn.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(query)
+        for row in result:
+            record = {'type': record_type, **row._asdict()}
+            for column in DATE_COLUMNS:
+                if column in record:
+                    record[column] = record[column].isoformat()
+            yield record
+
+
+def parse_record(line, number):
+    """
+        Parse one JSONL line into (type, row) ready for insertion.
+
+        Args:
+            line (str): JSON text.
+            number (int): Line number, for error messages.
+
+        Returns:
+            tuple[str, dict]: 'user' or 'post', and the column values.
+
+        Raises:
+            click.ClickException: If the line is not a valid user or post record.
+    """
+    try:
+        record = json.loads(line)
+        record_type = record.pop('type')
+        if record_type == 'user':
+            return 'user', {column: record[column] for column in USER_COLUMNS}
+        if record_type == 'post':
+            row = {column: record[column] for column in POST_COLUMNS}
+            for column in DATE_COLUMNS:
+                row[column] = datetime.fromisoformat(row[column])
+            row['excerpt'] = make_excerpt(row['content'])
+            return 'post', row
+        raise ValueError(f'unknown type {record_type!r}')
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        raise click.ClickException(f'Line {number}: invalid record ({error})')
+
+
+def refresh_derived(conn):
+    """
+        Rebuild the post counters and search index from the tables, and drop cached fragments.
+
+        Args:
+            conn (Connection): Connection of the write transaction.
+    """
+    repair_counters(conn)
+    rebuild_index(conn)
+    # running servers drop their cached listings
+    bump_fragment_version(conn)
+
+
+def import_rows(engine, lines, batch_size=BATCH_SIZE, transaction_size=TRANSACTION_SIZE, progress=None):
+    """
+        Insert users and posts read from JSONL lines.
+
+        Args:
+            engine (Engine): Target database.
+            lines (iterable[str]): JSONL lines, e.g. an open file.
+            batch_size (int): Rows per executemany.
+            transaction_size (int): Rows per committed transaction.
+            progress (callable | None): Called with the running row count after every commit.
+
+        Returns:
+            dict[str, int]: Rows imported per type.
+    """
+    tables = {'user': User.__table__, 'post': Post.__table__}
+    counts = {'user': 0, 'post': 0}
+    batches = {'user': [], 'post': []}
+    conn = engine.connect()
+    transaction = conn.begin()
+    uncommitted = 0
+    committed = 0
+
+    def flush():
+        # users first: posts of the same batch may reference them
+        for record_type in ('user', 'post'):
+            if batches[record_type]:
+                conn.execute(tables[record_type].insert(), batches[record_type])
+                counts[record_type] += len(batches[record_type])
+                batches[record_type] = []
+
+    try:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            record_type, row = parse_record(line, number)
+            batches[record_type].append(row)
+            uncommitted += 1
+            if len(batches[record_type]) >= batch_size:
+                flush()
+            if uncommitted >= transaction_size:
+                flush()
+                # cheap, unlike the counters and index: servers show each chunk as it lands
+                bump_fragment_version(conn)
+                transaction.commit()
+                transaction = conn.begin()
+                committed += uncommitted
+                uncommitted = 0
+                if progress:
+                    progress(committed)
+        flush()
+        refresh_derived(conn)
+        transaction.commit()
+    except BaseException:
+        transaction.rollback()
+        if committed:
+            # the committed chunks stay: bring counters and index in line with them before giving up
+            with conn.begin():
+                refresh_derived(conn)
+        raise
+    finally:
+        conn.close()
+    return counts
+
+
+def report(verb, counts, started):
+    total = sum(counts.values())
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return (f'✅ {verb} {counts["user"]} users and {counts["post"]} posts '
+            f'in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)')
+
+
+@blog_cli.command('export')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+def export_command(output):
+    """Write every user and post as JSON Lines to OUTPUT (default: stdout)."""
+    started = time.perf_counter()
+    counts = {'user': 0, 'post': 0}
+    with db.engine.connect() as conn:
+        for record in export_rows(conn):
+            output.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            counts[record['type']] += 1
+    # the report goes to stderr so `flask blog export > dump.jsonl` keeps the file clean
+    click.echo(report('Exported', counts, started), err=True)
+
+
+@blog_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Rows per executemany.')
+@click.option('--transaction-size', default=TRANSACTION_SIZE, show_default=True, help='Rows per commit.')
+def import_command(source, batch_size, transaction_size):
+    """Insert users and posts from a JSON Lines file made by `flask blog export`."""
+    started = time.perf_counter()
+    committed = 0
+
+    def progress(rows):
+        nonlocal committed
+        committed = rows
+        elapsed = time.perf_counter() - started
+        click.echo(f'… {rows} rows committed ({rows / elapsed:,.0f} rows/s)', err=True)
+
+    try:
+        counts = import_rows(db.engine, source, batch_size, transaction_size, progress)
+    except Exception:
+        if committed:
+            click.echo(f'⚠️ {committed} rows committed before the error are kept, with post counters and '
+                       'search index rebuilt for them. If that rebuild failed too, run '
+                       '`flask posts repair-counters` and `flask search rebuild`.', err=True)
+        raise
+    click.echo(report('Imported', counts, started))
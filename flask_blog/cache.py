@@ -0,0 +1,385 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+
+'''
+In-process caches: rendered fragments and logged-in user identities.
+
+Rendered fragment cache
+Stores rendered HTML fragments (post list bodies, single post articles) in process memory,
+with LRU eviction once the total size passes FRAGMENT_CACHE_MAX_BYTES.
+Every entry carries tags describing what it was rendered from, e.g.
+    'post:12'      => the fragment shows post 12
+    'author:3'     => the fragment shows user 3's username / avatar
+    'home:head'    => the fragment is a home feed page that a brand new post would appear on
+so writes can invalidate exactly the entries they affect: fragment_cache.invalidate('post:12')
+Each worker process has its own store. invalidate() also bumps a version stamp shared through the
+database (Counter.FRAGMENT_CACHE), as do the CLI commands writing posts (bump_fragment_version);
+a store that sees the stamp change (checked at most every FRAGMENT_CACHE_SYNC_INTERVAL seconds)
+drops all its entries, so another worker's write is visible within that interval.
+
+Identity cache
+Flask-Login calls the user loader on every authenticated request. IdentityCache keeps the
+user's columns for IDENTITY_CACHE_TTL seconds (bounded, LRU) and hands out detached User
+snapshots built from them, so most requests skip the SELECT on the user table.
+
+Following the factory pattern, the extension objects hold no state: each app gets its own
+stores in app.extensions['fragment_cache'] and app.extensions['identity_cache'].
+'''
+
+# html: rendered Markup, version: tuple describing the rendered data (ETag input),
+# last_modified: newest modification date shown in the fragment (or None)
+Fragment = namedtuple('Fragment', ['html', 'version', 'last_modified'])
+
+
+class FragmentStore:
+    """
+        Thread-safe LRU store of rendered fragments with a memory cap and tag index.
+
+        Attributes:
+            max_bytes (int): Approximate memory budget for cached values.
+            size (int): Approximate memory currently used.
+            hits, misses, evictions (int): Counters for sizing the cache.
+            generation (int): Incremented on every invalidation.
+            version (int | None): Shared version stamp the entries were cached under, None before the first sync.
+            synced_at (float): time.monotonic() of the last check of the shared stamp.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.generation = 0
+        self.version = None
+        self.synced_at = float('-inf')
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key => (value, size, tags)
+        self._tags = {}                # tag => set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags=(), generation=None):
+        size = sys.getsizeof(value.html if isinstance(value, Fragment) else value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # an invalidation ran while the value was being rendered: it may already be stale
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self._entries[key] = (value, size, frozenset(tags))
+            self.size += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            # evict least recently used entries until back under the memory cap
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def sync(self, version, now):
+        """Drop every entry if another process changed the shared version stamp."""
+        with self._lock:
+            self.synced_at = now
+            if self.version is not None and version != self.version:
+                self._clear()
+            self.version = version
+
+    def advance(self, version):
+        """Record our own bump of the shared stamp: only a gap means someone else wrote too."""
+        with self._lock:
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _clear(self):
+        # caller holds the lock; renders started before the clear must not be cached
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+
+    def _remove(self, key):
+        # caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry[1]
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class FragmentCache:
+    """
+        Flask extension giving routes access to the current app's FragmentStore.
+
+        Configuration:
+            FRAGMENT_CACHE_ENABLED (bool): Set False to always render. Defaults to True.
+            FRAGMENT_CACHE_MAX_BYTES (int): Memory cap of the store. Defaults to 16 MiB.
+            FRAGMENT_CACHE_SYNC_INTERVAL (float | None): Seconds between checks of the shared version
+                stamp, i.e. how long another process's write can go unseen. None keeps the store private
+                to this process (single worker). Defaults to 1.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+        app.config.setdefault('FRAGMENT_CACHE_SYNC_INTERVAL', 1.0)
+        app.extensions['fragment_cache'] = FragmentStore(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+
+    @property
+    def store(self):
+        return current_app.extensions['fragment_cache']
+
+    @property
+    def generation(self):
+        """Invalidation counter, read before loading data and passed back to set()."""
+        return self.store.generation
+
+    def get(self, key):
+        """
+            Return the cached Fragment for `key`.
+
+            Args:
+                key (tuple): Cache key, e.g. ('home', cursor).
+
+            Returns:
+                Fragment | None: The cached fragment, None on a miss or if the cache is disabled.
+        """
+        if not current_app.config['FRAGMENT_CACHE_ENABLED']:
+            return None
+        self._sync()
+        return self.store.get(key)
+
+    def set(self, key, fragment, tags, generation):
+        """
+            Cache a rendered Fragment under `key`.
+
+            Args:
+                key (tuple): Cache key.
+                fragment (Fragment): Rendered fragment.
+                tags (set[str]): Invalidation tags, see listing_tags().
+                generation (int): Value of `generation` read before the data was loaded;
+                                  the fragment is dropped if an invalidation ran since.
+        """
+        if current_app.config['FRAGMENT_CACHE_ENABLED']:
+            self.store.set(key, fragment, tags, generation=generation)
+
+    def invalidate(self, *tags):
+        """Drop every cached fragment carrying any of the given tags; other processes drop their whole store."""
+        from flask_blog import db
+
+        self.store.invalidate(*tags)
+        if current_app.config['FRAGMENT_CACHE_SYNC_INTERVAL'] is not None:
+            version = bump_fragment_version(db.session.connection())
+            db.session.commit()
+            self.store.advance(version)
+
+    def _sync(self):
+        from flask_blog.models import Counter
+
+        interval = current_app.config['FRAGMENT_CACHE_SYNC_INTERVAL']
+        now = time.monotonic()
+        if interval is not None and now - self.store.synced_at >= interval:
+            self.store.sync(Counter.get(Counter.FRAGMENT_CACHE), now)
+
+
+def bump_fragment_version(conn):
+    """
+        Make every process drop its cached fragments; call in the transaction of a write they may show.
+
+        Args:
+            conn (Connection): Connection of the write transaction.
+
+        Returns:
+            int: New value of the shared version stamp.
+    """
+    from flask_blog.models import Counter
+
+    Counter.add(conn, Counter.FRAGMENT_CACHE, 1)
+    counter_table = Counter.__table__
+    return conn.execute(select(counter_table.c.value)
+                        .where(counter_table.c.name == Counter.FRAGMENT_CACHE)).scalar()
+
+
+def listing_tags(posts, head_tag):
+    """
+        Build the invalidation tags of a rendered post listing page.
+
+        Args:
+            posts (KeysetPage): The rendered page.
+            head_tag (str): Tag for pages a brand new post would appear on,
+                            i.e. the first page and pages reached with a "Newer" cursor.
+
+        Returns:
+            set[str]: Tags for FragmentCache.
+    """
+    from flask_blog.pagination import NEXT
+
+    tags = set()
+    for post in posts.items:
+        tags.add(f'post:{post.id}')
+        tags.add(f'author:{post.user_id}')
+    if posts.following is not None:
+        # deleting the post just past the page can flip its "Older" / "Newer" link
+        tags.add(f'post:{posts.following.id}')
+    if posts.direction != NEXT:
+        tags.add(head_tag)
+    return tags
+
+
+def listing_version(posts):
+    """
+        Describe the data shown by a rendered post listing page, as input for its ETag.
+
+        Args:
+            posts (KeysetPage): The rendered page.
+
+        Returns:
+            tuple: Post ids, modification dates and author details, plus pagination state.
+    """
+    return (tuple((post.id, post.updated_at, post.author.username, post.author.image_file) for post in posts.items),
+            posts.has_next, posts.has_prev)
+
+
+class IdentityStore:
+    """
+        Thread-safe LRU store of user column values with a time-to-live.
+
+        Attributes:
+            ttl (float): Seconds an entry stays valid.
+            max_entries (int): Maximum number of cached users.
+            hits, misses, evictions (int): Counters for sizing the cache.
+    """
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # user id => (expires_at, column values)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'max_entries': self.max_entries, 'ttl': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class IdentityCache:
+    """
+        Flask extension caching the users loaded by Flask-Login's user_loader.
+
+        Snapshots are detached from the session: they can be read (templates, current_user.id)
+        but changes to them are not saved. Routes that modify the logged-in user load it with
+        db.session.get(User, current_user.id) and call invalidate() after committing.
+
+        Configuration:
+            IDENTITY_CACHE_TTL (int): Seconds a cached user stays valid. Defaults to 300.
+                                      Also bounds staleness across worker processes.
+            IDENTITY_CACHE_MAX_ENTRIES (int): Maximum number of cached users. Defaults to 10000.
+    """
+    # columns copied into the snapshot; the password hash is deliberately not cached
+    columns = ('id', 'username', 'email', 'image_file')
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IDENTITY_CACHE_TTL', 300)
+        app.config.setdefault('IDENTITY_CACHE_MAX_ENTRIES', 10000)
+        app.extensions['identity_cache'] = IdentityStore(app.config['IDENTITY_CACHE_TTL'],
+                                                         app.config['IDENTITY_CACHE_MAX_ENTRIES'])
+
+    @property
+    def store(self):
+        return current_app.extensions['identity_cache']
+
+    def load(self, user_id):
+        """
+            Return a detached User snapshot, reading the database only on a cache miss.
+
+            Args:
+                user_id (int): ID of the user stored in the session.
+
+            Returns:
+                User | None: Detached snapshot, or None if the user does not exist.
+        """
+        from flask_blog import db
+        from flask_blog.models import User
+
+        values = self.store.get(user_id)
+        if values is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            values = {column: getattr(user, column) for column in self.columns}
+            self.store.set(user_id, values)
+        # fresh instance per request: snapshots are never shared between threads
+        snapshot = User(**values)
+        make_transient_to_detached(snapshot)
+        return snapshot
+
+    def invalidate(self, user_id):
+        """Drop the cached snapshot of a user after it changed."""
+        self.store.invalidate(user_id)
@@ -0,0 +1,241 @@
+import threading
+import zlib
+from flask import request
+from flask_blog.metrics import PREFIX, Histogram, escape_label
+
+'''
+Response compression
+WSGI middleware wrapped around app.wsgi_app by create_app. Responses are compressed with brotli
+or gzip, whichever the client prefers in Accept-Encoding (brotli wins ties; it is only used if the
+brotli package is installed), when:
+    - the mimetype is text (HTML, JSON, Atom, CSS / JS, ...), see COMPRESS_MIMETYPES
+    - the response has no Content-Encoding yet (precompressed asset bundles are left alone)
+    - the body is at least COMPRESS_MIN_SIZE bytes, or of unknown length (streamed)
+Bodies of known length are compressed in one go. Streamed bodies (feeds, streamed pages) are
+compressed chunk by chunk and flushed after each chunk, so the client still receives them
+progressively. Compressed responses get a weak ETag (the bytes differ from the identity
+representation) and `Vary: Accept-Encoding`.
+Bytes in / out per endpoint are exported at /metrics.
+'''
+COMPRESS_MIMETYPES = ('text/html', 'text/plain', 'text/css', 'text/xml', 'text/javascript',
+                      'application/json', 'application/javascript', 'application/xml',
+                      'application/atom+xml', 'image/svg+xml')
+RATIO_BUCKETS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0)
+ENDPOINT_KEY = 'flask_blog.endpoint'
+
+
+def load_brotli():
+    # imported on the first brotli response only (see importtime.DEFERRED_MODULES)
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate(accept_encoding, brotli_available):
+    """
+        Pick the response encoding from an Accept-Encoding header.
+
+        Args:
+            accept_encoding (str): Header value, e.g. 'gzip, deflate, br;q=0.9'.
+            brotli_available (bool): Whether 'br' can be produced.
+
+        Returns:
+            str | None: 'br', 'gzip' or None (identity).
+    """
+    qualities = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip()] = quality
+    candidates = [coding for coding in ('br', 'gzip') if coding != 'br' or brotli_available]
+    scored = [(qualities.get(coding, qualities.get('*', 0.0)), coding) for coding in candidates]
+    # max() keeps the first of equal qualities: br wins ties
+    quality, coding = max(scored, key=lambda item: item[0], default=(0.0, None))
+    return coding if quality > 0 else None
+
+
+class Compressor:
+    """Incremental gzip or brotli compressor with a common interface."""
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = load_brotli().Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS: gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk, flush):
+        if self.encoding == 'br':
+            data = self._brotli.process(chunk)
+            return data + self._brotli.flush() if flush else data
+        data = self._zlib.compress(chunk)
+        return data + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self):
+        return self._brotli.finish() if self.encoding == 'br' else self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionStats:
+    """Bytes before / after compression per endpoint and encoding, plus a ratio histogram."""
+    def __init__(self):
+        self.ratio = Histogram(f'{PREFIX}_compression_ratio', 'Compressed size / original size per response.',
+                               RATIO_BUCKETS)
+        self.bytes = {}  # (endpoint, encoding) -> [bytes in, bytes out]
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, encoding, bytes_in, bytes_out):
+        with self._lock:
+            totals = self.bytes.setdefault((endpoint, encoding), [0, 0])
+            totals[0] += bytes_in
+            totals[1] += bytes_out
+        if bytes_in:
+            self.ratio.observe(endpoint, bytes_out / bytes_in)
+
+    def render(self):
+        """Prometheus text lines, appended to /metrics."""
+        lines = []
+        with self._lock:
+            totals = {key: list(value) for key, value in self.bytes.items()}
+        for index, direction in enumerate(('input', 'output')):
+            name = f'{PREFIX}_compression_{direction}_bytes_total'
+            lines += [f'# HELP {name} Response body bytes {"before" if index == 0 else "after"} compression.',
+                      f'# TYPE {name} counter']
+            for (endpoint, encoding), value in sorted(totals.items()):
+                lines.append(f'{name}{{endpoint="{escape_label(endpoint)}",encoding="{encoding}"}} {value[index]}')
+        return lines + self.ratio.render()
+
+
+class CompressionMiddleware:
+    """
+        WSGI middleware compressing response bodies.
+
+        Attributes:
+            wsgi_app (callable): Wrapped WSGI application.
+            stats (CompressionStats): Per endpoint figures.
+    """
+    def __init__(self, wsgi_app, min_size=500, gzip_level=6, brotli_quality=4, mimetypes=COMPRESS_MIMETYPES):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = mimetypes
+        self.stats = CompressionStats()
+        self._brotli_available = None
+
+    def _encoding(self, environ):
+        accept_encoding = environ.get('HTTP_ACCEPT_ENCODING', '')
+        if not accept_encoding or environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        if self._brotli_available is None and 'br' in accept_encoding:
+            self._brotli_available = load_brotli() is not None
+        return negotiate(accept_encoding, bool(self._brotli_available))
+
+    def _should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        values = {name.lower(): value for name, value in headers}
+        mimetype = values.get('content-type', '').split(';')[0].strip().lower()
+        if mimetype not in self.mimetypes or 'content-encoding' in values:
+            return False
+        if 'no-transform' in values.get('cache-control', ''):
+            return False
+        length = values.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = self._encoding(environ)
+        if encoding is None:
+            return self.wsgi_app(environ, start_response)
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            state['compress'] = self._should_compress(status, headers)
+            if state['compress']:
+                state['streamed'] = not any(name.lower() == 'content-length' for name, _ in headers)
+                vary = [value for name, value in headers if name.lower() == 'vary']
+                headers = [self._rewrite_header(name, value) for name, value in headers
+                           if name.lower() not in ('content-length', 'vary')]
+                headers += [('Content-Encoding', encoding), ('Vary', ', '.join(vary + ['Accept-Encoding']))]
+            elif status.startswith('304'):
+                # a 304 repeats the validator the compressed 200 would carry
+                headers = [self._rewrite_header(name, value) for name, value in headers]
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if not state.get('compress'):
+            return app_iter
+        return self._compress(app_iter, environ, encoding, state['streamed'])
+
+    @staticmethod
+    def _rewrite_header(name, value):
+        # the compressed bytes are a different representation: only weakly equal to the identity one
+        if name.lower() == 'etag' and not value.startswith('W/'):
+            return name, f'W/{value}'
+        return name, value
+
+    def _compress(self, app_iter, environ, encoding, streamed):
+        compressor = Compressor(encoding, self.gzip_level, self.brotli_quality)
+        bytes_in = bytes_out = 0
+        try:
+            if streamed:
+                for chunk in app_iter:
+                    if chunk:
+                        data = compressor.compress(chunk, flush=True)
+                        bytes_in += len(chunk)
+                        bytes_out += len(data)
+                        yield data
+            else:
+                body = b''.join(app_iter)
+                bytes_in = len(body)
+                data = compressor.compress(body, flush=False)
+                bytes_out += len(data)
+                yield data
+            data = compressor.finish()
+            bytes_out += len(data)
+            yield data
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        self.stats.record(environ.get(ENDPOINT_KEY) or '<unmatched>', encoding, bytes_in, bytes_out)
+
+
+class ResponseCompression:
+    """
+        Flask extension installing CompressionMiddleware on the app.
+
+        Configuration:
+            COMPRESS_ENABLED (bool): Defaults to True.
+            COMPRESS_MIN_SIZE (int): Smaller bodies of known length are sent as is. Defaults to 500.
+            COMPRESS_GZIP_LEVEL (int): zlib level, 1 (fast) to 9 (small). Defaults to 6.
+            COMPRESS_BROTLI_QUALITY (int): brotli quality, 0 to 11; dynamic pages want speed. Defaults to 4.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        if not app.config['COMPRESS_ENABLED']:
+            return
+        middleware = CompressionMiddleware(app.wsgi_app, app.config['COMPRESS_MIN_SIZE'],
+                                           app.config['COMPRESS_GZIP_LEVEL'], app.config['COMPRESS_BROTLI_QUALITY'])
+        app.wsgi_app = middleware
+        app.extensions['compression'] = middleware.stats
+        app.after_request(self._tag_endpoint)
+
+    @staticmethod
+    def _tag_endpoint(response):
+        # the middleware runs outside Flask: leave it the endpoint for the per route metrics
+        request.environ[ENDPOINT_KEY] = request.endpoint
+        return response
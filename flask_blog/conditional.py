@@ -0,0 +1,130 @@
+import hashlib
+from datetime import timezone
+from flask import request, session, make_response
+from flask_login import current_user
+from markupsafe import Markup
+from flask_blog import fragment_cache
+from flask_blog.cache import Fragment
+from flask_blog.streaming import DeferredMarkup
+
+'''
+Conditional GET (ETag / Last-Modified / 304 Not Modified)
+Public read routes answer repeat requests with an empty 304 when the client's copy is current.
+Validators are computed from the data a page shows, before any template is rendered:
+    - ETag: hash of the fragment version (ids, modification dates, author names of the posts shown),
+      the page's own dynamic data (e.g. post total) and the viewer (navbar differs when logged in)
+    - Last-Modified: newest Post.updated_at shown, only where deletions cannot make it go stale
+'''
+
+
+def make_etag(*parts):
+    """
+        Build a strong ETag from page data and the current viewer.
+
+        Args:
+            *parts: Hashable description of the data rendered in the page.
+
+        Returns:
+            str: Hex digest used as the ETag value.
+    """
+    viewer = (current_user.id, current_user.username) if current_user.is_authenticated else None
+    return hashlib.sha1(repr((parts, viewer)).encode('utf-8')).hexdigest()
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+        Check the request's conditional headers against the page validators.
+
+        - If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+        - Pages with pending flash messages are never answered with 304, the
+          messages would otherwise be lost.
+
+        Args:
+            etag (str): Current ETag of the page.
+            last_modified (datetime | None): Current modification date (naive UTC).
+
+        Returns:
+            bool: True if a 304 can be sent.
+    """
+    if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+        return False
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        # HTTP dates have second precision
+        return as_utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag, last_modified=None):
+    """
+        Attach ETag / Last-Modified / Cache-Control to a page response.
+
+        Args:
+            response (Response): Response to update.
+            etag (str): ETag of the page.
+            last_modified (datetime | None): Modification date (naive UTC).
+
+        Returns:
+            Response: The same response.
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = as_utc(last_modified)
+    # caches may store the page but must revalidate it on every use
+    response.cache_control.no_cache = True
+    if current_user.is_authenticated:
+        response.cache_control.private = True
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    """Empty 304 response carrying the page validators."""
+    return add_validators(make_response('', 304), etag, last_modified)
+
+
+def as_utc(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def render_cached_page(key, load, render_fragment, render_page, page_version=(), stream=False):
+    """
+        Render a page built around a cached fragment, answering 304 when possible.
+
+        - Fragment cache hit: validators come from the cached fragment, no query runs.
+        - Cache miss: load() runs the queries, validators are checked before rendering,
+          then the fragment is rendered and cached.
+        - stream: render_page streams the page (streaming.stream_page); on a cache miss the
+          fragment is rendered when the page reaches it, after the head has been sent.
+
+        Args:
+            key (tuple): Fragment cache key.
+            load (callable): Returns (context, tags, version, last_modified) for the fragment.
+            render_fragment (callable): Renders the fragment html from context.
+            render_page (callable): Renders the full page around the fragment Markup.
+            page_version (tuple): Data shown outside the fragment (e.g. post total).
+            stream (bool): Whether render_page streams (fragment passed as DeferredMarkup).
+
+        Returns:
+            Response: 200 page or 304 Not Modified.
+    """
+    fragment = fragment_cache.get(key)
+    if fragment is None:
+        generation = fragment_cache.generation
+        context, tags, version, last_modified = load()
+        etag = make_etag(version, page_version)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        def render():
+            html = Markup(render_fragment(context))
+            fragment_cache.set(key, Fragment(html, version, last_modified), tags, generation)
+            return html
+        html = DeferredMarkup(render) if stream else render()
+    else:
+        etag = make_etag(fragment.version, page_version)
+        last_modified = fragment.last_modified
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        html = fragment.html
+    return add_validators(make_response(render_page(html)), etag, last_modified)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 
 class Config:
@@ -9,6 +10,7 @@ class Config:
        - Secret key for session and CSRF protection
        - Database connection URI
        - Email server settings for sending emails
+       - Password hashing work factor and worker pool size
 
        Environment Variables:
            FLASK_SECRET_KEY (str): Secret key for securing sessions and forms.
@@ -28,6 +30,53 @@ class Config:
     MAIL_USE_TLS = True
     MAIL_USERNAME = os.environ.get('EMAIL_USER')
     MAIL_PASSWORD = os.environ.get('EMAIL_PASS')
+    # configure password hashing
+    # bcrypt work factor (log2 rounds); older hashes are upgraded on login
+    BCRYPT_LOG_ROUNDS = 12
+    # bcrypt runs on a bounded pool; requests beyond the queue get a 503
+    PASSWORD_HASH_WORKERS = 4
+    PASSWORD_HASH_MAX_QUEUE = 16
+
+
+class ProductionConfig(Config):
+    """
+        Configuration for serving real traffic: create_app(ProductionConfig).
+
+        Adds to Config:
+        - SQLite tuned for concurrent requests (WAL journal, busy timeout, memory mapped reads),
+          applied to every new connection by database.SQLitePragmas
+        - Connection pool sizing, also used as-is for server databases (PostgreSQL, MySQL)
+        - Every template compiled in create_app, before the worker takes traffic
+        - Auth rate limits counted in a SQLite file shared by all workers of the host
+
+        Environment Variables:
+            DB_POOL_SIZE (int): Connections kept open per process. Defaults to 10.
+            DB_MAX_OVERFLOW (int): Extra connections allowed under burst load. Defaults to 20.
+            DB_BUSY_TIMEOUT_MS (int): How long a writer waits for the SQLite lock. Defaults to 5000.
+    """
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        # fail fast with an error page instead of queueing requests behind an exhausted pool
+        'pool_timeout': 10,
+        # server databases drop idle connections; pre_ping / recycle replace them transparently
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+    # applied in order on connect; ignored for non-SQLite databases
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': 256 * 1024 * 1024,
+        # negative: size in KiB (64 MiB) rather than pages
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    # compiled from <instance>/jinja_cache when another worker or a previous deploy already did it
+    TEMPLATE_WARMUP = True
+    # <instance>/rate_limit.db: a client cannot multiply its attempts by the number of workers
+    RATELIMIT_STORAGE = 'sqlite'
 
 
 class TestingConfig:
@@ -40,9 +89,21 @@ class TestingConfig:
             SQLALCHEMY_TRACK_MODIFICATIONS (bool): Disables modification tracking to save resources during tests.
             WTF_CSRF_ENABLED (bool): Disables CSRF protection in WTForms to simplify form testing.
             SECRET_KEY (str): Secret key used by Flask for session management during testing.
+            BCRYPT_LOG_ROUNDS (int): Lowest bcrypt work factor to keep tests fast.
+            JINJA_BYTECODE_CACHE_DIR (None): No compiled templates written to the instance folder.
+            MAIL_SPOOL_DIR (str): Mail spooled by the tests goes to the temporary directory, not the instance folder.
+            AVATAR_UPLOAD_DIR (str): Test uploads are staged in the temporary directory, not the instance folder.
+            FRAGMENT_CACHE_SYNC_INTERVAL (None): One app per test process: no shared version stamp, so cached
+                pages still run no SQL at all.
     """
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = False
-    SECRET_KEY = 'testing-secret'
\ No newline at end of file
+    SECRET_KEY = 'testing-secret'
+    BCRYPT_LOG_ROUNDS = 4
+    JINJA_BYTECODE_CACHE_DIR = None
+    # fixed path: a directory per import would pile up; test mail is never really sent
+    MAIL_SPOOL_DIR = os.path.join(tempfile.gettempdir(), 'flask_blog_test_mail_spool')
+    AVATAR_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'flask_blog_test_avatar_uploads')
+    FRAGMENT_CACHE_SYNC_INTERVAL = None
\ No newline at end of file
@@ -0,0 +1,54 @@
+from sqlalchemy import event
+
+'''
+SQLite connection tuning
+Every new DB-API connection runs the PRAGMAs of SQLITE_PRAGMAS before it is handed to the pool:
+    - journal_mode=WAL: readers no longer block on a writer (and a writer not on readers)
+    - synchronous=NORMAL: in WAL mode still durable across application crashes, fsync only at checkpoints
+    - busy_timeout: a writer waits for the lock instead of failing with "database is locked"
+    - mmap_size / cache_size: hot pages are read from memory instead of through read() calls
+Engines of other databases (e.g. PostgreSQL) are left alone; pool sizing is plain
+SQLALCHEMY_ENGINE_OPTIONS (see config.ProductionConfig).
+'''
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """
+        Run PRAGMA statements on a raw sqlite3 connection.
+
+        Args:
+            dbapi_connection (sqlite3.Connection): Freshly opened connection.
+            pragmas (dict): PRAGMA name -> value, applied in order.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+class SQLitePragmas:
+    """
+        Flask extension applying SQLITE_PRAGMAS to every connection of the app's SQLite engines.
+
+        Configuration:
+            SQLITE_PRAGMAS (dict): PRAGMA name -> value. Defaults to {} (SQLite defaults).
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from flask_blog import db
+
+        pragmas = app.config.setdefault('SQLITE_PRAGMAS', {})
+        if not pragmas:
+            return
+        # engines are created by db.init_app, before any connection is opened
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect',
+                             lambda dbapi_connection, connection_record: apply_pragmas(dbapi_connection, pragmas))
@@ -42,4 +42,19 @@ def error_internal_server(error):
         Returns:
             Response: Rendered '500.html' template with 500 status code.
     """
-    return render_template('errors/500.html'), 500
\ No newline at end of file
+    return render_template('errors/500.html'), 500
+
+
+@errors.app_errorhandler(503)
+def error_service_unavailable(error):
+    """
+        Handle 503 Service Unavailable errors (e.g. password hashing pool saturated).
+
+        Args:
+            error (Exception): The raised 503 error.
+
+        Returns:
+            Response: Rendered '503.html' template with 503 status code and Retry-After header.
+    """
+    headers = {'Retry-After': str(getattr(error, 'retry_after', None) or 1)}
+    return render_template('errors/503.html'), 503, headers
\ No newline at end of file
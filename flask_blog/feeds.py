@@ -0,0 +1,93 @@
+from xml.sax.saxutils import escape, quoteattr
+from flask import Response, stream_with_context, url_for
+from markupsafe import Markup
+from flask_blog import fragment_cache
+from flask_blog.cache import Fragment
+from flask_blog.conditional import add_validators, as_utc, is_not_modified, make_etag, not_modified_response
+
+'''
+Atom feeds
+Feeds list the newest FEED_SIZE posts, loaded by the same keyset query as the HTML listing they
+mirror, and are cached in the FragmentCache under the same tags, so the next post write drops them.
+    - cache miss: the XML is streamed entry by entry while it is generated, and stored once complete
+    - cache hit: the stored XML is sent as is, no query runs
+    - every response carries an ETag; polls with a current If-None-Match get an empty 304
+'''
+FEED_SIZE = 20
+ATOM_MIMETYPE = 'application/atom+xml'
+EPOCH = '1970-01-01T00:00:00+00:00'
+
+
+def atom_date(value):
+    return as_utc(value).isoformat()
+
+
+def generate_atom(title, feed_url, site_url, posts):
+    """
+        Yield an Atom document piece by piece.
+
+        Args:
+            title (str): Feed title.
+            feed_url (str): Absolute URL of the feed itself.
+            site_url (str): Absolute URL of the HTML page the feed mirrors.
+            posts (list[Post]): Entries, newest first (authors loaded, content may be deferred).
+
+        Yields:
+            str: Chunks of the XML document.
+    """
+    updated = max((post.updated_at for post in posts), default=None)
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield (f'  <title>{escape(title)}</title>\n'
+           f'  <id>{escape(feed_url)}</id>\n'
+           f'  <link rel="self" type="{ATOM_MIMETYPE}" href={quoteattr(feed_url)}/>\n'
+           f'  <link rel="alternate" type="text/html" href={quoteattr(site_url)}/>\n'
+           f'  <updated>{atom_date(updated) if updated else EPOCH}</updated>\n')
+    for post in posts:
+        post_url = url_for('posts.post', post_id=post.id, _external=True)
+        yield (f'  <entry>\n'
+               f'    <title>{escape(post.title)}</title>\n'
+               f'    <id>{escape(post_url)}</id>\n'
+               f'    <link rel="alternate" type="text/html" href={quoteattr(post_url)}/>\n'
+               f'    <published>{atom_date(post.date_posted)}</published>\n'
+               f'    <updated>{atom_date(post.updated_at)}</updated>\n'
+               f'    <author><name>{escape(post.author.username)}</name></author>\n'
+               f'    <summary>{escape(post.excerpt)}</summary>\n'
+               f'  </entry>\n')
+    yield '</feed>\n'
+
+
+def render_cached_feed(key, load, render):
+    """
+        Serve a feed from the fragment cache, or stream it and cache it, answering 304 when possible.
+
+        Args:
+            key (tuple): Fragment cache key.
+            load (callable): Returns (context, tags, version) of the feed.
+            render (callable): Returns a generator of XML chunks from context.
+
+        Returns:
+            Response: 200 feed (streamed on a cache miss) or 304 Not Modified.
+    """
+    fragment = fragment_cache.get(key)
+    if fragment is not None:
+        etag = make_etag(fragment.version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        return add_validators(Response(str(fragment.html), mimetype=ATOM_MIMETYPE), etag)
+
+    generation = fragment_cache.generation
+    context, tags, version = load()
+    etag = make_etag(version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    def stream():
+        chunks = []
+        for chunk in render(context):
+            chunks.append(chunk)
+            yield chunk
+        # only a completely sent feed is cached; generation drops it if a write happened meanwhile
+        fragment_cache.set(key, Fragment(Markup(''.join(chunks)), version, None), tags, generation)
+
+    # stream_with_context: the request (url_for, DB session) stays alive while the body is sent
+    return add_validators(Response(stream_with_context(stream()), mimetype=ATOM_MIMETYPE), etag)
@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+from collections import namedtuple
+import click
+
+'''
+Import-time profiling
+Cold start (a new worker, `flask ...` commands, test runs) is dominated by imports. This module
+runs the startup in a fresh interpreter under `python -X importtime` and reports where the time
+goes:
+    python -m flask_blog.importtime [--top 25]
+Heavy optional dependencies are imported where they are used, not at module level, and must not be
+loaded by create_app: DEFERRED_MODULES lists them, tests/importtime_test.py checks them and the
+STARTUP_BUDGET_SECONDS budget.
+'''
+STARTUP_CODE = ('from flask_blog import create_app\n'
+                'from flask_blog.config import TestingConfig\n'
+                'create_app(TestingConfig)\n')
+# Flask-Mail / smtplib: mail_queue sender thread; PIL: avatar pipeline; brotli: `flask assets build`.
+# urllib.request (`flask assets build` downloads), http.client and ssl are not listed: Flask-WTF's
+# recaptcha module and werkzeug.serving import them whatever this package does.
+DEFERRED_MODULES = ('flask_mail', 'smtplib', 'PIL', 'brotli')
+# several times the measured cold start (~0.4-0.5 s), so only real regressions trip it on a loaded
+# machine; the environment variable of the same name sets a tighter (or looser) budget
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 3.0))
+
+ImportTiming = namedtuple('ImportTiming', 'name self_us cumulative_us depth')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, *options):
+    """
+        Run code in a fresh interpreter with the project importable.
+
+        Args:
+            code (str): Python source.
+            *options (str): Interpreter options, e.g. '-X', 'importtime'.
+
+        Returns:
+            subprocess.CompletedProcess: Finished process, stdout / stderr as text.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (PROJECT_ROOT, os.environ.get('PYTHONPATH')))))
+    return subprocess.run([sys.executable, *options, '-c', code], capture_output=True, text=True,
+                          cwd=PROJECT_ROOT, env=env, check=True)
+
+
+def profile_imports(code=STARTUP_CODE):
+    """
+        Import timings of code, as reported by `python -X importtime`.
+
+        Args:
+            code (str): Python source to profile.
+
+        Returns:
+            list[ImportTiming]: One entry per imported module, in completion order.
+    """
+    timings = []
+    for line in run_python(code, '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def loaded_modules(code=STARTUP_CODE):
+    """
+        Names of the modules in sys.modules once code has run.
+
+        Args:
+            code (str): Python source.
+
+        Returns:
+            set[str]: Module names.
+    """
+    return set(run_python(code + 'import sys\nprint("\\n".join(sys.modules))\n').stdout.split())
+
+
+def startup_time(code=STARTUP_CODE, runs=3):
+    """
+        Best wall time of code over several fresh interpreters.
+
+        Args:
+            code (str): Python source.
+            runs (int): Interpreters to start.
+
+        Returns:
+            float: Seconds, interpreter start-up itself excluded.
+    """
+    timed = 'import time\n_started = time.perf_counter()\n' + code + 'print(time.perf_counter() - _started)\n'
+    return min(float(run_python(timed).stdout.split()[-1]) for _ in range(runs))
+
+
+@click.command()
+@click.option('--top', default=25, show_default=True, help='Number of modules listed.')
+def cli(top):
+    """Profile the imports of create_app (python -m flask_blog.importtime)."""
+    timings = profile_imports()
+    total_us = sum(timing.self_us for timing in timings)
+    click.echo(f'{len(timings)} modules imported in {total_us / 1000:.1f} ms')
+    click.echo('\nSlowest top-level imports (cumulative):')
+    for timing in sorted((t for t in timings if t.depth == 0), key=lambda t: -t.cumulative_us)[:top]:
+        click.echo(f'  {timing.cumulative_us / 1000:8.1f} ms  {timing.name}')
+    click.echo('\nflask_blog modules (self):')
+    for timing in sorted((t for t in timings if t.name.startswith('flask_blog')), key=lambda t: -t.self_us)[:top]:
+        click.echo(f'  {timing.self_us / 1000:8.1f} ms  {timing.name}')
+    loaded = {timing.name for timing in timings}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    click.echo('\n' + (f'❌ loaded at startup: {", ".join(eager)}' if eager else '✅ heavy optional modules deferred'))
+    seconds = startup_time()
+    click.echo(f'{"✅" if seconds <= STARTUP_BUDGET_SECONDS else "❌"} create_app cold start '
+               f'{seconds * 1000:.0f} ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)')
+
+
+if __name__ == '__main__':
+    cli()
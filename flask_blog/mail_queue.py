@@ -0,0 +1,335 @@
+import contextlib
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from flask import current_app
+
+'''
+Asynchronous outbound mail
+Routes enqueue messages and return at once; a background thread per app sends them over one
+persistent SMTP connection (reopened after MAIL_CONNECTION_IDLE seconds without mail, or when
+the server drops it).
+    - durable: every message is written to MAIL_SPOOL_DIR before enqueue returns and deleted
+      only once sent
+    - claimed: a spool file is named <id>.sending.<pid> by the process that sends it; on its first
+      request a process takes over (atomic rename) the unclaimed <id>.json files and the claims of
+      processes that are gone or silent for MAIL_CLAIM_TIMEOUT, so workers sharing the spool never
+      send a message twice and CLI commands never send spooled mail
+    - retries: failed sends are retried MAIL_MAX_RETRIES times with exponential backoff
+      (MAIL_RETRY_BACKOFF * 2 ** attempt seconds), then moved to MAIL_SPOOL_DIR/failed; a message
+      that cannot be read or built at all goes there at once (move it back into the spool to retry)
+    - metrics: stats() reports queue depth and enqueue-to-sent latency
+    - lazy: Flask-Mail / smtplib are imported by the sender thread, workers that never send mail skip them
+'''
+CLAIM_INFIX = '.sending.'
+# (spool dir, message id) claimed by this process, whichever app instance holds them
+_claimed = set()
+
+
+def claim_owner(name):
+    """
+        Process holding a spool file.
+
+        Args:
+            name (str): File name in the spool directory.
+
+        Returns:
+            int | None: PID of the claiming process, None for an unclaimed or temporary file.
+    """
+    _, infix, pid = name.partition(CLAIM_INFIX)
+    return int(pid) if infix and pid.isdigit() else None
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+class MailQueue:
+    """
+        Spool directory, pending queue and sender thread of one app.
+
+        Attributes:
+            sent, failed, retries (int): Delivery counters.
+            latency_count, latency_sum, latency_max (float): Enqueue-to-sent latency in seconds.
+    """
+    def __init__(self, app, spool_dir, max_retries, backoff, idle_timeout, claim_timeout):
+        self.app = app
+        self.spool_dir = spool_dir
+        self.failed_dir = os.path.join(spool_dir, 'failed')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self.claim_timeout = claim_timeout
+        self.recovered = False
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self._ready = queue.Queue()  # ids of messages to send now
+        self._delayed = []           # heap of (due time, id) waiting for a retry
+        self._connection = None
+        self._flask_mail = None
+        self._last_used = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+    # ---- producer side (request threads) ----
+
+    def enqueue(self, msg):
+        message_id = f'{time.time():.6f}-{uuid.uuid4().hex}'
+        record = {'id': message_id, 'enqueued_at': time.time(), 'attempts': 0,
+                  'subject': msg.subject, 'sender': msg.sender, 'recipients': list(msg.recipients),
+                  'body': msg.body, 'html': msg.html}
+        _claimed.add((self.spool_dir, message_id))
+        self._write(record)
+        self._ready.put(message_id)
+        self.start()
+        return message_id
+
+    def recover(self):
+        """
+            Claim and queue, oldest first, the messages no live process is sending; runs once per app.
+
+            Returns:
+                int: Number of messages taken over.
+        """
+        with self._lock:
+            if self.recovered:
+                return 0
+            self.recovered = True
+        recovered = 0
+        for name in sorted(os.listdir(self.spool_dir)):
+            message_id = name[:-5] if name.endswith('.json') else name.partition(CLAIM_INFIX)[0]
+            if not (name.endswith('.json') or self._stale(name)):
+                continue
+            # rename is atomic: when two processes race for a file, exactly one gets it
+            _claimed.add((self.spool_dir, message_id))
+            try:
+                os.rename(os.path.join(self.spool_dir, name), self._path(message_id))
+            except FileNotFoundError:
+                _claimed.discard((self.spool_dir, message_id))
+                continue
+            self._ready.put(message_id)
+            recovered += 1
+        if recovered:
+            self.start()
+        return recovered
+
+    def _stale(self, name):
+        pid = claim_owner(name)
+        if pid is None:
+            return False
+        if pid == os.getpid():
+            # ours only if this process claimed it, else left by an earlier process with the same PID
+            return (self.spool_dir, name.partition(CLAIM_INFIX)[0]) not in _claimed
+        try:
+            silent = time.time() - os.path.getmtime(os.path.join(self.spool_dir, name))
+        except FileNotFoundError:
+            return False
+        # the timeout also covers a reused PID and claims made on another host sharing the spool
+        return not process_alive(pid) or silent > self.claim_timeout
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+                self._thread.start()
+
+    def join(self, timeout=None):
+        """Wait until every queued message is sent or given up (used by tests and shutdown)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._ready.unfinished_tasks or self._delayed:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        return {'queued': self._ready.qsize() + len(self._delayed), 'sent': self.sent,
+                'failed': self.failed, 'retries': self.retries,
+                'latency_count': self.latency_count, 'latency_sum': self.latency_sum,
+                'latency_max': self.latency_max}
+
+    # ---- consumer side (sender thread) ----
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                self._release_due_retries()
+                try:
+                    message_id = self._ready.get(timeout=self._wait_time())
+                except queue.Empty:
+                    if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                        self._disconnect()
+                    continue
+                try:
+                    self._deliver(message_id)
+                except Exception:
+                    # corrupt spool file, header rejected by Flask-Mail, ...: retrying would not help,
+                    # and the thread must keep serving the rest of the queue
+                    current_app.logger.exception('Could not send mail %s', message_id)
+                    self._disconnect()
+                    self._give_up(message_id)
+                finally:
+                    self._ready.task_done()
+
+    def _wait_time(self):
+        if self._delayed:
+            return max(0.0, min(self._delayed[0][0] - time.monotonic(), 1.0))
+        return 1.0
+
+    def _release_due_retries(self):
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            self._ready.put(heapq.heappop(self._delayed)[1])
+
+    def _deliver(self, message_id):
+        import smtplib
+
+        record = self._read(message_id)
+        if record is None:
+            return
+        try:
+            self._send(record)
+        except (smtplib.SMTPException, OSError) as error:
+            self._disconnect()
+            record['attempts'] += 1
+            if record['attempts'] > self.max_retries:
+                current_app.logger.error('Giving up on mail %s: %s', message_id, error)
+                self._give_up(message_id)
+                return
+            self._write(record)
+            self.retries += 1
+            delay = self.backoff * 2 ** (record['attempts'] - 1)
+            heapq.heappush(self._delayed, (time.monotonic() + delay, message_id))
+            return
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(message_id))
+        _claimed.discard((self.spool_dir, message_id))
+        latency = time.time() - record['enqueued_at']
+        self.sent += 1
+        self.latency_count += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def _give_up(self, message_id):
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(self._path(message_id), os.path.join(self.failed_dir, f'{message_id}.json'))
+        _claimed.discard((self.spool_dir, message_id))
+        self.failed += 1
+
+    def _send(self, record):
+        import smtplib
+        from flask_mail import Message
+
+        msg = Message(record['subject'], sender=record['sender'], recipients=record['recipients'],
+                      body=record['body'], html=record['html'])
+        if self._connection is None:
+            self._connection = self._mail().connect().__enter__()
+        try:
+            self._connection.send(msg)
+        except smtplib.SMTPServerDisconnected:
+            # idle connection closed by the server: reconnect once right away
+            self._connection = self._mail().connect().__enter__()
+            self._connection.send(msg)
+        self._last_used = time.monotonic()
+
+    def _mail(self):
+        # Flask-Mail (and smtplib / email with it) is only imported once there is mail to send
+        if self._flask_mail is None:
+            from flask_mail import Mail
+            self._flask_mail = Mail(self.app)
+        return self._flask_mail
+
+    def _disconnect(self):
+        import smtplib
+
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._connection = None
+
+    # ---- spool files ----
+
+    def _path(self, message_id):
+        # claimed by this process (read at call time: workers may be forked after create_app)
+        return os.path.join(self.spool_dir, f'{message_id}{CLAIM_INFIX}{os.getpid()}')
+
+    def _write(self, record):
+        # write then rename: a crash never leaves a half written spool file
+        tmp_path = self._path(record['id']) + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(record, file)
+        os.replace(tmp_path, self._path(record['id']))
+
+    def _read(self, message_id):
+        try:
+            with open(self._path(message_id)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+
+class MailDispatcher:
+    """
+        Flask extension queueing outbound mail for background delivery.
+
+        Configuration:
+            MAIL_SPOOL_DIR (str): Durable spool directory. Defaults to <instance>/mail_spool.
+            MAIL_MAX_RETRIES (int): Retries before a message is moved to failed/. Defaults to 5.
+            MAIL_RETRY_BACKOFF (float): First retry delay in seconds, doubled each time. Defaults to 2.
+            MAIL_CONNECTION_IDLE (float): Seconds before an idle SMTP connection is closed. Defaults to 30.
+            MAIL_CLAIM_TIMEOUT (float): Seconds after which a spool file claimed by a process that is
+                still running (or on another host) is taken over anyway. Defaults to 3600.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_SPOOL_DIR', os.path.join(app.instance_path, 'mail_spool'))
+        app.config.setdefault('MAIL_MAX_RETRIES', 5)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 2.0)
+        app.config.setdefault('MAIL_CONNECTION_IDLE', 30.0)
+        app.config.setdefault('MAIL_CLAIM_TIMEOUT', 3600.0)
+        app.extensions['mail_dispatcher'] = MailQueue(
+            app, app.config['MAIL_SPOOL_DIR'], app.config['MAIL_MAX_RETRIES'], app.config['MAIL_RETRY_BACKOFF'],
+            app.config['MAIL_CONNECTION_IDLE'], app.config['MAIL_CLAIM_TIMEOUT'])
+        # on the first request, not in create_app: CLI commands and scripts leave the spool alone
+        app.before_request(self._recover)
+
+    @property
+    def queue(self):
+        return current_app.extensions['mail_dispatcher']
+
+    def _recover(self):
+        mail_queue = self.queue
+        if not mail_queue.recovered:
+            mail_queue.recover()
+
+    def enqueue(self, msg):
+        """
+            Spool a message and return immediately; it is sent by the background thread.
+
+            Args:
+                msg (flask_mail.Message): Message to send.
+
+            Returns:
+                str: ID of the spooled message.
+        """
+        return self.queue.enqueue(msg)
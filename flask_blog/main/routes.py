@@ -1,5 +1,11 @@
-from flask import render_template, request, Blueprint
-from flask_blog.models import Post
+from flask import render_template, request, url_for, Blueprint
+from sqlalchemy.orm import joinedload, defer
+from flask_blog.cache import listing_tags, listing_version
+from flask_blog.conditional import render_cached_page
+from flask_blog.models import Post, Counter
+from flask_blog.pagination import paginate_keyset
+from flask_blog.search import search_posts
+from flask_blog.feeds import FEED_SIZE, generate_atom, render_cached_feed
 
 
 # create instance of Blueprint
@@ -12,19 +18,77 @@ def index():
     """
        Render the home page with paginated blog posts.
 
-       - Retrieves the current page number from query parameters (defaults to 1).
+       - Retrieves the optional cursor token from query parameters (defaults to first page).
        - Fetches posts ordered by most recent first.
-       - Paginates the posts (5 per page).
+       - Paginates the posts by keyset (5 per page).
+       - Shows the total number of posts from the maintained post counter.
+       - Post list is rendered once per cursor and served from the fragment cache
+         until a post write invalidates it.
+       - Answers 304 Not Modified when the client's ETag is current.
 
        Returns:
            Response: Rendered home page with paginated posts.
    """
-    # setting default page
-    page = request.args.get('page', 1, type=int)
-    # setting number of post per page
-    # Note: this results in posts becoming a Pagination object
-    posts = Post.query.order_by(Post.date_posted.desc()).paginate(page=page, per_page=5)
-    return render_template('home.html', posts=posts)
+    # cursor token of the page edge, None for the first page
+    cursor = request.args.get('cursor')
+    # maintained with every post insert/delete instead of a COUNT(*) per request
+    total = Counter.get(Counter.POSTS)
+
+    def load_posts():
+        # Note: this results in posts becoming a KeysetPage object
+        # joinedload: authors are fetched in the same SELECT as the page instead of one SELECT per author
+        # defer: listings render Post.excerpt, the full content column is never read
+        posts = paginate_keyset(Post.query.options(joinedload(Post.author), defer(Post.content)),
+                                cursor=cursor, per_page=5)
+        # listings send no Last-Modified: deleting a post does not move the newest date
+        return posts, listing_tags(posts, head_tag='home:head'), listing_version(posts), None
+
+    return render_cached_page(
+        ('home', cursor), load_posts,
+        render_fragment=lambda posts: render_template('fragments/post_list.html', posts=posts,
+                                                      endpoint='main.index', endpoint_args={}),
+        render_page=lambda post_list: render_template('home.html', post_list=post_list, total=total),
+        page_version=(total,))
+
+
+@main.route("/feed.atom")
+def feed():
+    """
+        Atom feed of the newest posts, mirroring the home page.
+
+        - Uses the home page query (authors joined, content deferred), FEED_SIZE posts.
+        - Cached until the next post write, streamed on a cache miss.
+        - Answers 304 Not Modified when the feed reader's ETag is current.
+
+        Returns:
+            Response: application/atom+xml feed.
+    """
+    def load_posts():
+        posts = paginate_keyset(Post.query.options(joinedload(Post.author), defer(Post.content)),
+                                per_page=FEED_SIZE)
+        return posts, listing_tags(posts, head_tag='home:head'), listing_version(posts)
+
+    return render_cached_feed(
+        ('feed', 'home'), load_posts,
+        render=lambda posts: generate_atom('Flask Blog', url_for('main.feed', _external=True),
+                                           url_for('main.index', _external=True), posts.items))
+
+
+@main.route("/search")
+def search():
+    """
+        Search posts by title and content.
+
+        - Reads the search text from the `q` query parameter.
+        - Results are ranked best match first and paginated by cursor (5 per page).
+
+        Returns:
+            Response: Rendered search page with highlighted results.
+    """
+    query = request.args.get('q', '').strip()
+    results = search_posts(query, cursor=request.args.get('cursor'), per_page=5) if query else None
+    return render_template('search.html', title='Search', query=query, results=results)
+
 
 @main.route("/about")
 def about():
@@ -0,0 +1,287 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, abort, current_app, g, has_app_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+'''
+Per-request instrumentation, exposed at /metrics in the Prometheus text format
+For every request, labelled by endpoint (main.index, posts.post, users.login, ...):
+    - wall time of the view (before_request -> after_request; a streamed body is not included)
+    - number of SQL statements and their total time (engine before/after_cursor_execute events)
+    - Jinja render time (before_render_template -> template_rendered signals, nested renders counted once)
+Streamed pages (streaming.stream_page) render, and may query, while their body is sent: their SQL and
+render figures are recorded once the response is closed, still under the request's endpoint.
+Observations go into in-process histograms with fixed buckets: recording is a few perf_counter()
+calls and a locked increment, cheap enough to leave on in production. Each worker process has
+its own histograms; Prometheus sums them when scraping every worker.
+The cache, password hashing, mail queue and rate limit counters of the other extensions are exported too.
+/metrics reveals endpoints, traffic and error rates: it only answers addresses in METRICS_ALLOWED_IPS
+(the local host by default, i.e. a scraper on the same machine) or requests carrying
+`Authorization: Bearer <METRICS_TOKEN>`; anyone else gets a 404, as if the endpoint did not exist.
+'''
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+PREFIX = 'flask_blog'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """
+        Prometheus histogram with one label.
+
+        Attributes:
+            name (str): Metric name.
+            help (str): Description shown by Prometheus.
+            buckets (tuple[float]): Upper bounds, ascending (+Inf is implicit).
+            label (str): Label name, e.g. 'endpoint'.
+    """
+    def __init__(self, name, help, buckets, label='endpoint'):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label = label
+        # label value -> [count per bucket..., count above the last bucket, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {label: list(series) for label, series in self._series.items()}
+        for label_value, series in sorted(snapshot.items()):
+            label = f'{self.label}="{escape_label(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{format_value(bound)}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {format_value(series[-1])}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+class RequestStats:
+    """Figures of the request being served, kept in g."""
+    __slots__ = ('started', 'sql_count', 'sql_time', 'render_time', 'render_depth', 'render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.render_started = 0.0
+
+
+class MetricsRegistry:
+    """Histograms and counters of one app."""
+    def __init__(self):
+        self.request_duration = Histogram(f'{PREFIX}_request_duration_seconds',
+                                          'Wall time of the view function.', DURATION_BUCKETS)
+        self.sql_queries = Histogram(f'{PREFIX}_request_sql_queries',
+                                     'SQL statements executed per request.', QUERY_BUCKETS)
+        self.sql_duration = Histogram(f'{PREFIX}_request_sql_duration_seconds',
+                                      'Time spent in SQL statements per request.', DURATION_BUCKETS)
+        self.render_duration = Histogram(f'{PREFIX}_request_render_duration_seconds',
+                                         'Time spent rendering Jinja templates per request.', DURATION_BUCKETS)
+        self.responses = {}  # (endpoint, status) -> count
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, status, stats, duration):
+        self.request_duration.observe(endpoint, duration)
+        self.sql_queries.observe(endpoint, stats.sql_count)
+        self.sql_duration.observe(endpoint, stats.sql_time)
+        self.render_duration.observe(endpoint, stats.render_time)
+        with self._lock:
+            self.responses[endpoint, status] = self.responses.get((endpoint, status), 0) + 1
+
+    def render(self):
+        name = f'{PREFIX}_responses_total'
+        lines = [f'# HELP {name} Responses sent, by endpoint and status code.', f'# TYPE {name} counter']
+        with self._lock:
+            responses = dict(self.responses)
+        for (endpoint, status), count in sorted(responses.items()):
+            lines.append(f'{name}{{endpoint="{escape_label(endpoint)}",status="{status}"}} {count}')
+        for histogram in (self.request_duration, self.sql_queries, self.sql_duration, self.render_duration):
+            lines.extend(histogram.render())
+        return lines
+
+
+def extension_stats(app):
+    """
+        Counters kept by the other extensions of the app, as (metric, type, value) tuples.
+
+        Args:
+            app (Flask): Application.
+
+        Returns:
+            list[tuple[str, str, float]]: Metric name, 'counter' or 'gauge', value.
+    """
+    counters = {'hits', 'misses', 'evictions', 'sent', 'failed', 'retries', 'rejected',
+                'allowed', 'rejected_by_ip', 'rejected_by_account'}
+    metrics = []
+    sources = [('fragment_cache', app.extensions.get('fragment_cache')),
+               ('identity_cache', app.extensions.get('identity_cache')),
+               ('mail_queue', app.extensions.get('mail_dispatcher')),
+               ('auth_rate_limit', app.extensions.get('rate_limiter'))]
+    for prefix, store in sources:
+        if store is None:
+            continue
+        for key, value in store.stats().items():
+            if key in counters:
+                metrics.append((f'{PREFIX}_{prefix}_{key}_total', 'counter', value))
+            else:
+                metrics.append((f'{PREFIX}_{prefix}_{key}', 'gauge', value))
+    hashing_pool = app.extensions.get('password_hasher')
+    if hashing_pool is not None:
+        metrics.append((f'{PREFIX}_password_hash_rejected_total', 'counter', hashing_pool.rejected))
+    return metrics
+
+
+class RequestMetrics:
+    """
+        Flask extension recording request, SQL and render timings and serving /metrics.
+
+        Configuration:
+            METRICS_ENABLED (bool): Set False to disable recording and /metrics. Defaults to True.
+            METRICS_PATH (str): URL of the Prometheus endpoint. Defaults to '/metrics'.
+            METRICS_ALLOWED_IPS (tuple[str]): Client addresses allowed to scrape. Defaults to the local host.
+            METRICS_TOKEN (str | None): Bearer token allowing a scrape from any address. Defaults to None.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from flask_blog import db
+
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_PATH', '/metrics')
+        app.config.setdefault('METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+        app.config.setdefault('METRICS_TOKEN', None)
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.extensions['request_metrics'] = MetricsRegistry()
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._end_render, app)
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._start_query)
+            event.listen(engine, 'after_cursor_execute', self._end_query)
+            event.listen(engine, 'handle_error', self._query_failed)
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', self.metrics_view)
+
+    @property
+    def registry(self):
+        return current_app.extensions['request_metrics']
+
+    @staticmethod
+    def _current():
+        # None outside requests (CLI, avatar / mail workers), those are not recorded
+        return g.get('_request_stats') if has_app_context() else None
+
+    def _start_request(self):
+        g._request_stats = RequestStats()
+
+    def _end_request(self, response):
+        stats = g.get('_request_stats')
+        if stats is None or request.endpoint == 'metrics':
+            return response
+        registry, endpoint, status = self.registry, request.endpoint or '<unmatched>', response.status_code
+        duration = time.perf_counter() - stats.started
+
+        def record():
+            registry.record(endpoint, status, stats, duration)
+
+        if response.is_streamed:
+            # stats stay in g (shared with the streamed body's context) until the body is closed
+            response.call_on_close(record)
+        else:
+            del g._request_stats
+            record()
+        return response
+
+    def _start_render(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is not None:
+            if stats.render_depth == 0:
+                stats.render_started = time.perf_counter()
+            stats.render_depth += 1
+
+    def _end_render(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is not None and stats.render_depth:
+            stats.render_depth -= 1
+            if stats.render_depth == 0:
+                stats.render_time += time.perf_counter() - stats.render_started
+
+    def _start_query(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _end_query(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        stats = self._current()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_time += time.perf_counter() - started
+
+    @staticmethod
+    def _query_failed(context):
+        # a failed statement never reaches after_cursor_execute: drop its start time, or the stack
+        # of a pooled connection would grow with every error and pair later queries with old times
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @staticmethod
+    def _scrape_allowed():
+        token = current_app.config['METRICS_TOKEN']
+        authorization = request.headers.get('Authorization', '')
+        if token and authorization.startswith('Bearer ') and hmac.compare_digest(
+                authorization[len('Bearer '):].encode(), token.encode()):
+            return True
+        return request.remote_addr in current_app.config['METRICS_ALLOWED_IPS']
+
+    def metrics_view(self):
+        """
+            Prometheus scrape endpoint.
+
+            Returns:
+                Response: Metrics of this process in the Prometheus text format.
+
+            Raises:
+                404 Not Found: If the client is neither in METRICS_ALLOWED_IPS nor sends METRICS_TOKEN.
+        """
+        if not self._scrape_allowed():
+            abort(404)
+        lines = self.registry.render()
+        compression = current_app.extensions.get('compression')
+        if compression is not None:
+            lines.extend(compression.render())
+        for name, metric_type, value in extension_stats(current_app):
+            lines.extend((f'# TYPE {name} {metric_type}', f'{name} {format_value(value)}'))
+        return Response('\n'.join(lines) + '\n', content_type=CONTENT_TYPE)
@@ -0,0 +1,179 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import click
+from flask.cli import AppGroup
+from flask_blog import db
+
+'''
+Versioned schema migrations
+Each migration is a function registered with @migration(version, description) in
+flask_blog.migrations.versions. Applied versions are recorded in the schema_version table;
+`flask db upgrade` runs every pending migration in its own transaction, so a failing
+migration is rolled back (its DDL included, see migration_transaction) and leaves the earlier
+ones (and all data) in place.
+'''
+MIGRATIONS = {}
+
+VERSION_TABLE = 'schema_version'
+
+# flask cli group => `flask db <command>`
+db_cli = AppGroup('db', help='Manage the database schema.')
+
+
+def migration(version, description):
+    """
+        Decorator registering a migration function under a version number.
+
+        Args:
+            version (int): Unique, increasing schema version.
+            description (str): Short human readable summary.
+
+        Returns:
+            function: Decorator storing the function in MIGRATIONS.
+    """
+    def decorator(func):
+        if version in MIGRATIONS:
+            raise ValueError(f'Duplicate migration version {version}')
+        func.version = version
+        func.description = description
+        MIGRATIONS[version] = func
+        return func
+    return decorator
+
+
+def applied_versions(conn):
+    """
+        Return the set of migration versions already applied to the database.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+
+        Returns:
+            set[int]: Applied versions (empty for a database never migrated).
+    """
+    conn.exec_driver_sql(f"""
+        CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+            version INTEGER NOT NULL PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )""")
+    return {row[0] for row in conn.exec_driver_sql(f'SELECT version FROM {VERSION_TABLE}')}
+
+
+def add_column(conn, table, column, ddl):
+    """
+        Add a column to a table unless it already exists (e.g. created by db.create_all()).
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+            table (str): Table name.
+            column (str): Column name.
+            ddl (str): Column type and constraints, e.g. 'DATETIME'.
+
+        Returns:
+            bool: True if the column was added.
+    """
+    columns = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+    if column in columns:
+        return False
+    conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+    return True
+
+
+@contextmanager
+def migration_transaction(engine):
+    """
+        Open a connection whose transaction also covers DDL, committed on success, rolled back on error.
+
+        pysqlite only opens a transaction before INSERT / UPDATE / DELETE: a CREATE or ALTER run
+        first would be committed at once. As in SQLAlchemy's pysqlite recipe, the driver is put in
+        autocommit mode and BEGIN is sent explicitly, for this connection only.
+
+        Args:
+            engine (Engine): Engine of the database to migrate.
+
+        Yields:
+            Connection: Connection inside the transaction.
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name != 'sqlite':
+            with conn.begin():
+                yield conn
+            return
+        dbapi_connection = conn.connection.driver_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            with conn.begin():
+                conn.exec_driver_sql('BEGIN')
+                yield conn
+        finally:
+            # the connection goes back to the pool with the driver's usual behaviour
+            dbapi_connection.isolation_level = isolation_level
+
+
+def pending_migrations(engine):
+    """
+        Return the migrations not yet applied, ordered by version.
+
+        Args:
+            engine (Engine): Engine of the database to inspect.
+
+        Returns:
+            list[function]: Pending migration functions.
+    """
+    # importing registers the migrations
+    from flask_blog.migrations import versions  # noqa: F401
+
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    return [MIGRATIONS[version] for version in sorted(MIGRATIONS) if version not in applied]
+
+
+def upgrade(engine, target=None):
+    """
+        Apply pending migrations up to and including `target`.
+
+        Args:
+            engine (Engine): Engine of the database to upgrade.
+            target (int | None): Highest version to apply, None for all.
+
+        Returns:
+            list[function]: Migrations that were applied.
+    """
+    applied = []
+    for func in pending_migrations(engine):
+        if target is not None and func.version > target:
+            break
+        # one transaction per migration: DDL and the version row commit together
+        with migration_transaction(engine) as conn:
+            func(conn)
+            conn.exec_driver_sql(
+                f'INSERT INTO {VERSION_TABLE} (version, description, applied_at) VALUES (?, ?, ?)',
+                (func.version, func.description, datetime.now(timezone.utc).isoformat(' ')))
+        applied.append(func)
+    return applied
+
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Stop after this schema version.')
+def upgrade_command(target):
+    """Apply pending schema migrations to the configured database."""
+    applied = upgrade(db.engine, target=target)
+    for func in applied:
+        click.echo(f'✅ Applied migration {func.version}: {func.description}')
+    if not applied:
+        click.echo('Database schema is up to date.')
+
+
+@db_cli.command('status')
+def status_command():
+    """Show applied and pending schema migrations."""
+    pending = pending_migrations(db.engine)
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            f'SELECT version, description, applied_at FROM {VERSION_TABLE} ORDER BY version').all()
+    for version, description, applied_at in rows:
+        click.echo(f'[applied {applied_at}] {version}: {description}')
+    for func in pending:
+        click.echo(f'[pending] {func.version}: {func.description}')
@@ -0,0 +1,83 @@
+from flask_blog.migrations.migrate import migration, add_column
+from flask_blog.search import create_index, rebuild_index
+from flask_blog.posts.utils import backfill_excerpts, repair_counters
+
+'''
+Schema migrations, applied in order of version by `flask db upgrade`.
+Rules for adding a migration:
+    - never edit a migration that has shipped, add a new one with the next version number
+    - only additive, idempotent DDL (IF NOT EXISTS / add_column) so databases created
+      by db.create_all() can be upgraded too
+    - keep models.py in sync so create_all() and upgrade produce the same schema
+'''
+
+
+@migration(1, 'initial schema: user and post tables')
+def initial_schema(conn):
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS user (
+            id INTEGER NOT NULL,
+            username VARCHAR(20) NOT NULL,
+            email VARCHAR(120) NOT NULL,
+            image_file VARCHAR(20) NOT NULL,
+            password VARCHAR(60) NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (username),
+            UNIQUE (email)
+        )""")
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS post (
+            id INTEGER NOT NULL,
+            title VARCHAR(100) NOT NULL,
+            date_posted DATETIME NOT NULL,
+            content TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )""")
+
+
+@migration(2, 'listing indexes on post and case-insensitive email index on user')
+def listing_indexes(conn):
+    # home feed: ORDER BY date_posted DESC, id DESC (id is implicit in a SQLite index)
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_post_date_posted ON post (date_posted)')
+    # user posts: WHERE user_id = ? ORDER BY date_posted DESC, id DESC
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_post_user_id_date_posted ON post (user_id, date_posted)')
+    # login / password reset: WHERE lower(email) = ?
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_user_email_lower ON user (lower(email))')
+
+
+UPDATED_AT_PLACEHOLDER = '1970-01-01 00:00:00.000000'
+
+
+@migration(3, 'post.updated_at modification marker for conditional GET')
+def post_updated_at(conn):
+    # SQLite needs a constant default to add a NOT NULL column, real values are backfilled.
+    # The backfill also runs when the column already exists (e.g. added by hand or by an
+    # interrupted run); only rows still holding the placeholder are touched.
+    add_column(conn, 'post', 'updated_at', f"DATETIME NOT NULL DEFAULT '{UPDATED_AT_PLACEHOLDER}'")
+    conn.exec_driver_sql('UPDATE post SET updated_at = date_posted WHERE updated_at = ?', (UPDATED_AT_PLACEHOLDER,))
+
+
+@migration(4, 'post_fts full-text search index over post title and content')
+def post_search_index(conn):
+    if create_index(conn):
+        rebuild_index(conn)
+
+
+@migration(5, 'post.excerpt listing excerpt')
+def post_excerpt(conn):
+    add_column(conn, 'post', 'excerpt', "VARCHAR(281) NOT NULL DEFAULT ''")
+    backfill_excerpts(conn)
+
+
+@migration(6, 'user.post_count and counter table replacing COUNT(*) on listings')
+def post_counters(conn):
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS counter (
+            name VARCHAR(50) NOT NULL,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (name)
+        )""")
+    add_column(conn, 'user', 'post_count', "INTEGER NOT NULL DEFAULT '0'")
+    repair_counters(conn)
@@ -1,6 +1,9 @@
 from datetime import datetime, timezone
-from flask_blog import db, login_manager
+from flask_blog import db, login_manager, identity_cache
+from flask_blog.posts.utils import EXCERPT_LENGTH, ELLIPSIS, make_excerpt
 from flask_login import UserMixin
+from sqlalchemy import event, select
+from sqlalchemy.orm import validates
 from itsdangerous import URLSafeTimedSerializer as Serializer, SignatureExpired, BadSignature
 from flask import current_app
 
@@ -19,15 +22,16 @@ def load_user(user_id):
     """
         Flask-Login user loader callback.
 
-        Given a user ID, this function loads and returns the corresponding User object from the database.
+        Given a user ID, this function returns a detached snapshot of the corresponding User,
+        served from the identity cache and loaded from the database only on a cache miss.
 
         Args:
             user_id (str): The user ID stored in the session.
 
         Returns:
-            User | None: The User object if found, else None.
+            User | None: The User snapshot if found, else None.
     """
-    return User.query.get(int(user_id))
+    return identity_cache.load(int(user_id))
 
 
 class User(db.Model, UserMixin):
@@ -40,23 +44,35 @@ class User(db.Model, UserMixin):
            email (str): Unique user email (max 120 chars).
            image_file (str): Filename for user's profile image.
            password (str): Hashed password.
+           post_count (int): Number of posts written, maintained on post insert/delete.
            post (relationship): One-to-many relationship to Post.
 
+       Indexes:
+           ix_user_email_lower: lower(email), serves case-insensitive email lookups.
+
        Methods:
            get_reset_token(): Generates a time-sensitive token for password reset.
            verify_reset_token(token, expires_sec=1800): Verifies a password reset token.
+           find_by_email(email): Case-insensitive lookup of a user by email.
    """
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     image_file = db.Column(db.String(20), nullable=False, default='default.jpg')
     password = db.Column(db.String(60), nullable=False)
+    # denormalized count(*) of the user's posts, see _count_post_insert / _count_post_delete
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     # creating one-to-many relationship to Post
     # backref: similar to adding another column to Post model, using 'author' attribute get User that created Post
     # lazy: defines when SQLAlchemy loads data from db. True: loads data as necessary in one go
     # 'Post' uppercased as referencing to Post class
     post = db.relationship('Post', backref='author', lazy=True)
 
+    # indexes are also created on existing databases by migration 2 (flask db upgrade)
+    __table_args__ = (
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+    )
+
     def get_reset_token(self):
         """
         Generates a time-sensitive token for password reset or email confirmation.
@@ -103,18 +119,159 @@ class User(db.Model, UserMixin):
             return None
         return User.query.get(user_id)
 
+    @staticmethod
+    def find_by_email(email):
+        """
+        Looks up a user by email, ignoring case.
+
+        The lower(email) expression matches the ix_user_email_lower index,
+        so the lookup is an index search instead of a table scan.
+
+        Args:
+            email (str): Email address as typed by the user.
+
+        Returns:
+            User | None: The matching user, or None if not registered.
+        """
+        return User.query.filter(db.func.lower(User.email) == email.lower()).first()
+
     def __repr__(self):
         return f"User(username: '{self.username}',email: '{self.email}',image_file: '{self.image_file}')"
 
 
 class Post(db.Model):
+    """
+       Post model for storing blog posts.
+
+       Attributes:
+           id (int): Primary key.
+           title (str): Post title (max 100 chars).
+           date_posted (datetime): Creation date (UTC).
+           updated_at (datetime): Last modification date (UTC), used for conditional GET validators.
+           content (str): Post body.
+           excerpt (str): Shortened content shown in listings, kept in sync with content.
+           user_id (int): Foreign key to the author User.
+
+       Indexes:
+           ix_post_date_posted: date_posted, serves the home feed ordering.
+           ix_post_user_id_date_posted: (user_id, date_posted), serves per-user listings.
+
+       Properties:
+           is_excerpt_truncated (bool): True if the excerpt is shorter than the content.
+   """
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     date_posted = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # set on creation, bumped by posts.routes.update_post
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     content = db.Column(db.Text, nullable=False)
+    # listings read this instead of loading the full content (see _set_excerpt)
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + len(ELLIPSIS)), nullable=False, default='')
     # linking many-to-one relationship to User
     # 'user-id' lowercased as referencing table name and column name which are automatically set to lowercased
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # indexes are also created on existing databases by migration 2 (flask db upgrade)
+    __table_args__ = (
+        db.Index('ix_post_date_posted', 'date_posted'),
+        db.Index('ix_post_user_id_date_posted', 'user_id', 'date_posted'),
+    )
+
+    @validates('content')
+    def _set_excerpt(self, key, content):
+        # every assignment of content (new_post, update_post, fixtures) refreshes the excerpt
+        self.excerpt = make_excerpt(content)
+        return content
+
+    @property
+    def is_excerpt_truncated(self):
+        return self.excerpt.endswith(ELLIPSIS)
+
     def __repr__(self):
         return f"Post(title: '{self.title}',date_posted: '{self.date_posted}')"
+
+
+class Counter(db.Model):
+    """
+       Named aggregate maintained alongside the rows it counts, so pages never run COUNT(*).
+
+       Attributes:
+           name (str): Primary key, e.g. Counter.POSTS.
+           value (int): Current count.
+
+       Methods:
+           get(name): Current value of a counter (0 if never set).
+           add(connection, name, delta): Increment a counter in SQL, creating its row if needed.
+           set(connection, name, value): Overwrite a counter, creating its row if needed.
+   """
+    POSTS = 'posts'
+    # bumped by every write that invalidates cached fragments, see cache.FragmentCache
+    FRAGMENT_CACHE = 'fragment_cache'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def get(name):
+        """
+        Reads a counter by primary key.
+
+        Args:
+            name (str): Counter name.
+
+        Returns:
+            int: Current value, 0 if the counter has no row yet.
+        """
+        return db.session.execute(select(Counter.value).where(Counter.name == name)).scalar() or 0
+
+    @staticmethod
+    def add(connection, name, delta):
+        """
+        Increments a counter SQL-side, in the caller's transaction (concurrent writers cannot lose updates).
+
+        Args:
+            connection (Connection): Connection of the write transaction.
+            name (str): Counter name.
+            delta (int): Amount to add, may be negative.
+        """
+        # plain UPDATE, then INSERT for a counter's first change: works on every database, unlike an upsert
+        counter_table = Counter.__table__
+        updated = connection.execute(counter_table.update().where(counter_table.c.name == name)
+                                     .values(value=counter_table.c.value + delta))
+        if updated.rowcount == 0:
+            connection.execute(counter_table.insert().values(name=name, value=max(delta, 0)))
+
+    @staticmethod
+    def set(connection, name, value):
+        """
+        Overwrites a counter in the caller's transaction, e.g. with a value recomputed from the rows it counts.
+
+        Args:
+            connection (Connection): Connection of the write transaction.
+            name (str): Counter name.
+            value (int): New value.
+        """
+        counter_table = Counter.__table__
+        updated = connection.execute(counter_table.update().where(counter_table.c.name == name).values(value=value))
+        if updated.rowcount == 0:
+            connection.execute(counter_table.insert().values(name=name, value=value))
+
+
+# counters follow every ORM insert/delete of a Post (routes, imports, fixtures) in the same flush;
+# bulk Query.delete() / raw SQL bypass them: `flask posts repair-counters` recomputes both
+def _adjust_post_counters(connection, user_id, delta):
+    # SQL-side increments in the flush's transaction: concurrent writers cannot lose updates
+    user_table = User.__table__
+    connection.execute(user_table.update().where(user_table.c.id == user_id)
+                       .values(post_count=user_table.c.post_count + delta))
+    Counter.add(connection, Counter.POSTS, delta)
+
+
+@event.listens_for(Post, 'after_insert')
+def _count_post_insert(mapper, connection, post):
+    _adjust_post_counters(connection, post.user_id, 1)
+
+
+@event.listens_for(Post, 'after_delete')
+def _count_post_delete(mapper, connection, post):
+    _adjust_post_counters(connection, post.user_id, -1)
@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import abort
+from sqlalchemy import and_, or_
+from flask_blog.models import Post
+
+'''
+Keyset (cursor) pagination
+Instead of OFFSET/LIMIT + COUNT(*), pages are addressed by the (date_posted, id) key of
+the row at the edge of the previous page, so every page costs the same indexed range scan.
+Cursors are opaque url-safe tokens: base64 of ["n" | "p", date_posted isoformat, id]
+    "n" => next page (older posts than the key)
+    "p" => previous page (newer posts than the key)
+'''
+NEXT = 'n'
+PREV = 'p'
+
+
+def encode_cursor(direction, date_posted, post_id):
+    """
+        Build an opaque cursor token pointing before/after a given post key.
+
+        Args:
+            direction (str): NEXT for older posts, PREV for newer posts.
+            date_posted (datetime): Date of the post at the page edge.
+            post_id (int): ID of the post at the page edge.
+
+        Returns:
+            str: URL-safe cursor token.
+    """
+    raw = json.dumps([direction, date_posted.isoformat(), post_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+        Decode a cursor token produced by encode_cursor.
+
+        Args:
+            token (str): Cursor token taken from the query string.
+
+        Returns:
+            tuple: (direction, date_posted, post_id)
+
+        Raises:
+            400 Bad Request: If the token is malformed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, date_posted, post_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if direction not in (NEXT, PREV) or not isinstance(post_id, int):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(date_posted), post_id
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        abort(400)
+
+
+class KeysetPage:
+    """
+        One page of posts fetched by keyset pagination.
+
+        Attributes:
+            items (list): Posts on this page, newest first.
+            has_next (bool): True if older posts exist.
+            has_prev (bool): True if newer posts exist.
+            next_cursor (str | None): Token for the page of older posts.
+            prev_cursor (str | None): Token for the page of newer posts.
+            direction (str | None): Direction of the cursor used, None for the first page.
+            following (Post | None): Extra row fetched beyond the page in the direction of travel;
+                                     has_next / has_prev depend on it.
+    """
+    def __init__(self, items, has_next, has_prev, direction=None, following=None):
+        self.items = items
+        self.direction = direction
+        self.following = following
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = encode_cursor(NEXT, items[-1].date_posted, items[-1].id) if has_next and items else None
+        self.prev_cursor = encode_cursor(PREV, items[0].date_posted, items[0].id) if has_prev and items else None
+
+
+def paginate_keyset(query, cursor=None, per_page=5):
+    """
+        Fetch a page of posts ordered by (date_posted, id) descending using a cursor.
+
+        - One extra row is fetched to know whether another page exists in the
+          direction of travel, so no COUNT(*) is needed.
+        - Pages in the PREV direction are fetched ascending and reversed.
+
+        Args:
+            query (Query): Post query, optionally filtered (e.g. by author).
+            cursor (str | None): Cursor token, None for the first page.
+            per_page (int): Number of posts per page.
+
+        Returns:
+            KeysetPage: The requested page.
+    """
+    if not cursor:
+        rows = query.order_by(Post.date_posted.desc(), Post.id.desc()).limit(per_page + 1).all()
+        return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_prev=False,
+                          following=_following(rows, per_page))
+
+    direction, date_posted, post_id = decode_cursor(cursor)
+    if direction == NEXT:
+        # older posts: (date_posted, id) < key
+        rows = query.filter(or_(Post.date_posted < date_posted,
+                                and_(Post.date_posted == date_posted, Post.id < post_id)))\
+                    .order_by(Post.date_posted.desc(), Post.id.desc())\
+                    .limit(per_page + 1).all()
+        return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_prev=True, direction=NEXT,
+                          following=_following(rows, per_page))
+
+    # newer posts: (date_posted, id) > key
+    rows = query.filter(or_(Post.date_posted > date_posted,
+                            and_(Post.date_posted == date_posted, Post.id > post_id)))\
+                .order_by(Post.date_posted.asc(), Post.id.asc())\
+                .limit(per_page + 1).all()
+    items = list(reversed(rows[:per_page]))
+    return KeysetPage(items, has_next=True, has_prev=len(rows) > per_page, direction=PREV,
+                      following=_following(rows, per_page))
+
+
+def _following(rows, per_page):
+    return rows[per_page] if len(rows) > per_page else None
@@ -1,13 +1,22 @@
+from datetime import datetime, timezone
 from flask import (render_template, url_for, flash,
                    redirect, request, abort, Blueprint)
 from flask_login import current_user, login_required
-from flask_blog import db
+from sqlalchemy.orm import joinedload
+from flask_blog import db, fragment_cache
 from flask_blog.models import Post
 from flask_blog.posts.forms import PostForm
+from flask_blog.conditional import render_cached_page
+from flask_blog.streaming import stream_page
+from flask_blog.search import index_post, remove_post
+from flask_blog.posts.utils import backfill_excerpts_command, repair_counters_command
 
 
 # create instance of Blueprint
 posts = Blueprint('posts', __name__)
+# `flask posts backfill-excerpts`, `flask posts repair-counters`
+posts.cli.add_command(backfill_excerpts_command)
+posts.cli.add_command(repair_counters_command)
 
 
 @posts.route("/post/new", methods=['GET', 'POST'])
@@ -17,7 +26,7 @@ def new_post():
         Create a new blog post.
 
         - Displays a form to the logged-in user.
-        - On valid submission, saves the post to the database.
+        - On valid submission, saves the post to the database and the search index.
         - Redirects to the homepage after creation.
 
         Returns:
@@ -26,9 +35,15 @@ def new_post():
     form = PostForm()
     if form.validate_on_submit():
         # creating post and adding post to db
-        post = Post(title=form.title.data, content=form.content.data, author=current_user)
+        # user_id rather than author=current_user: current_user is a detached snapshot (see cache.IdentityCache)
+        post = Post(title=form.title.data, content=form.content.data, user_id=current_user.id)
         db.session.add(post)
+        # flush assigns post.id; the index row commits together with the post
+        db.session.flush()
+        index_post(post)
         db.session.commit()
+        # new post appears on the first pages of the home feed and the author's listing
+        fragment_cache.invalidate('home:head', f'user:{current_user.id}:head')
         flash('Your post has been created!', 'success')  # flash: to send a one-time alert
         return redirect(url_for('main.index'))
     return render_template('create_post.html', title='New Post', form=form, legend='New Post')
@@ -44,9 +59,25 @@ def post(post_id):
 
         Returns:
             Response: Renders the post detail template.
+            The article is served from the fragment cache when possible,
+            304 Not Modified when the client's ETag / Last-Modified is current.
     """
-    post = Post.query.get_or_404(post_id)
-    return render_template('post.html', title=post.title, post=post)
+    # load author in the same SELECT as the post
+    post = Post.query.options(joinedload(Post.author)).filter_by(id=post_id).first_or_404()
+    # Update/Delete buttons only for the author: cached as a separate variant
+    is_owner = current_user.is_authenticated and post.user_id == current_user.id
+
+    def load_post():
+        tags = {f'post:{post.id}', f'author:{post.user_id}'}
+        version = (post.id, post.updated_at, post.author.username, post.author.image_file)
+        return post, tags, version, post.updated_at
+
+    return render_cached_page(
+        ('post', post.id, is_owner), load_post,
+        render_fragment=lambda post: render_template('fragments/post_article.html', post=post, is_owner=is_owner),
+        # streamed: the head goes out before a long article is rendered
+        render_page=lambda article: stream_page('post.html', title=post.title, article=article),
+        page_version=(is_owner,), stream=True)
 
 
 @posts.route("/post/<int:post_id>/update", methods=['GET', 'POST'])
@@ -57,7 +88,7 @@ def update_post(post_id):
 
         - Only the author can update their own post.
         - Pre-fills the form with existing data.
-        - Saves updated content to the database.
+        - Saves updated content to the database and the search index.
 
         Args:
             post_id (int): ID of the post to update.
@@ -72,7 +103,7 @@ def update_post(post_id):
     # get post if exist else throw 404 error
     post = Post.query.get_or_404(post_id)
     # check authorized user for post else throw 403 error
-    if post.author != current_user:
+    if post.user_id != current_user.id:
         abort(403)
 
     form = PostForm()
@@ -80,7 +111,11 @@ def update_post(post_id):
         # update post and commit to db
         post.title = form.title.data
         post.content = form.content.data
+        # modification marker for conditional GET validators
+        post.updated_at = datetime.now(timezone.utc)
+        index_post(post)
         db.session.commit()
+        fragment_cache.invalidate(f'post:{post.id}')
         flash('Your post has been updated!', 'success')
         return redirect(url_for('posts.post', post_id=post.id)) # redirect required due to post-get-redirect pattern
     elif request.method == 'GET':
@@ -97,7 +132,7 @@ def delete_post(post_id):
        Delete an existing blog post.
 
        - Only the post's author is authorized to delete it.
-       - Post is removed from the database.
+       - Post is removed from the database and the search index.
 
        Args:
            post_id (int): ID of the post to delete.
@@ -110,9 +145,13 @@ def delete_post(post_id):
            403 Forbidden: If the user is not the author.
    """
     post = Post.query.get_or_404(post_id)
-    if post.author != current_user:
+    if post.user_id != current_user.id:
         abort(403)
     db.session.delete(post)
+    remove_post(post_id)
     db.session.commit()
+    # every listing page and article showing the post (or paging to it), and the first pages of
+    # the home feed and the author's listing, as for a new post
+    fragment_cache.invalidate(f'post:{post_id}', 'home:head', f'user:{current_user.id}:head')
     flash('Your post has been deleted!', 'success')
     return redirect(url_for('main.index'))
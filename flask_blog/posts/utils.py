@@ -0,0 +1,100 @@
+import re
+import click
+from sqlalchemy import func, select
+from flask_blog import db
+from flask_blog.cache import bump_fragment_version
+
+EXCERPT_LENGTH = 280
+ELLIPSIS = '…'
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """
+        Shorten post content to the text shown in listings.
+
+        - Whitespace (newlines included) is collapsed to single spaces.
+        - Long content is cut at the last word boundary before `length` and ends with an ellipsis.
+
+        Args:
+            content (str): Full post content.
+            length (int): Maximum excerpt length, ellipsis excluded.
+
+        Returns:
+            str: The excerpt.
+    """
+    text = re.sub(r'\s+', ' ', content or '').strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(' ', 1)[0] if ' ' in text[:length + 1] else text[:length]
+    return cut[:length].rstrip(' .,;:!?-') + ELLIPSIS
+
+
+def backfill_excerpts(conn, only_missing=True, batch_size=500):
+    """
+        Compute Post.excerpt for stored posts, in batches.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+            only_missing (bool): Skip posts that already have an excerpt.
+            batch_size (int): Posts read and updated per round trip.
+
+        Returns:
+            int: Number of posts updated.
+    """
+    missing = "AND excerpt = ''" if only_missing else ''
+    last_id, updated = 0, 0
+    while True:
+        # keyset over id: each batch is an index range, not an OFFSET scan
+        rows = conn.exec_driver_sql(
+            f'SELECT id, content FROM post WHERE id > ? {missing} ORDER BY id LIMIT ?',
+            (last_id, batch_size)).all()
+        if not rows:
+            return updated
+        conn.exec_driver_sql('UPDATE post SET excerpt = ? WHERE id = ?',
+                             [(make_excerpt(content), post_id) for post_id, content in rows])
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+@click.command('backfill-excerpts')
+@click.option('--all', 'recompute_all', is_flag=True, help='Recompute every excerpt, not only missing ones.')
+def backfill_excerpts_command(recompute_all):
+    """Store listing excerpts for posts that have none."""
+    with db.engine.begin() as conn:
+        updated = backfill_excerpts(conn, only_missing=not recompute_all)
+        # running servers drop the listings showing the old excerpts
+        bump_fragment_version(conn)
+    click.echo(f'✅ Updated excerpts of {updated} posts')
+
+
+def repair_counters(conn):
+    """
+        Recompute User.post_count and the global post counter from the post table.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+
+        Returns:
+            tuple[int, int]: (users whose count was wrong, total number of posts)
+    """
+    from flask_blog.models import Counter, Post, User
+
+    # SQLAlchemy core on the mapped tables: "user" is quoted where the database reserves it
+    user_table, post_table = User.__table__, Post.__table__
+    count_posts = (select(func.count()).select_from(post_table)
+                   .where(post_table.c.user_id == user_table.c.id).scalar_subquery())
+    drifted = conn.execute(select(func.count()).select_from(user_table)
+                           .where(user_table.c.post_count != count_posts)).scalar()
+    conn.execute(user_table.update().values(post_count=count_posts))
+    total = conn.execute(select(func.count()).select_from(post_table)).scalar()
+    Counter.set(conn, Counter.POSTS, total)
+    return drifted, total
+
+
+@click.command('repair-counters')
+def repair_counters_command():
+    """Recompute the denormalized post counters."""
+    with db.engine.begin() as conn:
+        drifted, total = repair_counters(conn)
+        bump_fragment_version(conn)
+    click.echo(f'✅ {total} posts, fixed post_count of {drifted} users')
@@ -0,0 +1,279 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+'''
+Admission control for the auth endpoints
+Login, registration and password reset submissions cost a bcrypt hash or an outbound email.
+Every POST to a view decorated with @auth_rate_limit is counted twice before the view runs, and
+only if neither key is over its limit:
+    - per client IP (request.remote_addr; behind a proxy, wrap the app in werkzeug's ProxyFix)
+    - per account (the submitted email, or the reset token)
+Each key is limited with a sliding window counter: the count of the current fixed window plus the
+previous window's count weighted by how much of it still overlaps the sliding window. It needs two
+integers per key and is exact enough for abuse control. Over the limit the request gets a bare 429
+with Retry-After at once: no form parsing beyond the key, no DB query, no hashing, no template.
+Counts live in process memory, or with RATELIMIT_STORAGE = 'sqlite' in a SQLite file shared by
+every worker of the host.
+'''
+
+
+class RateLimited(TooManyRequests):
+    """Raised when a key is over its limit; answered with the plain werkzeug 429 page."""
+    description = 'Too many attempts, please try again later.'
+
+
+def sliding_count(previous, current, elapsed_fraction):
+    """
+        Estimate of the hits of the last period.
+
+        Args:
+            previous (int): Hits of the previous fixed window.
+            current (int): Hits of the current fixed window.
+            elapsed_fraction (float): Part of the current window already elapsed, 0 to 1.
+
+        Returns:
+            float: previous hits still inside the sliding window plus current hits.
+    """
+    return previous * (1 - elapsed_fraction) + current
+
+
+class MemoryStore:
+    """Window counts of one process: (key, period) -> {window number: hits}."""
+    # hits between two sweeps of the keys nobody has hit for a while
+    PURGE_EVERY = 1000
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key, limit, period, now):
+        """
+            Count a hit unless the key is over its limit.
+
+            Args:
+                key (str): Rate limited key.
+                limit (int): Hits allowed per period.
+                period (float): Sliding window length in seconds.
+                now (float): Current time in seconds.
+
+            Returns:
+                bool: True if the hit was allowed (and counted).
+        """
+        return self.hit_all([(key, limit, period)], now) is None
+
+    def hit_all(self, keys, now):
+        """
+            Count a hit on every key, or on none of them if one is over its limit.
+
+            Args:
+                keys (list[tuple[str, int, float]]): (key, hits allowed per period, period in seconds).
+                now (float): Current time in seconds.
+
+            Returns:
+                int | None: Position in keys of the first key over its limit, None if the hits were counted.
+        """
+        with self._lock:
+            windows = []
+            for position, (key, limit, period) in enumerate(keys):
+                window, elapsed = divmod(now, period)
+                counts = self._counts.setdefault((key, period), {})
+                if sliding_count(counts.get(window - 1, 0), counts.get(window, 0), elapsed / period) + 1 > limit:
+                    return position
+                windows.append((counts, window))
+            for counts, window in windows:
+                counts[window] = counts.get(window, 0) + 1
+                for old in [number for number in counts if number < window - 1]:
+                    del counts[old]
+            self._hits += 1
+            if self._hits % self.PURGE_EVERY == 0:
+                self._purge(now)
+            return None
+
+    def _purge(self, now):
+        # keys not seen for two of their own windows would otherwise stay forever
+        for key, period in [(key, period) for (key, period), counts in self._counts.items()
+                            if max(counts) < now // period - 1]:
+            del self._counts[key, period]
+
+
+class SQLiteStore:
+    """
+        Window counts in a SQLite file, shared by the workers of one host.
+
+        Attributes:
+            path (str): Database file.
+    """
+    PURGE_EVERY = MemoryStore.PURGE_EVERY
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_limit ('
+                         'key TEXT NOT NULL, period REAL NOT NULL, window INTEGER NOT NULL, '
+                         'hits INTEGER NOT NULL, PRIMARY KEY (key, period, window)) WITHOUT ROWID')
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads: one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, limit, period, now):
+        """Same as MemoryStore.hit, atomic across processes."""
+        return self.hit_all([(key, limit, period)], now) is None
+
+    def hit_all(self, keys, now):
+        """Same as MemoryStore.hit_all, atomic across processes."""
+        conn = self._connection()
+        # IMMEDIATE: take the write lock up front, so read-check-increment is atomic across workers
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rejected = None
+            windows = []
+            for position, (key, limit, period) in enumerate(keys):
+                window, elapsed = divmod(now, period)
+                window = int(window)
+                counts = dict(conn.execute('SELECT window, hits FROM rate_limit '
+                                           'WHERE key = ? AND period = ? AND window >= ?', (key, period, window - 1)))
+                if sliding_count(counts.get(window - 1, 0), counts.get(window, 0), elapsed / period) + 1 > limit:
+                    rejected = position
+                    break
+                windows.append((key, period, window))
+            if rejected is None:
+                conn.executemany('INSERT INTO rate_limit (key, period, window, hits) VALUES (?, ?, ?, 1) '
+                                 'ON CONFLICT (key, period, window) DO UPDATE SET hits = hits + 1', windows)
+                self._hits += 1
+                if self._hits % self.PURGE_EVERY == 0:
+                    # windows older than the previous one of their own period are no longer read
+                    conn.execute('DELETE FROM rate_limit WHERE window < CAST(? / period AS INTEGER) - 1', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return rejected
+
+
+class RateLimiter:
+    """
+        Limits of one app and its rejection counters.
+
+        Attributes:
+            store (MemoryStore | SQLiteStore): Window counts.
+            limits (dict[str, tuple[int, float]]): Scope ('ip', 'account') -> (hits, period in seconds).
+            allowed, rejected_by_ip, rejected_by_account (int): Counters of this process.
+    """
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+        self.allowed = 0
+        self.rejected_by_ip = 0
+        self.rejected_by_account = 0
+
+    def check(self, ip, account, now=None):
+        """
+            Count an attempt against the IP and the account, against neither if one is over its limit.
+
+            Args:
+                ip (str): Client address.
+                account (str | None): Normalized account key, None if the form has none.
+                now (float | None): Current time, defaults to time.time().
+
+            Raises:
+                RateLimited: If either key is over its limit.
+        """
+        now = time.time() if now is None else now
+        scopes = [(scope, value) for scope, value in (('ip', ip), ('account', account)) if value is not None]
+        # all or nothing: an attempt rejected for its account does not use up the IP's allowance (a
+        # shared address stays usable while one of its accounts is locked out), and the other way round
+        rejected = self.store.hit_all([(f'{scope}:{value}', *self.limits[scope]) for scope, value in scopes], now)
+        if rejected is not None:
+            scope = scopes[rejected][0]
+            period = self.limits[scope][1]
+            setattr(self, f'rejected_by_{scope}', getattr(self, f'rejected_by_{scope}') + 1)
+            raise RateLimited(retry_after=math.ceil(period - now % period))
+        self.allowed += 1
+
+    def stats(self):
+        return {'allowed': self.allowed, 'rejected': self.rejected_by_ip + self.rejected_by_account,
+                'rejected_by_ip': self.rejected_by_ip, 'rejected_by_account': self.rejected_by_account}
+
+
+def account_key():
+    """
+        Account targeted by the current auth request: the submitted email, else the reset token.
+
+        Returns:
+            str | None: Short stable key (a digest, raw emails and tokens are not kept), None if unknown.
+    """
+    account = request.form.get('email', '').strip().lower() or (request.view_args or {}).get('token')
+    if not account:
+        return None
+    return hashlib.blake2b(account.encode(), digest_size=12).hexdigest()
+
+
+def auth_rate_limit(view):
+    """
+        Decorator rejecting form submissions over the IP or account limit with a 429, before the view runs.
+
+        Args:
+            view (callable): Flask view function.
+
+        Returns:
+            callable: Wrapped view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions.get('rate_limiter')
+        if limiter is not None and request.method == 'POST':
+            limiter.check(request.remote_addr or 'unknown', account_key())
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class AuthRateLimit:
+    """
+        Flask extension creating the app's RateLimiter used by @auth_rate_limit.
+
+        Configuration:
+            RATELIMIT_ENABLED (bool): Defaults to True.
+            RATELIMIT_AUTH_PER_IP (tuple[int, float]): Attempts per period (seconds) and client IP.
+                Defaults to (20, 60).
+            RATELIMIT_AUTH_PER_ACCOUNT (tuple[int, float]): Attempts per period and account.
+                Defaults to (5, 60).
+            RATELIMIT_STORAGE (str): 'memory' (per process) or 'sqlite' (shared by the host's workers).
+                Defaults to 'memory'.
+            RATELIMIT_SQLITE_PATH (str): File of the 'sqlite' storage. Defaults to <instance>/rate_limit.db.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_AUTH_PER_IP', (20, 60))
+        app.config.setdefault('RATELIMIT_AUTH_PER_ACCOUNT', (5, 60))
+        app.config.setdefault('RATELIMIT_STORAGE', 'memory')
+        app.config.setdefault('RATELIMIT_SQLITE_PATH', os.path.join(app.instance_path, 'rate_limit.db'))
+        if not app.config['RATELIMIT_ENABLED']:
+            return
+        if app.config['RATELIMIT_STORAGE'] == 'sqlite':
+            store = SQLiteStore(app.config['RATELIMIT_SQLITE_PATH'])
+        else:
+            store = MemoryStore()
+        app.extensions['rate_limiter'] = RateLimiter(store, {'ip': app.config['RATELIMIT_AUTH_PER_IP'],
+                                                             'account': app.config['RATELIMIT_AUTH_PER_ACCOUNT']})
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+import re
+import click
+from flask import abort
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+from sqlalchemy.orm import joinedload
+from flask_blog import db
+from flask_blog.models import Post
+
+'''
+Full-text search
+post_fts is an SQLite FTS5 table holding a copy of Post.title and Post.content, keyed by
+rowid = post.id. It is kept in sync in the same transaction as the post write (index_post /
+remove_post in posts.routes), and can be rebuilt in bulk with `flask search rebuild`.
+Results are ranked by bm25 with title matches weighted 10x, and paginated by keyset on
+(rank, id): cursors are base64 of [rank, id] of the last result shown.
+'''
+FTS_TABLE = 'post_fts'
+# bm25 weights of the (title, content) columns
+RANK_FUNCTION = 'bm25(10.0, 1.0)'
+# snippet() markers, escaped-safe stand-ins for <mark> / </mark>
+MARK_START, MARK_END = '\x02', '\x03'
+TERM = re.compile(r'\w+', re.UNICODE)
+
+search_cli = AppGroup('search', help='Manage the full-text search index.')
+
+
+def create_index(conn):
+    """
+        Create the FTS5 table and its ranking function if missing.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+
+        Returns:
+            bool: True if the table was created.
+    """
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).first()
+    if exists:
+        return False
+    # porter: 'posting' matches 'posts'; unicode61 folds case and diacritics
+    conn.exec_driver_sql(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, tokenize='porter unicode61')")
+    # stored in the index: ORDER BY rank uses the weighted bm25
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', '{RANK_FUNCTION}')")
+    return True
+
+
+def rebuild_index(conn):
+    """
+        Repopulate the index from the post table.
+
+        Args:
+            conn (Connection): Open SQLAlchemy connection.
+
+        Returns:
+            int: Number of posts indexed.
+    """
+    create_index(conn)
+    conn.exec_driver_sql(f'DELETE FROM {FTS_TABLE}')
+    conn.exec_driver_sql(f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM post')
+    # merge the b-tree segments written by the bulk insert
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return conn.exec_driver_sql(f'SELECT count(*) FROM {FTS_TABLE}').scalar()
+
+
+# db.create_all() (tests, fresh databases) creates the index along with the post table
+event.listen(Post.__table__, 'after_create', lambda target, conn, **kw: create_index(conn))
+event.listen(Post.__table__, 'before_drop',
+             lambda target, conn, **kw: conn.exec_driver_sql(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+
+
+def index_post(post):
+    """
+        Add or replace a post in the index, in the current session's transaction.
+
+        Args:
+            post (Post): Post to index; must be flushed (have an id).
+    """
+    remove_post(post.id)
+    db.session.execute(text(f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (:id, :title, :content)'),
+                       {'id': post.id, 'title': post.title, 'content': post.content})
+
+
+def remove_post(post_id):
+    """
+        Remove a post from the index, in the current session's transaction.
+
+        Args:
+            post_id (int): ID of the post to remove.
+    """
+    db.session.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), {'id': post_id})
+
+
+def match_expression(query):
+    """
+        Turn free text into an FTS5 query: every word must match, operators are not interpreted.
+
+        Args:
+            query (str): Text typed by the user.
+
+        Returns:
+            str | None: FTS5 MATCH expression, None if the text has no searchable word.
+    """
+    terms = TERM.findall(query)
+    if not terms:
+        return None
+    # quoted strings are literal, so AND / NEAR / * / : typed by the user are just words
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def encode_search_cursor(rank, post_id):
+    raw = json.dumps([rank, post_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        rank, post_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(rank, (int, float)) or not isinstance(post_id, int):
+            raise ValueError(token)
+        return float(rank), post_id
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        abort(400)
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags."""
+    return Markup(str(escape(snippet)).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+class SearchPage:
+    """
+        One page of search results, best match first.
+
+        Attributes:
+            items (list[tuple[Post, Markup]]): Posts with a highlighted content snippet.
+            has_next (bool): True if more results exist.
+            next_cursor (str | None): Token for the next page of results.
+    """
+    def __init__(self, items, has_next, next_cursor=None):
+        self.items = items
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+
+def search_posts(query, cursor=None, per_page=5):
+    """
+        Search posts by title and content.
+
+        - One extra row is fetched to know whether another page exists.
+        - Posts are then loaded with their authors in a single SELECT.
+
+        Args:
+            query (str): Text typed by the user.
+            cursor (str | None): Cursor token, None for the first page.
+            per_page (int): Number of results per page.
+
+        Returns:
+            SearchPage: The requested page (empty for a query without words).
+
+        Raises:
+            400 Bad Request: If the cursor token is malformed.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return SearchPage([], has_next=False)
+    params = {'match': expression, 'limit': per_page + 1, 'start': MARK_START, 'end': MARK_END}
+    after = ''
+    if cursor:
+        params['rank'], params['id'] = decode_search_cursor(cursor)
+        after = 'AND (rank > :rank OR (rank = :rank AND rowid > :id))'
+    rows = db.session.execute(text(f"""
+        SELECT rowid, rank, snippet({FTS_TABLE}, 1, :start, :end, '…', 24)
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH :match {after}
+        ORDER BY rank, rowid
+        LIMIT :limit"""), params).all()
+
+    page = rows[:per_page]
+    posts = Post.query.options(joinedload(Post.author)).filter(Post.id.in_([row[0] for row in page])).all()
+    posts_by_id = {post.id: post for post in posts}
+    items = [(posts_by_id[row[0]], highlight(row[2])) for row in page if row[0] in posts_by_id]
+    has_next = len(rows) > per_page
+    next_cursor = encode_search_cursor(page[-1][1], page[-1][0]) if has_next else None
+    return SearchPage(items, has_next, next_cursor)
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild the full-text index from every post."""
+    with db.engine.begin() as conn:
+        count = rebuild_index(conn)
+    click.echo(f'✅ Indexed {count} posts')
@@ -0,0 +1,218 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+import click
+from flask import current_app, has_request_context, request
+from flask.cli import AppGroup
+from sqlalchemy import event
+
+'''
+Slow-query log
+Every statement running longer than SLOW_QUERY_THRESHOLD_MS is appended to SLOW_QUERY_LOG
+(JSON Lines), with:
+    - shape: the statement with whitespace collapsed and IN (?, ?, ...) lists folded, so the
+      same query with other parameters or list lengths groups together
+    - endpoint: request endpoint that issued it (or "<cli>" outside requests)
+    - parameters: redacted, only numbers / booleans / NULL are kept as is, text and dates
+      become their type (and length)
+    - plan: EXPLAIN QUERY PLAN output (SQLite), captured the first time a shape is slow in the process
+`flask queries report` aggregates the log and ranks shapes by total time.
+'''
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+queries_cli = AppGroup('queries', help='Slow-query log.')
+
+
+def statement_shape(statement):
+    """
+        Normalize a statement so that executions differing only by parameters compare equal.
+
+        Args:
+            statement (str): SQL text with placeholders.
+
+        Returns:
+            str: Single-line statement, IN lists folded to (?, ...).
+    """
+    return PLACEHOLDER_LIST.sub('(?, ...)', WHITESPACE.sub(' ', statement).strip())
+
+
+def redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact_parameters(parameters):
+    """
+        Replace parameter values that may hold personal data (text, dates, blobs) by their type.
+
+        Args:
+            parameters (tuple | list | dict | None): DB-API parameters of one execution.
+
+        Returns:
+            list | dict | None: JSON-ready redacted parameters.
+    """
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    return [redact_value(value) for value in parameters]
+
+
+def explain_query_plan(dbapi_connection, statement, parameters):
+    """
+        Run EXPLAIN QUERY PLAN for a statement on a raw sqlite3 connection.
+
+        Args:
+            dbapi_connection (sqlite3.Connection): Connection the statement ran on.
+            statement (str): SQL text.
+            parameters (tuple | dict): Parameters it ran with.
+
+        Returns:
+            list[str] | None: Plan lines, indented by depth, or None if SQLite cannot explain it.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        rows = cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+
+class SlowQueryLog:
+    """
+        Flask extension logging statements slower than a threshold, with their query plan.
+
+        Configuration:
+            SLOW_QUERY_THRESHOLD_MS (float | None): Threshold in milliseconds; None disables the log.
+                Defaults to 200.
+            SLOW_QUERY_LOG (str): JSON Lines file. Defaults to <instance>/slow_queries.jsonl.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from flask_blog import db
+
+        app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200)
+        app.config.setdefault('SLOW_QUERY_LOG', os.path.join(app.instance_path, 'slow_queries.jsonl'))
+        threshold = app.config['SLOW_QUERY_THRESHOLD_MS']
+        if threshold is None:
+            return
+        state = {'threshold': threshold / 1000, 'path': app.config['SLOW_QUERY_LOG'],
+                 'explained': set(), 'lock': threading.Lock()}
+        app.extensions['slow_query_log'] = state
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._start_query)
+            event.listen(engine, 'after_cursor_execute',
+                         lambda *args: self._end_query(app, state, *args))
+            event.listen(engine, 'handle_error', self._query_failed)
+
+    def _start_query(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    @staticmethod
+    def _query_failed(context):
+        # a failed statement never reaches after_cursor_execute: drop its start time
+        started = context.connection.info.get('slow_query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def _end_query(self, app, state, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['slow_query_started'].pop()
+        if elapsed < state['threshold']:
+            return
+        shape = statement_shape(statement)
+        if executemany:
+            # one entry for the whole batch, parameters of the first row only
+            parameters = parameters[0] if parameters else None
+        record = {'time': datetime.now().isoformat(timespec='seconds'),
+                  'endpoint': (request.endpoint or '<unmatched>') if has_request_context() else '<cli>',
+                  'duration_ms': round(elapsed * 1000, 3),
+                  'shape': shape,
+                  'parameters': redact_parameters(parameters)}
+        with state['lock']:
+            first_time = shape not in state['explained']
+            state['explained'].add(shape)
+        if first_time and conn.dialect.name == 'sqlite':
+            record['plan'] = explain_query_plan(conn.connection.dbapi_connection, statement, parameters or ())
+        app.logger.warning('Slow query (%.1f ms) from %s: %s', record['duration_ms'], record['endpoint'], shape)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with state['lock']:
+            os.makedirs(os.path.dirname(state['path']) or '.', exist_ok=True)
+            with open(state['path'], 'a', encoding='utf-8') as log_file:
+                log_file.write(line)
+
+
+def read_log(path):
+    """
+        Aggregate a slow-query log by statement shape.
+
+        Args:
+            path (str): JSON Lines file written by SlowQueryLog.
+
+        Returns:
+            list[dict]: One entry per shape (count, total_ms, max_ms, endpoints, plan),
+                slowest total first.
+    """
+    shapes = {}
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            entry = shapes.setdefault(record['shape'], {'shape': record['shape'], 'count': 0, 'total_ms': 0.0,
+                                                        'max_ms': 0.0, 'endpoints': {}, 'plan': None})
+            entry['count'] += 1
+            entry['total_ms'] += record['duration_ms']
+            entry['max_ms'] = max(entry['max_ms'], record['duration_ms'])
+            entry['endpoints'][record['endpoint']] = entry['endpoints'].get(record['endpoint'], 0) + 1
+            if record.get('plan'):
+                entry['plan'] = record['plan']
+    return sorted(shapes.values(), key=lambda entry: entry['total_ms'], reverse=True)
+
+
+@queries_cli.command('report')
+@click.option('--limit', default=10, show_default=True, help='Number of statement shapes to show.')
+def report_command(limit):
+    """Rank slow statement shapes by total time."""
+    path = current_app.config['SLOW_QUERY_LOG']
+    if not os.path.exists(path):
+        click.echo(f'No slow queries logged ({path} does not exist).')
+        return
+    entries = read_log(path)
+    for rank, entry in enumerate(entries[:limit], start=1):
+        endpoints = ', '.join(f'{name} ×{count}' for name, count in
+                              sorted(entry['endpoints'].items(), key=lambda item: -item[1]))
+        click.echo(f'#{rank} total {entry["total_ms"]:.1f} ms, {entry["count"]} runs, '
+                   f'avg {entry["total_ms"] / entry["count"]:.1f} ms, max {entry["max_ms"]:.1f} ms')
+        click.echo(f'    {entry["shape"]}')
+        click.echo(f'    endpoints: {endpoints}')
+        for plan_line in entry['plan'] or ['(no plan captured)']:
+            click.echo(f'    | {plan_line}')
+    click.echo(f'{len(entries)} statement shapes in {path}')
+
+
+@queries_cli.command('clear')
+def clear_command():
+    """Delete the slow-query log."""
+    path = current_app.config['SLOW_QUERY_LOG']
+    if os.path.exists(path):
+        os.remove(path)
+    click.echo('✅ Slow-query log cleared')
@@ -0,0 +1,104 @@
+import sys
+from flask import (Response, current_app, got_request_exception, render_template, stream_template,
+                   stream_with_context)
+from markupsafe import Markup
+
+'''
+Streamed page rendering
+For long pages (a post, an author's listing) the response is sent while the template renders:
+    1. stream_page renders layout.html up to FLUSH_MARKER (head, navbar, flashed messages) in the
+       view itself, so errors there and in the view still reach the errors blueprint handlers and
+       session changes (consumed flash messages) are saved with the response headers
+    2. that first chunk is sent at once: the browser starts fetching the CSS while the rest renders
+    3. the body follows in chunks of at least STREAM_CHUNK_SIZE characters; a DeferredMarkup
+       fragment (fragment cache miss) is only rendered when the template reaches it
+Once the status line is sent an error can no longer become an error page: it is logged like an
+unhandled exception and the page ends with a short notice.
+Routes opt in with render_cached_page(..., stream=True); TEMPLATE_STREAMING = False renders
+every page in one piece again.
+'''
+FLUSH_MARKER = '<!-- flush -->'
+STREAM_CHUNK_SIZE = 8192
+STREAM_ERROR_HTML = ('<div class="alert alert-danger">Sorry, something went wrong while sending this page. '
+                     'Please reload it.</div></div></div></main></body></html>')
+
+
+class DeferredMarkup:
+    """
+        HTML rendered on first use, when a streamed template outputs it.
+
+        Attributes:
+            render (callable): Returns the html (str or Markup).
+    """
+    def __init__(self, render):
+        self.render = render
+        self._html = None
+
+    def __html__(self):
+        if self._html is None:
+            self._html = Markup(self.render())
+        return self._html
+
+    def __str__(self):
+        return self.__html__()
+
+
+def flush_chunks(chunks, chunk_size=STREAM_CHUNK_SIZE):
+    """
+        Regroup the many small pieces yielded by Jinja into chunks worth a network write.
+
+        Args:
+            chunks (iterable[str]): Output of a streamed template.
+            chunk_size (int): Characters buffered before a chunk is yielded.
+
+        Yields:
+            str: Everything up to FLUSH_MARKER first, then chunks of at least chunk_size characters.
+    """
+    buffer, size, sent = [], 0, False
+    try:
+        for chunk in chunks:
+            head, marker, tail = chunk.partition(FLUSH_MARKER)
+            buffer.append(head)
+            size += len(head)
+            if marker or size >= chunk_size:
+                yield ''.join(buffer)
+                sent = True
+                buffer, size = [tail], len(tail)
+    except Exception as error:
+        if not sent:
+            raise
+        # the status line is already sent: log the error as Flask does and close the document
+        app = current_app._get_current_object()
+        got_request_exception.send(app, _async_wrapper=app.ensure_sync, exception=error)
+        app.log_exception(sys.exc_info())
+        buffer.append(STREAM_ERROR_HTML)
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_page(template_name, **context):
+    """
+        Streaming counterpart of render_template for layout.html pages.
+
+        Args:
+            template_name (str): Template extending layout.html.
+            **context: Template variables.
+
+        Returns:
+            Response: text/html response whose body is generated while it is sent.
+    """
+    if not current_app.config['TEMPLATE_STREAMING']:
+        return Response(render_template(template_name, **context), mimetype='text/html')
+    chunks = stream_with_context(flush_chunks(stream_template(template_name, stream_flush=Markup(FLUSH_MARKER),
+                                                              **context)))
+    # head and navbar rendered here, inside the view: errors so far get the usual error pages
+    first = next(chunks)
+
+    def body():
+        try:
+            yield first
+            yield from chunks
+        finally:
+            chunks.close()
+
+    return Response(body(), mimetype='text/html')
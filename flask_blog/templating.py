@@ -0,0 +1,81 @@
+import os
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+'''
+Template compilation
+Jinja compiles a template to Python code the first time it is loaded, in every worker process.
+    - bytecode cache: the compiled code is stored in JINJA_BYTECODE_CACHE_DIR and reused by every
+      worker and restart, keyed by template name and source checksum (edits invalidate it)
+    - warm-up: with TEMPLATE_WARMUP, create_app loads every template before returning, so no
+      request pays the compile cost; `flask templates warm` fills the cache at deploy time
+'''
+templates_cli = AppGroup('templates', help='Jinja template cache.')
+
+
+def warm_up_templates(app):
+    """
+        Load (compile, or read from the bytecode cache) every template of the app.
+
+        Args:
+            app (Flask): Application.
+
+        Returns:
+            tuple[int, float]: Number of templates loaded and seconds spent.
+    """
+    started = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), time.perf_counter() - started
+
+
+class TemplateCache:
+    """
+        Flask extension setting up the Jinja bytecode cache and the optional template warm-up.
+
+        Configuration:
+            JINJA_BYTECODE_CACHE_DIR (str | None): Directory of compiled templates; None disables it.
+                Defaults to <instance>/jinja_cache.
+            TEMPLATE_WARMUP (bool): Compile every template in create_app. Defaults to False.
+            TEMPLATE_STREAMING (bool): Let routes stream their pages (see streaming.stream_page). Defaults to True.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+        app.config.setdefault('TEMPLATE_WARMUP', False)
+        app.config.setdefault('TEMPLATE_STREAMING', True)
+        app.extensions['template_cache'] = {'templates': 0, 'seconds': 0.0}
+        cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    def warm_up(self, app):
+        """
+            Run the warm-up if TEMPLATE_WARMUP is set; called at the end of create_app.
+
+            Args:
+                app (Flask): Application, with its blueprints registered.
+
+            Returns:
+                dict: Templates loaded and seconds spent (0 when disabled).
+        """
+        report = app.extensions['template_cache']
+        if app.config['TEMPLATE_WARMUP']:
+            report['templates'], report['seconds'] = warm_up_templates(app)
+        return report
+
+
+@templates_cli.command('warm')
+def warm_command():
+    """Compile every template into the bytecode cache."""
+    count, seconds = warm_up_templates(current_app)
+    cache_dir = current_app.config['JINJA_BYTECODE_CACHE_DIR'] or 'no bytecode cache'
+    click.echo(f'✅ Compiled {count} templates in {seconds * 1000:.1f} ms ({cache_dir})')
@@ -0,0 +1,62 @@
+from flask_blog import db
+
+"""
+Tests for the JSON read API in flask_blog.api.routes.
+
+Tests:
+    - test_posts_are_cursor_paginated: listing pages follow the next links without gaps or repeats.
+    - test_fields_skip_content: fields= selects and returns only the requested fields.
+    - test_batch_ids_lookup: ids= returns several posts from a single query.
+    - test_single_post_and_errors: one post by id, JSON errors for unknown posts and fields.
+    - test_user_posts: posts of one author, 404 for unknown users.
+"""
+
+
+def test_posts_are_cursor_paginated(client, test_posts):
+    response = client.get('/api/posts?limit=4')
+    assert response.status_code == 200
+    first = response.get_json()
+    assert [post['title'] for post in first['posts']] == ['Post 5', 'Post 4', 'Post 3', 'Post 2']
+    assert first['prev'] is None
+    second = client.get(first['next']).get_json()
+    assert [post['title'] for post in second['posts']] == ['Post 1', 'Post 0']
+    assert second['next'] is None and second['prev']
+    post = first['posts'][0]
+    assert post['author']['username'] == 'bob'
+    assert post['url'].endswith(f'/post/{post["id"]}')
+    assert post['date_posted'].endswith('+00:00')
+
+
+def test_fields_skip_content(client, test_posts, count_queries):
+    db.session.expunge_all()
+    with count_queries() as statements:
+        data = client.get('/api/posts?fields=id,title,excerpt').get_json()
+    assert set(data['posts'][0]) == {'id', 'title', 'excerpt'}
+    assert len(statements) == 1
+    assert 'post.content' not in statements[0] and 'user.image_file' not in statements[0]
+
+
+def test_batch_ids_lookup(client, test_posts, count_queries):
+    wanted = [test_posts[3].id, 999, test_posts[0].id]
+    with count_queries() as statements:
+        data = client.get('/api/posts?fields=id&ids=' + ','.join(map(str, wanted))).get_json()
+    assert data['posts'] == [{'id': test_posts[3].id}, {'id': test_posts[0].id}]
+    assert len(statements) == 1
+    assert client.get('/api/posts?ids=1,x').status_code == 400
+
+
+def test_single_post_and_errors(client, test_posts):
+    data = client.get(f'/api/posts/{test_posts[1].id}').get_json()
+    assert (data['title'], data['content'], data['author']['username']) == ('Post 1', 'Content 1', 'alice')
+
+    missing = client.get('/api/posts/999')
+    assert missing.status_code == 404 and missing.get_json()['error'] == 'Not Found'
+    unknown = client.get('/api/posts?fields=title,password')
+    assert unknown.status_code == 400 and 'password' in unknown.get_json()['message']
+    assert client.get('/api/posts?cursor=garbage').get_json()['error'] == 'Bad Request'
+
+
+def test_user_posts(client, test_posts):
+    data = client.get('/api/users/alice/posts?fields=title').get_json()
+    assert data['posts'] == [{'title': 'Post 4'}, {'title': 'Post 1'}]
+    assert client.get('/api/users/nobody/posts').status_code == 404
@@ -0,0 +1,84 @@
+import gzip
+import os
+import shutil
+import brotli
+import pytest
+from flask_blog.assets import VENDOR_FILES, minify_css
+
+"""
+Tests for the fingerprinted asset bundles in flask_blog.assets.
+
+Tests:
+    - test_minify_css: comments and whitespace are stripped, descendant selectors kept.
+    - test_build_writes_fingerprinted_bundles: `flask assets build` writes hashed, precompressed bundles.
+    - test_layout_uses_bundles: once built, pages link the bundles instead of the CDNs.
+    - test_bundle_served_precompressed_and_immutable: bundles are sent brotli (or gzip, per Accept-Encoding)
+      encoded with a one year cache.
+"""
+
+
+@pytest.fixture
+def static_folder(app, tmp_path):
+    """Build into a temporary static folder with stand-ins for the vendor files (no network)."""
+    original = app.static_folder
+    shutil.copy(os.path.join(original, 'main.css'), tmp_path / 'main.css')
+    (tmp_path / 'vendor').mkdir()
+    for name in VENDOR_FILES:
+        (tmp_path / 'vendor' / name).write_text(f'/* {name} */ .vendor{{color:red}}')
+    app.static_folder = str(tmp_path)
+    yield tmp_path
+    app.static_folder = original
+    app.extensions['asset_bundles'] = {}
+
+
+def build(app):
+    result = app.test_cli_runner().invoke(args=['assets', 'build'])
+    assert result.exit_code == 0, result.output
+    return app.extensions['asset_bundles']
+
+
+def test_minify_css():
+    css = '/* header */\n.nav a :hover {\n  color: #fff;\n  margin : 0;\n}\n'
+    assert minify_css(css) == '.nav a :hover{color:#fff;margin :0}'
+
+
+def test_build_writes_fingerprinted_bundles(app, static_folder):
+    manifest = build(app)
+    assert set(manifest) == {'site.css', 'site.js'}
+    css_path = static_folder / manifest['site.css']
+    assert css_path.name.startswith('site.') and css_path.name != 'site.css'
+    content = css_path.read_bytes()
+    assert b'.vendor{color:red}' in content and b'background:#fafafa' in content
+    assert gzip.decompress((static_folder / (manifest['site.css'] + '.gz')).read_bytes()) == content
+    assert brotli.decompress((static_folder / (manifest['site.css'] + '.br')).read_bytes()) == content
+    # same input, same name: rebuilding does not bust browser caches
+    assert build(app) == manifest
+
+
+def test_layout_uses_bundles(app, client, static_folder):
+    assert b'maxcdn.bootstrapcdn.com' in client.get('/about').data
+    manifest = build(app)
+    html = client.get('/about').data.decode()
+    assert f'/static/{manifest["site.css"]}' in html
+    assert f'/static/{manifest["site.js"]}' in html
+    assert 'cdn' not in html
+
+
+def test_bundle_served_precompressed_and_immutable(app, client, static_folder):
+    manifest = build(app)
+    url = f'/static/{manifest["site.css"]}'
+    response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.mimetype == 'text/css'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert brotli.decompress(response.data) == (static_folder / manifest['site.css']).read_bytes()
+
+    # q=0 refuses brotli; a higher q-value for gzip is preferred
+    for accept_encoding in ('br;q=0, gzip', 'br;q=0.5, gzip'):
+        assert client.get(url, headers={'Accept-Encoding': accept_encoding}).headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in client.get(url, headers={'Accept-Encoding': 'br;q=0'}).headers
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == (static_folder / manifest['site.css']).read_bytes()
@@ -0,0 +1,36 @@
+from flask_blog.benchmarks.datagen import generate_lines
+from flask_blog.benchmarks.runner import run_benchmarks, compare
+
+"""
+Tests for the benchmark package flask_blog.benchmarks.
+
+Tests:
+    - test_dataset_is_deterministic: the same size and seed always generate the same rows.
+    - test_run_smoke: a tiny dataset runs through every scenario and reports timings.
+    - test_compare_flags_regressions: p50 / p95 slower than the threshold are reported.
+"""
+
+
+def test_dataset_is_deterministic():
+    first = list(generate_lines(3, 20, seed=7))
+    assert len(first) == 23
+    # the password hash is salted: compare posts only
+    assert first[3:] == list(generate_lines(3, 20, seed=7))[3:]
+    assert first[3:] != list(generate_lines(3, 20, seed=8))[3:]
+
+
+def test_run_smoke(tmp_path):
+    results = run_benchmarks(users=3, posts=30, iterations=2, warmup=1, data_dir=str(tmp_path))
+    assert results['meta']['posts'] == 30
+    for name, timings in results['scenarios'].items():
+        assert 0 < timings['p50_ms'] <= timings['p95_ms'] <= timings['max_ms'], name
+    # the dataset is reused by the next run
+    assert len(list(tmp_path.glob('*.db'))) == 1
+
+
+def test_compare_flags_regressions():
+    timings = lambda p50, p95: {'p50_ms': p50, 'p95_ms': p95}
+    baseline = {'scenarios': {'post': timings(10, 20), 'index_deep': timings(10, 20)}}
+    current = {'scenarios': {'post': timings(10.5, 20), 'index_deep': timings(10, 30), 'new': timings(1, 1)}}
+    assert compare(baseline, current, threshold=0.10) == [('index_deep', 'p95_ms', 20, 30)]
+    assert compare(baseline, current, threshold=0.60) == []
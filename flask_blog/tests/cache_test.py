@@ -0,0 +1,160 @@
+import time
+from flask_bcrypt import Bcrypt
+from flask_blog import create_app, db
+from flask_blog.config import TestingConfig
+from flask_blog.models import Post, User
+from sqlalchemy import inspect
+from flask_blog.cache import FragmentStore, IdentityStore
+from flask_blog.models import load_user
+
+"""
+Tests for the rendered fragment cache and identity cache in flask_blog.cache.
+
+Tests:
+    - test_store_evicts_least_recently_used: memory cap evicts the oldest unused entry.
+    - test_store_invalidates_by_tag: invalidation removes exactly the tagged entries.
+    - test_post_writes_invalidate_cached_pages: new/update/delete through the routes
+      are visible on the next render of the home feed and post page.
+    - test_delete_updates_neighbouring_pages: deleting the only post of the next page drops the "Older" link.
+    - test_workers_see_each_others_writes: a write through one app, or a CLI command, clears another app's cache.
+    - test_navbar_stays_dynamic: a cached home page still renders the per-user navbar.
+    - test_identity_store_expires_and_bounds: TTL expiry and LRU bound of the identity store.
+    - test_user_loader_is_cached: authenticated requests after the first skip the user SELECT.
+    - test_account_update_invalidates_identity: the new username shows on the next request.
+"""
+
+
+def login(client):
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+
+
+def test_store_evicts_least_recently_used():
+    store = FragmentStore(max_bytes=300)
+    store.set('a', 'a' * 100)
+    store.set('b', 'b' * 100)
+    store.get('a')                 # 'a' is now more recent than 'b'
+    store.set('c', 'c' * 100)
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+    assert store.evictions == 1
+    assert store.size <= store.max_bytes
+
+
+def test_store_invalidates_by_tag():
+    store = FragmentStore(max_bytes=10000)
+    store.set('page1', 'x', tags={'post:1', 'author:1'})
+    store.set('page2', 'y', tags={'post:2', 'author:1'})
+    store.set('page3', 'z', tags={'post:3', 'author:2'})
+    store.invalidate('post:2')
+    assert [store.get(key) for key in ('page1', 'page2', 'page3')] == ['x', None, 'z']
+    store.invalidate('author:1')
+    assert store.get('page1') is None and store.get('page3') == 'z'
+
+
+def test_post_writes_invalidate_cached_pages(client, test_user):
+    login(client)
+    client.post('/post/new', data={'title': 'First title', 'content': 'Body'})
+    assert b'First title' in client.get('/').data          # cached now
+
+    client.post('/post/new', data={'title': 'Second title', 'content': 'Body'})
+    assert b'Second title' in client.get('/').data
+
+    post_id = db.session.execute(db.text("SELECT id FROM post WHERE title = 'First title'")).scalar()
+    assert b'First title' in client.get(f'/post/{post_id}').data
+    client.post(f'/post/{post_id}/update', data={'title': 'Edited title', 'content': 'Body'})
+    assert b'Edited title' in client.get(f'/post/{post_id}').data
+    assert b'Edited title' in client.get('/').data
+    assert b'Edited title' in client.get('/user/testuser').data
+
+    client.post(f'/post/{post_id}/delete')
+    assert b'Edited title' not in client.get('/').data
+    assert client.get(f'/post/{post_id}').status_code == 404
+
+
+def test_delete_updates_neighbouring_pages(client, test_user):
+    login(client)
+    for number in range(6):
+        client.post('/post/new', data={'title': f'Title {number}', 'content': 'Body'})
+    # 5 posts per page: the oldest post is alone on page 2
+    assert b'Older' in client.get('/').data
+    assert b'Older' in client.get('/user/testuser').data
+
+    oldest_id = db.session.execute(db.text("SELECT id FROM post WHERE title = 'Title 0'")).scalar()
+    client.post(f'/post/{oldest_id}/delete')
+    assert b'Older' not in client.get('/').data
+    assert b'Older' not in client.get('/user/testuser').data
+
+
+def test_workers_see_each_others_writes(tmp_path):
+    class WorkerConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "site.db"}'
+        FRAGMENT_CACHE_SYNC_INTERVAL = 0
+    # two worker processes sharing one database
+    worker_1, worker_2 = create_app(WorkerConfig), create_app(WorkerConfig)
+    with worker_1.app_context():
+        db.create_all()
+        user = User(username='testuser', email='test@example.com',
+                    password=Bcrypt(worker_1).generate_password_hash('password').decode('utf-8'))
+        db.session.add(Post(title='Doomed title', content='Body', author=user))
+        db.session.commit()
+        post_id = Post.query.one().id
+    client_1, client_2 = worker_1.test_client(), worker_2.test_client()
+    assert b'Doomed title' in client_2.get('/').data       # cached by worker 2
+
+    login(client_1)
+    client_1.post(f'/post/{post_id}/delete')
+    assert b'Doomed title' not in client_2.get('/').data
+
+    with worker_1.app_context():
+        db.session.execute(db.text("INSERT INTO post (title, date_posted, updated_at, content, excerpt, user_id) "
+                                   "VALUES ('Raw title', '2030-01-01', '2030-01-01', 'Body', 'Body', 1)"))
+        db.session.commit()
+    assert b'Raw title' not in client_2.get('/').data      # raw SQL bypasses the caches...
+    with worker_1.app_context():
+        assert worker_1.test_cli_runner().invoke(args=['posts', 'repair-counters']).exit_code == 0
+    assert b'Raw title' in client_2.get('/').data          # ...the CLI command clears them
+    with worker_1.app_context():
+        db.drop_all()
+
+
+def test_navbar_stays_dynamic(client, test_user):
+    login(client)
+    client.post('/post/new', data={'title': 'Cached title', 'content': 'Body'})
+    assert b'Logout' in client.get('/').data
+    client.get('/logout')
+    response = client.get('/')
+    assert b'Cached title' in response.data
+    assert b'Logout' not in response.data and b'Login' in response.data
+
+
+def test_identity_store_expires_and_bounds():
+    store = IdentityStore(ttl=0.05, max_entries=2)
+    store.set(1, {'id': 1})
+    assert store.get(1) == {'id': 1}
+    time.sleep(0.06)
+    assert store.get(1) is None
+    for user_id in (1, 2, 3):
+        store.set(user_id, {'id': user_id})
+    assert store.get(1) is None and store.evictions == 1
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_user_loader_is_cached(app, test_user, count_queries):
+    user_id = test_user.id
+    db.session.expunge_all()
+    with count_queries() as statements:
+        first = load_user(str(user_id))
+        second = load_user(str(user_id))
+    assert len(statements) == 1
+    assert first is not second and second.username == 'testuser'
+    assert inspect(second).detached
+    stats = app.extensions['identity_cache'].stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_account_update_invalidates_identity(client, test_user):
+    login(client)
+    client.get('/')
+    client.post('/account', data={'username': 'renamed', 'email': 'test@example.com'})
+    response = client.get('/')
+    assert b'Welcome, Renamed' in response.data
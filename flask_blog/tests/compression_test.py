@@ -0,0 +1,80 @@
+import gzip
+import zlib
+import brotli
+from flask_blog.compression import negotiate
+
+"""
+Tests for the response compression middleware (compression.CompressionMiddleware).
+
+Tests:
+    - test_negotiate: Accept-Encoding qualities are honoured, brotli wins ties when available.
+    - test_page_compressed: HTML pages are gzip / brotli compressed with a weak ETag and Vary: Accept-Encoding.
+    - test_skipped_responses: small bodies, images and clients without Accept-Encoding are left alone.
+    - test_streamed_feed_compressed_by_chunk: a streamed feed is compressed chunk by chunk into one valid gzip stream.
+    - test_conditional_get: the weak ETag of a compressed page revalidates to a 304.
+    - test_compression_metrics: bytes before and after compression are exported per endpoint.
+"""
+
+
+def test_negotiate():
+    assert negotiate('gzip, deflate, br', True) == 'br'
+    assert negotiate('gzip, deflate, br', False) == 'gzip'
+    assert negotiate('br;q=0.5, gzip', True) == 'gzip'
+    assert negotiate('gzip;q=0, identity', True) is None
+    assert negotiate('*', True) == 'br'
+    assert negotiate('deflate', True) is None
+
+
+def test_page_compressed(client, test_posts):
+    identity = client.get('/').data
+    gzipped = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    brotlied = client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == identity
+    assert len(gzipped.data) < len(identity)
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    assert gzipped.headers['ETag'].startswith('W/')
+    assert brotlied.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(brotlied.data) == identity
+
+
+def test_skipped_responses(client, test_posts):
+    small = client.get('/api/posts/999', headers={'Accept-Encoding': 'gzip'})
+    picture = client.get('/static/profile_pics/default.jpg', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/')
+
+    assert 'Content-Encoding' not in small.headers
+    assert 'Content-Encoding' not in picture.headers
+    picture.close()
+    assert 'Content-Encoding' not in plain.headers
+
+
+def test_streamed_feed_compressed_by_chunk(client, test_posts):
+    response = client.get('/feed.atom', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    chunks = list(response.response)
+    response.close()
+    body = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(chunks) > 2
+    # every chunk is flushed: the first one alone already decompresses to the start of the feed
+    assert body.decompress(chunks[0] + chunks[1]).startswith(b'<?xml')
+    assert b'</feed>' in gzip.decompress(b''.join(chunks))
+
+
+def test_conditional_get(client, test_posts):
+    etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_compression_metrics(client, test_posts):
+    # figures are recorded once the body has been sent
+    client.get('/', headers={'Accept-Encoding': 'gzip'}).get_data()
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'flask_blog_compression_input_bytes_total{endpoint="main.index",encoding="gzip"}' in body
+    assert 'flask_blog_compression_ratio_count{endpoint="main.index"} 1' in body
@@ -0,0 +1,70 @@
+from flask_blog import db
+
+"""
+Tests for conditional GET support in flask_blog.conditional.
+
+Tests:
+    - test_index_returns_304_for_matching_etag: repeat request with If-None-Match gets an empty 304.
+    - test_304_skips_rendering: a revalidated page renders no template.
+    - test_etag_changes_after_update: update_post bumps updated_at so the old ETag no longer matches.
+    - test_post_if_modified_since: the post page honours If-Modified-Since.
+    - test_etag_depends_on_viewer: logging in changes the navbar and therefore the ETag.
+"""
+
+
+def login(client):
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+
+
+def test_index_returns_304_for_matching_etag(client, test_posts):
+    first = client.get('/')
+    assert first.status_code == 200 and first.headers['ETag']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    second = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+
+
+def test_304_skips_rendering(app, client, test_posts):
+    from flask import template_rendered
+    etag = client.get(f'/user/{test_posts[0].author.username}').headers['ETag']
+    app.extensions['fragment_cache'].clear()   # miss: validators must come from the query alone
+
+    rendered = []
+    template_rendered.connect(lambda sender, template, context, **extra: rendered.append(template.name), app)
+    response = client.get(f'/user/{test_posts[0].author.username}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert rendered == []
+
+
+def test_etag_changes_after_update(client, test_user):
+    login(client)
+    client.post('/post/new', data={'title': 'Title', 'content': 'Body'})
+    post_id = db.session.execute(db.text('SELECT id FROM post')).scalar()
+    etag = client.get(f'/post/{post_id}').headers['ETag']
+    assert client.get(f'/post/{post_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post(f'/post/{post_id}/update', data={'title': 'New title', 'content': 'Body'})
+    client.get('/')  # consume the flash message
+    response = client.get(f'/post/{post_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'New title' in response.data
+
+
+def test_post_if_modified_since(client, test_posts):
+    response = client.get(f'/post/{test_posts[0].id}')
+    last_modified = response.headers['Last-Modified']
+    assert client.get(f'/post/{test_posts[0].id}',
+                      headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(f'/post/{test_posts[0].id}',
+                      headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
+
+
+def test_etag_depends_on_viewer(client, test_posts):
+    anonymous_etag = client.get('/').headers['ETag']
+    login(client)
+    client.get('/')  # consume the login flash message
+    response = client.get('/', headers={'If-None-Match': anonymous_etag})
+    assert response.status_code == 200
+    assert 'private' in response.headers['Cache-Control']
@@ -1,6 +1,8 @@
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from flask_blog import create_app, db
-from flask_blog.models import User
+from flask_blog.models import User, Post
 from flask_bcrypt import Bcrypt
 from flask_blog.config import TestingConfig
 
@@ -42,6 +44,19 @@ Fixtures:
         - A `User` instance with preconfigured credentials:
           Username: `testuser`, Email: `test@example.com`,
           Password: `'password'` (hashed).
+
+4. test_posts:
+    - Purpose: Inserts posts written by several authors, for listing tests.
+    - Returns:
+        - A list of the created `Post` instances.
+
+5. count_queries:
+    - Purpose: Context manager counting SQL statements sent to the database,
+      used to guard listing routes against N+1 queries.
+    - Usage:
+        with count_queries() as statements:
+            client.get('/')
+        assert len(statements) == 1
 """
 
 # Fixture to set up Flask app in testing mode
@@ -80,3 +95,37 @@ def test_user(app):
     db.session.add(user)
     db.session.commit()
     return user
+
+
+# Fixture to create posts by several authors in the database
+@pytest.fixture
+def test_posts(app, test_user):
+    """Create posts written by three different authors and add to the test database."""
+    authors = [test_user]
+    for name in ('alice', 'bob'):
+        author = User(username=name, email=f'{name}@example.com', password=test_user.password)
+        db.session.add(author)
+        authors.append(author)
+    posts = [Post(title=f'Post {i}', content=f'Content {i}', author=authors[i % len(authors)]) for i in range(6)]
+    db.session.add_all(posts)
+    db.session.commit()
+    return posts
+
+
+# Fixture to count SQL statements executed inside a block
+@pytest.fixture
+def count_queries(app):
+    """Return a context manager yielding the list of SQL statements executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
@@ -0,0 +1,93 @@
+import threading
+import pytest
+from flask_blog import create_app, db
+from flask_blog.config import ProductionConfig
+from flask_blog.models import User, Post, Counter
+
+"""
+Tests for the production SQLite profile (config.ProductionConfig, database.SQLitePragmas).
+
+Tests:
+    - test_pragmas_applied_on_connect: every pooled connection runs in WAL mode with the configured settings.
+    - test_concurrent_writers_and_readers: writer and reader threads run at once without "database is locked".
+"""
+
+WRITERS = 4
+READERS = 4
+POSTS_PER_WRITER = 20
+
+
+@pytest.fixture
+def production_app(tmp_path):
+    """ProductionConfig on a database file (WAL needs a file, not :memory:)."""
+    class FileProductionConfig(ProductionConfig):
+        TESTING = True
+        SECRET_KEY = 'testing-secret'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "site.db"}'
+        MAIL_SPOOL_DIR = str(tmp_path / 'mail_spool')
+        SLOW_QUERY_LOG = str(tmp_path / 'slow_queries.jsonl')
+        JINJA_BYTECODE_CACHE_DIR = str(tmp_path / 'jinja_cache')
+        RATELIMIT_SQLITE_PATH = str(tmp_path / 'rate_limit.db')
+    app = create_app(FileProductionConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(username=f'writer{number}', email=f'writer{number}@example.com', password='x')
+                           for number in range(WRITERS))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_pragmas_applied_on_connect(production_app):
+    with production_app.app_context():
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+            assert pragma('cache_size') == -64 * 1024
+
+
+def test_concurrent_writers_and_readers(production_app):
+    errors = []
+    writers_done = threading.Event()
+    reads = []
+
+    def writer(number):
+        try:
+            with production_app.app_context():
+                user = User.query.filter_by(username=f'writer{number}').one()
+                for index in range(POSTS_PER_WRITER):
+                    db.session.add(Post(title=f'{number}-{index}', content='Body', user_id=user.id))
+                    db.session.commit()
+        except Exception as error:  # collected and asserted in the main thread
+            errors.append(error)
+
+    def reader():
+        try:
+            with production_app.app_context():
+                while not writers_done.is_set():
+                    Post.query.order_by(Post.date_posted.desc(), Post.id.desc()).limit(5).all()
+                    db.session.rollback()  # end the read transaction: next read sees new commits
+                    reads.append(1)
+        except Exception as error:
+            errors.append(error)
+
+    writer_threads = [threading.Thread(target=writer, args=(number,)) for number in range(WRITERS)]
+    reader_threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join(timeout=60)
+    writers_done.set()
+    for thread in reader_threads:
+        thread.join(timeout=60)
+
+    assert errors == []
+    assert reads
+    with production_app.app_context():
+        assert Post.query.count() == WRITERS * POSTS_PER_WRITER
+        # counters are incremented by the concurrent inserts without lost updates
+        assert Counter.get(Counter.POSTS) == WRITERS * POSTS_PER_WRITER
+        assert {user.post_count for user in User.query.all()} == {POSTS_PER_WRITER}
@@ -0,0 +1,65 @@
+import xml.etree.ElementTree as ET
+
+"""
+Tests for the Atom feeds in flask_blog.feeds (/feed.atom, /user/<username>/feed.atom).
+
+Tests:
+    - test_site_feed: the site feed is valid Atom listing the newest posts first.
+    - test_feed_is_cached_and_conditional: repeat polls are served from cache and end in 304.
+    - test_feed_follows_post_writes: a new post invalidates the cached feeds.
+    - test_user_feed: the per-author feed only lists that author's posts.
+"""
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def get(client, url, **kwargs):
+    """GET a feed and read the streamed body, which also ends the streamed request context."""
+    response = client.get(url, **kwargs)
+    response.get_data()
+    response.close()
+    return response
+
+
+def entry_titles(response):
+    root = ET.fromstring(response.data)
+    return [entry.find(f'{ATOM}title').text for entry in root.findall(f'{ATOM}entry')]
+
+
+def test_site_feed(client, test_posts):
+    response = get(client, '/feed.atom')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/atom+xml'
+    # streamed: sent without knowing the length up front
+    assert 'Content-Length' not in response.headers
+    assert entry_titles(response) == [f'Post {number}' for number in range(5, -1, -1)]
+    assert b'<name>bob</name>' in response.data
+
+
+def test_feed_is_cached_and_conditional(client, test_posts, count_queries):
+    first = get(client, '/feed.atom')
+    etag = first.headers['ETag']
+    with count_queries() as statements:
+        cached = get(client, '/feed.atom')
+        not_modified = get(client, '/feed.atom', headers={'If-None-Match': etag})
+    assert statements == []
+    assert cached.data == first.data
+    assert cached.headers['Content-Length'] == str(len(first.data))
+    assert not_modified.status_code == 304 and not_modified.data == b''
+
+
+def test_feed_follows_post_writes(client, test_posts):
+    etag = get(client, '/feed.atom').headers['ETag']
+    get(client, '/user/testuser/feed.atom')
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+    client.post('/post/new', data={'title': 'Fresh <post>', 'content': 'Body & more'})
+    client.get('/logout')
+    response = get(client, '/feed.atom', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert entry_titles(response)[0] == 'Fresh <post>'
+    assert entry_titles(get(client, '/user/testuser/feed.atom'))[0] == 'Fresh <post>'
+
+
+def test_user_feed(client, test_posts):
+    assert entry_titles(get(client, '/user/alice/feed.atom')) == ['Post 4', 'Post 1']
+    assert get(client, '/user/nobody/feed.atom').status_code == 404
@@ -0,0 +1,33 @@
+from flask_blog.importtime import (DEFERRED_MODULES, STARTUP_BUDGET_SECONDS, profile_imports, loaded_modules,
+                                   startup_time)
+
+"""
+Tests for import-time profiling and the cold start budget (importtime).
+
+Tests:
+    - test_profile_imports: `python -X importtime` output is parsed into per-module timings.
+    - test_heavy_modules_deferred: create_app loads none of the optional heavy dependencies.
+    - test_startup_budget: importing the package and creating the app stays within STARTUP_BUDGET_SECONDS.
+      Wall clock time depends on the machine: the default budget is generous, the STARTUP_BUDGET_SECONDS
+      environment variable tightens it, e.g. STARTUP_BUDGET_SECONDS=1 python -m pytest.
+"""
+
+
+def test_profile_imports():
+    timings = {timing.name: timing for timing in profile_imports('import flask_blog.config\n')}
+
+    # the parent package is imported first, nested under the submodule
+    assert timings['flask_blog.config'].depth == 0
+    assert timings['flask_blog'].depth == 1
+    assert timings['flask_blog.config'].cumulative_us >= timings['flask_blog'].cumulative_us > 0
+
+
+def test_heavy_modules_deferred():
+    loaded = loaded_modules()
+
+    assert 'flask_blog.users.routes' in loaded
+    assert not loaded & set(DEFERRED_MODULES)
+
+
+def test_startup_budget():
+    assert startup_time() <= STARTUP_BUDGET_SECONDS
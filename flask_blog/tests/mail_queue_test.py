@@ -0,0 +1,189 @@
+import json
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+import pytest
+from flask_mail import Message
+from flask_blog import create_app, db, mail_dispatcher
+from flask_blog.config import TestingConfig
+
+"""
+Tests for the asynchronous mail queue in flask_blog.mail_queue, against a local SMTP stand-in.
+
+Tests:
+    - test_messages_share_one_connection: several queued messages go out over a single SMTP session.
+    - test_failed_send_is_retried: a temporary SMTP error is retried after the backoff.
+    - test_spool_survives_restart: messages spooled by a stopped process are sent by the next one.
+    - test_recover_skips_live_claims: unclaimed and dead processes' files are sent, live claims are left alone.
+    - test_unsendable_message_moved_to_failed: a corrupt spool file is set aside, the next message still goes out.
+    - test_cli_app_does_not_recover: creating an app outside a request sends nothing.
+    - test_reset_request_enqueues_mail: the password reset route returns before the mail is sent.
+"""
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib: records each message and counts sessions."""
+    def handle(self):
+        server = self.server
+        server.sessions += 1
+        self.wfile.write(b'220 localhost stub\r\n')
+        lines, in_data = [], False
+        for line in self.rfile:
+            if in_data:
+                if line == b'.\r\n':
+                    server.messages.append(b''.join(lines))
+                    lines, in_data = [], False
+                    self.wfile.write(b'250 queued\r\n')
+                else:
+                    lines.append(line)
+                continue
+            command = line[:4].upper()
+            if command == b'MAIL' and server.fail_next:
+                server.fail_next -= 1
+                self.wfile.write(b'451 try again later\r\n')
+            elif command == b'DATA':
+                in_data = True
+                self.wfile.write(b'354 go ahead\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 ok\r\n')
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStubHandler)
+    server.daemon_threads = True
+    server.messages, server.sessions, server.fail_next = [], 0, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_app(smtp_server, spool_dir):
+    class MailConfig(TestingConfig):
+        MAIL_SERVER = '127.0.0.1'
+        MAIL_PORT = smtp_server.server_address[1]
+        MAIL_USE_TLS = False
+        MAIL_SUPPRESS_SEND = False
+        MAIL_SPOOL_DIR = str(spool_dir)
+        MAIL_RETRY_BACKOFF = 0.05
+    return create_app(MailConfig)
+
+
+def spool_record(message_id, subject):
+    return {'id': message_id, 'enqueued_at': 0, 'attempts': 0, 'subject': subject,
+            'sender': 'noreply@demo.com', 'recipients': ['user@example.com'], 'body': 'Body', 'html': None}
+
+
+def write_spool_file(spool_dir, name, subject):
+    with open(os.path.join(spool_dir, name), 'w') as file:
+        json.dump(spool_record(name.split('.')[0], subject), file)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def message(number):
+    return Message(f'Subject {number}', sender='noreply@demo.com', recipients=['user@example.com'],
+                   body=f'Body {number}')
+
+
+def test_messages_share_one_connection(smtp_server, tmp_path):
+    app = make_app(smtp_server, tmp_path)
+    with app.app_context():
+        for number in range(3):
+            mail_dispatcher.enqueue(message(number))
+        assert mail_dispatcher.queue.join(timeout=5)
+        stats = mail_dispatcher.queue.stats()
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.sessions == 1
+    assert stats['sent'] == 3 and stats['queued'] == 0
+    assert stats['latency_count'] == 3 and stats['latency_max'] >= 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.json')]
+
+
+def test_failed_send_is_retried(smtp_server, tmp_path):
+    smtp_server.fail_next = 1
+    app = make_app(smtp_server, tmp_path)
+    with app.app_context():
+        mail_dispatcher.enqueue(message(1))
+        assert mail_dispatcher.queue.join(timeout=5)
+        stats = mail_dispatcher.queue.stats()
+    assert len(smtp_server.messages) == 1
+    assert (stats['retries'], stats['sent'], stats['failed']) == (1, 1, 0)
+
+
+def test_spool_survives_restart(smtp_server, tmp_path):
+    app = make_app(smtp_server, tmp_path)
+    with app.app_context():
+        # simulate a crash between spooling and sending: write the spool file only
+        mail_dispatcher.queue._write(spool_record('pending', 'Spooled'))
+
+    restarted = make_app(smtp_server, tmp_path)
+    restarted.test_client().get('/about')
+    with restarted.app_context():
+        assert mail_dispatcher.queue.join(timeout=5)
+    assert len(smtp_server.messages) == 1
+    assert b'Subject: Spooled' in smtp_server.messages[0]
+
+
+def test_recover_skips_live_claims(smtp_server, tmp_path):
+    app = make_app(smtp_server, tmp_path)
+    write_spool_file(tmp_path, 'unclaimed.json', 'Unclaimed')
+    write_spool_file(tmp_path, f'dead.sending.{dead_pid()}', 'Dead')
+    # the parent process is alive: its claim is being sent by someone else
+    write_spool_file(tmp_path, f'live.sending.{os.getppid()}', 'Live')
+    client = app.test_client()
+    client.get('/about')
+    client.get('/about')
+    with app.app_context():
+        assert mail_dispatcher.queue.join(timeout=5)
+        assert mail_dispatcher.queue.stats()['sent'] == 2
+    subjects = sorted(line for raw in smtp_server.messages for line in raw.decode().splitlines()
+                      if line.startswith('Subject:'))
+    assert subjects == ['Subject: Dead', 'Subject: Unclaimed']
+    assert sorted(os.listdir(tmp_path)) == ['failed', f'live.sending.{os.getppid()}']
+
+
+def test_unsendable_message_moved_to_failed(smtp_server, tmp_path):
+    app = make_app(smtp_server, tmp_path)
+    with open(tmp_path / '1-corrupt.json', 'w') as file:
+        file.write('{"id": "1-corrupt", ')
+    write_spool_file(tmp_path, '2-valid.json', 'Valid')
+    app.test_client().get('/about')
+    with app.app_context():
+        assert mail_dispatcher.queue.join(timeout=5)
+        stats = mail_dispatcher.queue.stats()
+    assert (stats['sent'], stats['failed']) == (1, 1)
+    assert b'Subject: Valid' in smtp_server.messages[0]
+    assert os.listdir(tmp_path / 'failed') == ['1-corrupt.json']
+
+
+def test_cli_app_does_not_recover(smtp_server, tmp_path):
+    write_spool_file(tmp_path, 'unclaimed.json', 'Unclaimed')
+    app = make_app(smtp_server, tmp_path)
+    with app.app_context():
+        assert mail_dispatcher.queue.stats()['queued'] == 0
+    assert sorted(os.listdir(tmp_path)) == ['failed', 'unclaimed.json']
+
+
+def test_reset_request_enqueues_mail(smtp_server, tmp_path):
+    from flask_blog.models import User
+    app = make_app(smtp_server, tmp_path)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='testuser', email='test@example.com', password='x'))
+        db.session.commit()
+        response = app.test_client().post('/reset_password', data={'email': 'test@example.com'})
+        assert response.status_code == 302
+        assert mail_dispatcher.queue.join(timeout=5)
+        db.drop_all()
+    assert b'/reset_password/' in smtp_server.messages[0]
@@ -1,3 +1,4 @@
+from flask_blog import db
 
 
 # -------------------
@@ -29,4 +30,28 @@ def test_about(client):
     """
     response = client.get('/about')
     assert response.status_code == 200
-    assert b'About Page' in response.data
\ No newline at end of file
+    assert b'About Page' in response.data
+
+
+# -------------------
+# Home Page Query Count Test
+# -------------------
+def test_index_loads_authors_in_one_query(client, test_posts, count_queries):
+    """
+        Renders the home page with posts from three authors.
+        Confirms posts and their authors are loaded by a single SQL statement (no N+1),
+        plus a primary key read of the post counter instead of a COUNT(*).
+
+        Args:
+            client: pytest fixture that provides a simulated browser (HTTP client) for testing your Flask app.
+            test_posts: pytest fixture that provides posts written by several authors.
+            count_queries: pytest fixture that counts SQL statements executed.
+    """
+    db.session.expunge_all()  # start from an empty identity map, like a fresh request
+    with count_queries() as statements:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert b'Alice' in response.data and b'Bob' in response.data
+    assert b'6 posts' in response.data
+    assert len(statements) == 2
+    assert not any('count(' in statement.lower() for statement in statements)
@@ -0,0 +1,117 @@
+import re
+import pytest
+from sqlalchemy.exc import OperationalError
+from flask_blog import create_app, db
+from flask_blog.config import TestingConfig
+from flask_blog.metrics import Histogram
+
+"""
+Tests for the request instrumentation and the /metrics endpoint (metrics.RequestMetrics).
+
+Tests:
+    - test_histogram_render: observations land in cumulative buckets with _sum and _count.
+    - test_request_recorded: a page view records its duration, SQL statements and render time under its endpoint.
+    - test_streamed_page_recorded: a streamed page's render time and queries are recorded once its body is sent.
+    - test_metrics_not_recorded: scrapes of /metrics are not counted as requests.
+    - test_extension_stats_exported: fragment cache and mail queue counters are exported.
+    - test_metrics_access: only allowed addresses or the bearer token can scrape /metrics.
+    - test_failed_query_timer_discarded: a failing statement does not leave its start time on the connection.
+    - test_metrics_disabled: METRICS_ENABLED = False removes the hooks and the endpoint.
+"""
+
+
+def sample(body, name, **labels):
+    """Return the value of one sample line of a Prometheus text body."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = '^' + re.escape(f'{name}{{{label_text}}}' if labels else name) + r' (\S+)$'
+    match = re.search(pattern, body, re.MULTILINE)
+    assert match, f'{name} {labels} not found'
+    return float(match.group(1))
+
+
+def test_histogram_render():
+    histogram = Histogram('latency_seconds', 'Latency.', (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe('main.index', value)
+    body = '\n'.join(histogram.render())
+
+    assert '# TYPE latency_seconds histogram' in body
+    assert sample(body, 'latency_seconds_bucket', endpoint='main.index', le='0.1') == 1
+    assert sample(body, 'latency_seconds_bucket', endpoint='main.index', le='1.0') == 3
+    assert sample(body, 'latency_seconds_bucket', endpoint='main.index', le='+Inf') == 4
+    assert sample(body, 'latency_seconds_sum', endpoint='main.index') == 4.05
+    assert sample(body, 'latency_seconds_count', endpoint='main.index') == 4
+
+
+def test_request_recorded(client, test_posts):
+    client.get('/')
+    client.get('/')
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert sample(body, 'flask_blog_responses_total', endpoint='main.index', status='200') == 2
+    assert sample(body, 'flask_blog_request_duration_seconds_count', endpoint='main.index') == 2
+    assert sample(body, 'flask_blog_request_sql_queries_sum', endpoint='main.index') > 0
+    assert sample(body, 'flask_blog_request_sql_duration_seconds_sum', endpoint='main.index') > 0
+    assert sample(body, 'flask_blog_request_render_duration_seconds_sum', endpoint='main.index') > 0
+
+
+def test_streamed_page_recorded(app, client, test_posts):
+    response = client.get(f'/post/{test_posts[0].id}')
+    response.get_data()
+    assert ('posts.post', 200) not in app.extensions['request_metrics'].responses
+    response.close()
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert sample(body, 'flask_blog_responses_total', endpoint='posts.post', status='200') == 1
+    assert sample(body, 'flask_blog_request_render_duration_seconds_sum', endpoint='posts.post') > 0
+    assert sample(body, 'flask_blog_request_sql_queries_sum', endpoint='posts.post') > 0
+
+
+def test_metrics_not_recorded(client):
+    client.get('/metrics')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'endpoint="metrics"' not in body
+
+
+def test_extension_stats_exported(client, test_posts):
+    client.get('/')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert sample(body, 'flask_blog_fragment_cache_misses_total') > 0
+    assert sample(body, 'flask_blog_mail_queue_queued') == 0
+    assert '# TYPE flask_blog_password_hash_rejected_total counter' in body
+
+
+def test_metrics_access():
+    class TokenConfig(TestingConfig):
+        METRICS_TOKEN = 'scrape-secret'
+    client = create_app(TokenConfig).test_client()
+    remote = {'REMOTE_ADDR': '203.0.113.7'}
+
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base=remote).status_code == 404
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer wrong'}).status_code == 404
+    assert client.get('/metrics', environ_base=remote,
+                      headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+
+def test_failed_query_timer_discarded(app):
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql('SELECT * FROM no_such_table')
+            conn.rollback()
+        assert conn.info['query_started'] == []
+
+
+def test_metrics_disabled():
+    class DisabledConfig(TestingConfig):
+        METRICS_ENABLED = False
+    app = create_app(DisabledConfig)
+
+    assert 'request_metrics' not in app.extensions
+    assert app.test_client().get('/metrics').status_code == 404
@@ -0,0 +1,148 @@
+import sqlite3
+import pytest
+from flask_blog import create_app, db
+from flask_blog.config import TestingConfig
+from flask_blog.migrations.migrate import MIGRATIONS, add_column, upgrade
+
+"""
+Tests for the versioned schema migrations in flask_blog.migrations.
+
+Tests:
+    - test_upgrade_adds_indexes_without_data_loss:
+        Builds a database with the original (pre-index) schema and a row in each table,
+        runs `flask db upgrade` and checks the indexes exist and the rows are kept.
+
+    - test_upgrade_is_idempotent:
+        Running upgrade twice applies nothing the second time.
+
+    - test_updated_at_backfilled_when_column_exists:
+        Migration 3 backfills placeholder updated_at values even if the column was already there.
+
+    - test_failed_migration_rolled_back:
+        A migration failing after an ALTER TABLE leaves neither the column nor its version row.
+
+    - test_listing_queries_use_indexes:
+        EXPLAIN QUERY PLAN of the listing and email lookups shows index usage.
+"""
+
+LEGACY_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL, username VARCHAR(20) NOT NULL, email VARCHAR(120) NOT NULL,
+    image_file VARCHAR(20) NOT NULL, password VARCHAR(60) NOT NULL,
+    PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+);
+CREATE TABLE post (
+    id INTEGER NOT NULL, title VARCHAR(100) NOT NULL, date_posted DATETIME NOT NULL,
+    content TEXT NOT NULL, user_id INTEGER NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id)
+);
+INSERT INTO user VALUES (1, 'legacy', 'Legacy@Example.com', 'default.jpg', 'hash');
+INSERT INTO post VALUES (1, 'Old post', '2023-01-01 10:00:00.000000', 'kept', 1);
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Create a SQLite file using the schema from before migrations existed."""
+    path = tmp_path / 'site.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def legacy_app(legacy_db):
+    """App bound to the legacy database file."""
+    class LegacyConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{legacy_db}'
+    return create_app(LegacyConfig)
+
+
+def index_names(path):
+    conn = sqlite3.connect(path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+
+def test_upgrade_adds_indexes_without_data_loss(legacy_app, legacy_db):
+    result = legacy_app.test_cli_runner().invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0, result.output
+    assert 'Applied migration 2' in result.output
+
+    assert {'ix_post_date_posted', 'ix_post_user_id_date_posted', 'ix_user_email_lower'} <= index_names(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    assert conn.execute('SELECT title, content FROM post').fetchall() == [('Old post', 'kept')]
+    # migration 3 backfills the modification marker from the creation date
+    assert conn.execute('SELECT updated_at FROM post').fetchone() == ('2023-01-01 10:00:00.000000',)
+    # migration 4 indexes existing posts for search, migration 5 backfills excerpts
+    assert conn.execute("SELECT rowid FROM post_fts WHERE post_fts MATCH 'kept'").fetchall() == [(1,)]
+    assert conn.execute('SELECT excerpt FROM post').fetchone() == ('kept',)
+    # migration 6 computes the counters of existing posts
+    assert conn.execute('SELECT post_count FROM user').fetchone() == (1,)
+    assert conn.execute("SELECT value FROM counter WHERE name = 'posts'").fetchone() == (1,)
+    conn.close()
+
+
+def test_upgrade_is_idempotent(legacy_app):
+    runner = legacy_app.test_cli_runner()
+    runner.invoke(args=['db', 'upgrade'])
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert 'up to date' in result.output
+    assert '[pending]' not in runner.invoke(args=['db', 'status']).output
+
+
+def test_updated_at_backfilled_when_column_exists(legacy_app, legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("ALTER TABLE post ADD COLUMN updated_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00.000000'")
+    conn.execute("INSERT INTO post VALUES (2, 'Edited', '2023-02-01 10:00:00.000000', 'edited', 1, "
+                 "'2023-03-01 10:00:00.000000')")
+    conn.commit()
+    conn.close()
+
+    result = legacy_app.test_cli_runner().invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0, result.output
+    conn = sqlite3.connect(legacy_db)
+    assert conn.execute('SELECT id, updated_at FROM post ORDER BY id').fetchall() == [
+        (1, '2023-01-01 10:00:00.000000'), (2, '2023-03-01 10:00:00.000000')]
+    conn.close()
+
+
+def test_failed_migration_rolled_back(legacy_app, legacy_db, monkeypatch):
+    def broken(conn):
+        add_column(conn, 'post', 'half_done', 'INTEGER')
+        raise RuntimeError('migration failed')
+    broken.version, broken.description = 100, 'fails after its DDL'
+
+    with legacy_app.app_context():
+        upgrade(db.engine)
+        monkeypatch.setitem(MIGRATIONS, 100, broken)
+        with pytest.raises(RuntimeError):
+            upgrade(db.engine)
+        db.engine.dispose()
+
+    conn = sqlite3.connect(legacy_db)
+    assert 'half_done' not in {row[1] for row in conn.execute('PRAGMA table_info(post)')}
+    assert conn.execute('SELECT count(*) FROM schema_version WHERE version = 100').fetchone() == (0,)
+    conn.close()
+
+
+def test_listing_queries_use_indexes(legacy_app, legacy_db):
+    legacy_app.test_cli_runner().invoke(args=['db', 'upgrade'])
+    with legacy_app.app_context():
+        from flask_blog.models import User
+        assert User.find_by_email('legacy@example.COM').username == 'legacy'
+        db.session.remove()
+        db.engine.dispose()
+
+    conn = sqlite3.connect(legacy_db)
+    plans = {
+        'ix_post_date_posted': 'SELECT * FROM post ORDER BY date_posted DESC, id DESC LIMIT 6',
+        'ix_post_user_id_date_posted': 'SELECT * FROM post WHERE user_id = 1 ORDER BY date_posted DESC, id DESC LIMIT 6',
+        'ix_user_email_lower': "SELECT * FROM user WHERE lower(email) = 'legacy@example.com'",
+    }
+    for index, query in plans.items():
+        plan = ' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + query))
+        assert index in plan
+    conn.close()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from flask_blog import db
+from flask_blog.models import Post
+from flask_blog.pagination import paginate_keyset, encode_cursor, decode_cursor, NEXT
+
+"""
+Unit tests for keyset pagination in flask_blog.pagination.
+
+Tests:
+    - test_cursor_round_trip: tokens decode back to the key they were built from.
+    - test_paginate_forward_and_back: walking Older then Newer visits every post once, in order.
+    - test_invalid_cursor_returns_400: tampered tokens are rejected by the listing routes.
+"""
+
+
+def create_posts(user, count, same_date=False):
+    """Insert `count` posts for `user`, newest last; optionally all with the same date."""
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        date_posted = start if same_date else start + timedelta(minutes=i)
+        db.session.add(Post(title=f'Post {i}', content='content', date_posted=date_posted, author=user))
+    db.session.commit()
+
+
+def test_cursor_round_trip():
+    date_posted = datetime(2024, 5, 17, 10, 30, 1, 123456)
+    token = encode_cursor(NEXT, date_posted, 42)
+    assert decode_cursor(token) == (NEXT, date_posted, 42)
+
+
+def test_paginate_forward_and_back(app, test_user):
+    """
+        Pages through 12 posts sharing one date (so ordering relies on the id tie-breaker),
+        forward to the end and back to the first page.
+    """
+    create_posts(test_user, 12, same_date=True)
+    expected = [f'Post {i}' for i in reversed(range(12))]
+
+    seen, pages, cursor = [], [], None
+    while True:
+        page = paginate_keyset(Post.query, cursor=cursor, per_page=5)
+        pages.append(page)
+        seen += [post.title for post in page.items]
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+    assert [len(page.items) for page in pages] == [5, 5, 2]
+    assert not pages[0].has_prev
+
+    back = paginate_keyset(Post.query, cursor=pages[2].prev_cursor, per_page=5)
+    assert [post.title for post in back.items] == expected[5:10]
+    first = paginate_keyset(Post.query, cursor=back.prev_cursor, per_page=5)
+    assert [post.title for post in first.items] == expected[:5]
+    assert not first.has_prev
+
+
+def test_invalid_cursor_returns_400(client, test_user):
+    assert client.get('/?cursor=not-a-cursor').status_code == 400
+    assert client.get(f'/user/{test_user.username}?cursor=e30').status_code == 400
@@ -0,0 +1,34 @@
+from flask_blog import db
+from flask_blog.models import User, Counter
+
+"""
+Tests for the denormalized post counters (User.post_count and Counter.POSTS).
+
+Tests:
+    - test_counters_follow_post_routes: creating and deleting posts updates both counters.
+    - test_repair_counters_command: `flask posts repair-counters` fixes counters changed behind the ORM.
+"""
+
+
+def test_counters_follow_post_routes(client, test_user):
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+    for number in range(2):
+        client.post('/post/new', data={'title': f'Post {number}', 'content': 'Body'})
+    db.session.expire_all()
+    assert (db.session.get(User, test_user.id).post_count, Counter.get(Counter.POSTS)) == (2, 2)
+
+    post_id = db.session.get(User, test_user.id).post[0].id
+    client.post(f'/post/{post_id}/delete')
+    db.session.expire_all()
+    assert (db.session.get(User, test_user.id).post_count, Counter.get(Counter.POSTS)) == (1, 1)
+
+
+def test_repair_counters_command(app, test_posts):
+    # a bulk delete bypasses the ORM events
+    db.session.execute(db.text('DELETE FROM post WHERE id = :id'), {'id': test_posts[0].id})
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['posts', 'repair-counters'])
+    assert '5 posts, fixed post_count of 1 users' in result.output
+    db.session.expire_all()
+    assert Counter.get(Counter.POSTS) == 5
+    assert User.query.filter_by(username='testuser').one().post_count == 1
@@ -0,0 +1,51 @@
+from flask_blog import db
+
+
+# -------------------
+# Post Page Test
+# -------------------
+def test_post(client, test_posts):
+    """
+        Visits a single post page.
+        Confirms the post title and author are rendered.
+
+        Args:
+            client: pytest fixture that provides a simulated browser (HTTP client) for testing your Flask app.
+            test_posts: pytest fixture that provides posts written by several authors.
+    """
+    response = client.get(f'/post/{test_posts[1].id}')
+    assert response.status_code == 200
+    assert b'Post 1' in response.data
+    assert b'Alice' in response.data
+
+
+def test_post_not_found(client):
+    """
+        Visits a post that does not exist.
+        Confirms a 404 response.
+
+        Args:
+            client: pytest fixture that provides a simulated browser (HTTP client) for testing your Flask app.
+    """
+    assert client.get('/post/999').status_code == 404
+
+
+# -------------------
+# Post Page Query Count Test
+# -------------------
+def test_post_loads_author_in_one_query(client, test_posts, count_queries):
+    """
+        Renders a single post page.
+        Confirms the post and its author are loaded by a single SQL statement.
+
+        Args:
+            client: pytest fixture that provides a simulated browser (HTTP client) for testing your Flask app.
+            test_posts: pytest fixture that provides posts written by several authors.
+            count_queries: pytest fixture that counts SQL statements executed.
+    """
+    post_id = test_posts[2].id
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get(f'/post/{post_id}')
+    assert response.status_code == 200
+    assert len(statements) == 1
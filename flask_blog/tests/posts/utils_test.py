@@ -0,0 +1,52 @@
+from flask_blog import db
+from flask_blog.models import Post
+from flask_blog.posts.utils import EXCERPT_LENGTH, ELLIPSIS, make_excerpt
+
+"""
+Tests for post excerpts in flask_blog.posts.utils.
+
+Tests:
+    - test_make_excerpt: short content is kept, long content is cut at a word boundary.
+    - test_excerpt_follows_content: assigning Post.content refreshes the stored excerpt.
+    - test_backfill_command: `flask posts backfill-excerpts` fills excerpts left empty.
+    - test_listing_does_not_read_content: listing queries defer Post.content and link to the full post.
+"""
+
+
+def test_make_excerpt():
+    assert make_excerpt('Short\n\npost  text') == 'Short post text'
+    excerpt = make_excerpt('word ' * 100)
+    assert excerpt.endswith(ELLIPSIS) and len(excerpt) <= EXCERPT_LENGTH + 1
+    assert excerpt[:-1].split(' ')[-1] == 'word'
+    # a single long word is cut inside the word
+    assert make_excerpt('x' * 500) == 'x' * EXCERPT_LENGTH + ELLIPSIS
+
+
+def test_excerpt_follows_content(app, test_user):
+    post = Post(title='Long', content='first ' * 100, author=test_user)
+    db.session.add(post)
+    db.session.commit()
+    assert post.is_excerpt_truncated
+    post.content = 'second'
+    db.session.commit()
+    assert (post.excerpt, post.is_excerpt_truncated) == ('second', False)
+
+
+def test_backfill_command(app, test_posts):
+    db.session.execute(db.text("UPDATE post SET excerpt = ''"))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['posts', 'backfill-excerpts'])
+    assert 'Updated excerpts of 6 posts' in result.output
+    db.session.expire_all()
+    assert db.session.get(Post, test_posts[0].id).excerpt == 'Content 0'
+
+
+def test_listing_does_not_read_content(client, test_user, count_queries):
+    post = Post(title='Long', content='body ' * 100, author=test_user)
+    db.session.add(post)
+    db.session.commit()
+    db.session.expire_all()
+    with count_queries() as statements:
+        response = client.get('/')
+    assert not any('post.content' in statement for statement in statements)
+    assert f'/post/{post.id}">Read more</a>'.encode() in response.data
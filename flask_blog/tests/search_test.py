@@ -0,0 +1,77 @@
+from flask_blog import db
+from flask_blog.models import Post
+from flask_blog.search import match_expression, search_posts
+
+"""
+Tests for full-text search in flask_blog.search and the /search route.
+
+Tests:
+    - test_match_expression_quotes_terms: user text never reaches FTS5 as query syntax.
+    - test_rebuild_and_rank: `flask search rebuild` indexes existing posts; title matches rank first.
+    - test_search_is_paginated: results are paged by cursor without repeats.
+    - test_index_follows_post_writes: creating, updating and deleting posts updates the index.
+    - test_search_route_escapes_snippet: snippets are escaped, only the match highlight is HTML.
+"""
+
+
+def login(client):
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+
+
+def rebuild(app):
+    result = app.test_cli_runner().invoke(args=['search', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def result_ids(page):
+    return [post.id for post, _ in page.items]
+
+
+def test_match_expression_quotes_terms():
+    assert match_expression('flask AND "sql*') == '"flask" "AND" "sql"'
+    assert match_expression('  -- ') is None
+
+
+def test_rebuild_and_rank(app, test_user):
+    in_content = Post(title='Weekly notes', content='Notes about sqlite and more', author=test_user)
+    in_title = Post(title='Sqlite tips', content='Some tips', author=test_user)
+    db.session.add_all([in_content, in_title])
+    db.session.commit()
+    assert search_posts('sqlite').items == []
+    assert 'Indexed 2 posts' in rebuild(app)
+    assert result_ids(search_posts('sqlite')) == [in_title.id, in_content.id]
+    # porter stemming: 'tip' matches 'tips'
+    assert result_ids(search_posts('tip')) == [in_title.id]
+
+
+def test_search_is_paginated(app, test_posts):
+    rebuild(app)
+    first = search_posts('content', per_page=4)
+    assert len(first.items) == 4 and first.has_next
+    second = search_posts('content', cursor=first.next_cursor, per_page=4)
+    assert len(second.items) == 2 and not second.has_next
+    assert sorted(result_ids(first) + result_ids(second)) == sorted(post.id for post in test_posts)
+
+
+def test_index_follows_post_writes(client, test_user):
+    login(client)
+    client.post('/post/new', data={'title': 'Caching', 'content': 'Fragment caching explained'})
+    post = Post.query.filter_by(title='Caching').one()
+    assert result_ids(search_posts('fragment')) == [post.id]
+
+    client.post(f'/post/{post.id}/update', data={'title': 'Caching', 'content': 'ETags explained'})
+    assert search_posts('fragment').items == []
+    assert result_ids(search_posts('etags')) == [post.id]
+
+    client.post(f'/post/{post.id}/delete')
+    assert search_posts('etags').items == []
+
+
+def test_search_route_escapes_snippet(client, test_user):
+    login(client)
+    client.post('/post/new', data={'title': 'Markup', 'content': '<script>alert(1)</script> needle here'})
+    response = client.get('/search?q=needle')
+    assert b'<mark>needle</mark>' in response.data
+    assert b'<script>alert' not in response.data
+    assert b'No posts match' in client.get('/search?q=haystack').data
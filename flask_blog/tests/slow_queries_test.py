@@ -0,0 +1,101 @@
+import json
+import pytest
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from flask_blog import create_app, db
+from flask_blog.config import TestingConfig
+from flask_blog.slow_queries import statement_shape, redact_parameters, read_log
+
+"""
+Tests for the slow-query log (slow_queries.SlowQueryLog, `flask queries report`).
+
+Tests:
+    - test_statement_shape: whitespace and IN lists are normalized.
+    - test_redact_parameters: text and dates are replaced by their type, numbers are kept.
+    - test_slow_query_logged: statements over the threshold are logged with endpoint and a plan, captured once per shape.
+    - test_failed_query_timer_discarded: a failing statement does not leave its start time on the connection.
+    - test_report_ranks_by_total_time: the report lists the shape with the highest total time first.
+    - test_disabled: a None threshold installs no listeners and writes no log.
+"""
+
+
+@pytest.fixture
+def log_everything_app(tmp_path):
+    """App with a zero threshold, so every statement counts as slow."""
+    class SlowQueryConfig(TestingConfig):
+        SLOW_QUERY_THRESHOLD_MS = 0
+        SLOW_QUERY_LOG = str(tmp_path / 'slow_queries.jsonl')
+    app = create_app(SlowQueryConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def records(app):
+    with open(app.config['SLOW_QUERY_LOG'], encoding='utf-8') as log_file:
+        return [json.loads(line) for line in log_file]
+
+
+def test_statement_shape():
+    statement = 'SELECT post.id\n  FROM post\n WHERE post.id IN (?, ?,?)  AND post.user_id = ?'
+
+    assert statement_shape(statement) == 'SELECT post.id FROM post WHERE post.id IN (?, ...) AND post.user_id = ?'
+    assert statement_shape('SELECT 1 WHERE x IN (?, ?)') == statement_shape('SELECT 1 WHERE x IN (?, ?, ?, ?)')
+
+
+def test_redact_parameters():
+    redacted = redact_parameters(('test@example.com', 5, None, datetime(2024, 1, 1)))
+
+    assert redacted == ['<str len=16>', 5, None, '<datetime>']
+    assert redact_parameters({'email': 'secret'}) == {'email': '<str len=6>'}
+
+
+def test_slow_query_logged(log_everything_app):
+    open(log_everything_app.config['SLOW_QUERY_LOG'], 'w').close()
+    client = log_everything_app.test_client()
+    client.get('/user/nobody')
+    client.get('/user/nobody')
+    logged = [record for record in records(log_everything_app) if 'FROM user' in record['shape']]
+
+    assert len(logged) == 2
+    assert logged[0]['endpoint'] == 'users.user_posts'
+    assert '<str len=6>' in logged[0]['parameters']
+    assert any('user' in line for line in logged[0]['plan'])
+    assert 'plan' not in logged[1]
+
+
+def test_failed_query_timer_discarded(log_everything_app):
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql('SELECT * FROM no_such_table')
+            conn.rollback()
+        assert conn.info['slow_query_started'] == []
+
+
+def test_report_ranks_by_total_time(log_everything_app):
+    path = log_everything_app.config['SLOW_QUERY_LOG']
+    with open(path, 'w', encoding='utf-8') as log_file:
+        for shape, duration in (('SELECT a', 5), ('SELECT b', 30), ('SELECT a', 5), ('SELECT c', 1)):
+            log_file.write(json.dumps({'shape': shape, 'duration_ms': duration, 'endpoint': 'main.index'}) + '\n')
+
+    assert [entry['shape'] for entry in read_log(path)] == ['SELECT b', 'SELECT a', 'SELECT c']
+    result = log_everything_app.test_cli_runner().invoke(args=['queries', 'report', '--limit', '2'])
+    assert result.exit_code == 0
+    assert result.output.index('SELECT b') < result.output.index('SELECT a')
+    assert 'SELECT c' not in result.output
+    assert '3 statement shapes' in result.output
+
+
+def test_disabled(tmp_path):
+    class DisabledConfig(TestingConfig):
+        SLOW_QUERY_THRESHOLD_MS = None
+        SLOW_QUERY_LOG = str(tmp_path / 'slow_queries.jsonl')
+    app = create_app(DisabledConfig)
+    with app.app_context():
+        db.create_all()
+
+    assert 'slow_query_log' not in app.extensions
+    assert not (tmp_path / 'slow_queries.jsonl').exists()
@@ -0,0 +1,81 @@
+from flask import got_request_exception
+from flask_blog import fragment_cache
+from flask_blog.streaming import FLUSH_MARKER, flush_chunks
+
+"""
+Tests for streamed page rendering (streaming.stream_page) on the post and author pages.
+
+Tests:
+    - test_flush_chunks: the marker ends the first chunk, later pieces are grouped by size.
+    - test_head_sent_first: the first chunk holds the head and navbar, the article comes after it.
+    - test_fragment_rendered_while_streaming: on a cache miss the article is rendered and cached as the body is sent.
+    - test_same_html_as_buffered: streamed and TEMPLATE_STREAMING = False pages are identical.
+    - test_errors_before_streaming: a missing post still gets the errors blueprint 404 page.
+    - test_error_while_streaming: an error after the head is logged and ends the page with a notice.
+"""
+
+
+def chunks_of(client, url):
+    response = client.get(url, buffered=False)
+    chunks = [chunk.decode() for chunk in response.response]
+    response.close()
+    return response, chunks
+
+
+def test_flush_chunks():
+    pieces = ['<head>', f'</header>{FLUSH_MARKER}<main>', 'a' * 6, 'b' * 6, 'c']
+
+    assert list(flush_chunks(pieces, chunk_size=10)) == ['<head></header>', '<main>aaaaaa', 'bbbbbbc']
+
+
+def test_head_sent_first(client, test_posts):
+    response, chunks = chunks_of(client, f'/post/{test_posts[0].id}')
+
+    assert response.status_code == 200
+    assert len(chunks) > 1
+    assert '<link rel="stylesheet"' in chunks[0] and 'navbar' in chunks[0]
+    assert 'Content 0' not in chunks[0]
+    assert 'Content 0' in ''.join(chunks[1:])
+    assert FLUSH_MARKER not in ''.join(chunks)
+
+
+def test_fragment_rendered_while_streaming(client, test_posts):
+    post = test_posts[0]
+    response = client.get(f'/post/{post.id}', buffered=False)
+    assert fragment_cache.get(('post', post.id, False)) is None
+
+    response.get_data()
+    response.close()
+    assert 'Content 0' in fragment_cache.get(('post', post.id, False)).html
+
+
+def test_same_html_as_buffered(app, client, test_posts):
+    _, streamed = chunks_of(client, '/user/testuser')
+    app.config['TEMPLATE_STREAMING'] = False
+    buffered = client.get('/user/testuser')
+
+    assert len(streamed) > 1
+    assert ''.join(streamed) == buffered.get_data(as_text=True)
+
+
+def test_errors_before_streaming(client):
+    response = client.get('/post/999')
+
+    assert response.status_code == 404
+    assert b'Page Not Found (404)' in response.data
+
+
+def test_error_while_streaming(app, client, test_posts, monkeypatch):
+    import flask_blog.posts.routes as routes
+    errors = []
+
+    def broken_render(*args, **kwargs):
+        raise RuntimeError('template failed')
+    monkeypatch.setattr(routes, 'render_template', broken_render)
+    got_request_exception.connect(lambda sender, exception, **extra: errors.append(exception), app, weak=False)
+    response, chunks = chunks_of(client, f'/post/{test_posts[0].id}')
+
+    assert response.status_code == 200
+    assert 'navbar' in chunks[0]
+    assert 'something went wrong' in chunks[-1] and chunks[-1].endswith('</html>')
+    assert isinstance(errors[0], RuntimeError)
@@ -0,0 +1,59 @@
+import os
+import pytest
+from flask_blog import create_app
+from flask_blog.config import TestingConfig
+
+"""
+Tests for the Jinja bytecode cache and template warm-up (templating.TemplateCache).
+
+Tests:
+    - test_warm_up_compiles_every_template: TEMPLATE_WARMUP loads every template in create_app and reports it.
+    - test_bytecode_cache_reused: a second app reads the compiled templates instead of compiling them.
+    - test_warm_command: `flask templates warm` fills the bytecode cache.
+"""
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates')
+
+
+def template_files():
+    return {os.path.relpath(os.path.join(root, name), TEMPLATES_DIR).replace(os.sep, '/')
+            for root, _, files in os.walk(TEMPLATES_DIR) for name in files if name.endswith('.html')}
+
+
+@pytest.fixture
+def cache_config(tmp_path):
+    class CacheConfig(TestingConfig):
+        JINJA_BYTECODE_CACHE_DIR = str(tmp_path / 'jinja_cache')
+        TEMPLATE_WARMUP = True
+    return CacheConfig
+
+
+def test_warm_up_compiles_every_template(cache_config):
+    app = create_app(cache_config)
+    loaded = {name for (_, name) in app.jinja_env.cache.keys()}
+
+    assert loaded == template_files()
+    assert app.extensions['template_cache']['templates'] == len(template_files())
+    assert len(os.listdir(cache_config.JINJA_BYTECODE_CACHE_DIR)) == len(template_files())
+
+
+def test_bytecode_cache_reused(cache_config, monkeypatch):
+    create_app(cache_config)
+    cache_config.TEMPLATE_WARMUP = False
+    app = create_app(cache_config)
+
+    def compile(*args, **kwargs):
+        raise AssertionError('template compiled despite the bytecode cache')
+    monkeypatch.setattr(app.jinja_env, 'compile', compile)
+    with app.test_request_context():
+        assert app.jinja_env.get_template('home.html')
+
+
+def test_warm_command(cache_config):
+    cache_config.TEMPLATE_WARMUP = False
+    app = create_app(cache_config)
+    result = app.test_cli_runner().invoke(args=['templates', 'warm'])
+
+    assert result.exit_code == 0
+    assert f'Compiled {len(template_files())} templates' in result.output
+    assert len(os.listdir(cache_config.JINJA_BYTECODE_CACHE_DIR)) == len(template_files())
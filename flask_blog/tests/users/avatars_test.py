@@ -0,0 +1,121 @@
+import io
+import os
+import threading
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from flask_blog import db, avatar_pipeline
+from flask_blog.users import avatars
+from flask_blog.users.avatars import AVATAR_SIZES, store_upload, avatar_url
+
+"""
+Tests for the background avatar pipeline in flask_blog.users.avatars.
+
+Tests:
+    - test_pipeline_builds_variants: an upload is cropped square and resized to every size, as JPEG and WebP.
+    - test_upload_staged_outside_static: raw uploads are stored in AVATAR_UPLOAD_DIR, never under static/.
+    - test_failed_job_logged: an unexpected error in a job is logged and its upload deleted.
+    - test_decompression_bomb_rejected: an upload over PIL's pixel limit is discarded like an invalid image.
+    - test_avatar_url_picks_smallest_variant: templates get the smallest variant large enough.
+    - test_avatar_url_without_variants: pictures without variants fall back to the original.
+    - test_account_upload_is_processed_off_request: the account route only queues the upload.
+"""
+
+
+@pytest.fixture
+def pictures(monkeypatch, tmp_path):
+    """Point the pipeline at a temporary profile_pics folder."""
+    monkeypatch.setattr(avatars, 'pictures_path', lambda *parts: os.path.join(str(tmp_path), *parts))
+    return tmp_path
+
+
+def jpeg_upload(size=(800, 600)):
+    data = io.BytesIO()
+    Image.new('RGB', size, 'navy').save(data, 'JPEG')
+    data.seek(0)
+    return FileStorage(stream=data, filename='photo.JPG', content_type='image/jpeg')
+
+
+def test_pipeline_builds_variants(app, test_user, pictures):
+    upload_path = store_upload(jpeg_upload())
+    image_file = avatar_pipeline.submit(test_user.id, upload_path).result(timeout=10)
+
+    name = os.path.splitext(image_file)[0]
+    for size in AVATAR_SIZES:
+        for image_format in ('jpg', 'webp'):
+            with Image.open(pictures / f'{name}_{size}.{image_format}') as variant:
+                assert variant.size == (size, size)
+    assert (pictures / image_file).exists()
+    assert not os.path.exists(upload_path)
+    db.session.expire_all()
+    assert db.session.get(type(test_user), test_user.id).image_file == image_file
+
+
+def test_upload_staged_outside_static(app):
+    upload_path = store_upload(jpeg_upload())
+    try:
+        assert os.path.dirname(upload_path) == app.config['AVATAR_UPLOAD_DIR']
+        assert not upload_path.startswith(app.static_folder)
+    finally:
+        os.remove(upload_path)
+
+
+def test_failed_job_logged(app, test_user, pictures, monkeypatch, caplog):
+    def broken(*args):
+        raise RuntimeError('disk on fire')
+    monkeypatch.setattr(avatars, 'build_variants', broken)
+    upload_path = store_upload(jpeg_upload())
+    future = avatar_pipeline.submit(test_user.id, upload_path)
+    # callbacks run in order: once this one has run, the pipeline's logging callback has too
+    logged = threading.Event()
+    future.add_done_callback(lambda done: logged.set())
+
+    assert logged.wait(timeout=10)
+    assert isinstance(future.exception(), RuntimeError)
+    assert f'Avatar job for user {test_user.id} failed' in caplog.text
+    assert not os.path.exists(upload_path)
+
+
+def test_decompression_bomb_rejected(app, test_user, pictures, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)
+    upload_path = store_upload(jpeg_upload())
+
+    assert avatar_pipeline.submit(test_user.id, upload_path).result(timeout=10) is None
+    assert not os.path.exists(upload_path)
+    assert test_user.image_file == 'default.jpg'
+
+
+def test_avatar_url_picks_smallest_variant(app, pictures):
+    for size in (64, 125):
+        (pictures / f'abc_{size}.jpg').touch()
+    with app.test_request_context():
+        assert avatar_url('abc.jpg', 50).endswith('/profile_pics/abc_64.jpg')
+        assert avatar_url('abc.jpg', 100).endswith('/profile_pics/abc_125.jpg')
+
+
+def test_avatar_url_without_variants(app, pictures):
+    with app.test_request_context():
+        assert avatar_url('default.jpg', 64).endswith('/profile_pics/default.jpg')
+        assert avatar_url('default.jpg', 64, 'webp') is None
+
+
+def test_account_upload_is_processed_off_request(app, client, test_user, pictures):
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+    submitted = []
+    original_submit = avatar_pipeline.submit
+
+    def record_submit(user_id, upload_path):
+        future = original_submit(user_id, upload_path)
+        submitted.append(future)
+        return future
+
+    avatar_pipeline.submit = record_submit
+    try:
+        response = client.post('/account', data={'username': 'testuser', 'email': 'test@example.com',
+                                                  'picture': (jpeg_upload().stream, 'photo.jpg')},
+                               content_type='multipart/form-data', follow_redirects=True)
+    finally:
+        del avatar_pipeline.submit
+    assert b'being processed' in response.data
+    image_file = submitted[0].result(timeout=10)
+    assert image_file.endswith('.jpg') and image_file != 'default.jpg'
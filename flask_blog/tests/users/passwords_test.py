@@ -0,0 +1,60 @@
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from flask_blog import db
+from flask_blog.users.passwords import HashingPool, HasherBusy, BCRYPT_COST
+
+"""
+Tests for password hashing on the bounded pool in flask_blog.users.passwords.
+
+Tests:
+    - test_pool_rejects_when_saturated: with every slot taken, new jobs fail fast.
+    - test_login_rehashes_old_cost: a hash made with a lower work factor is upgraded on login.
+    - test_busy_pool_returns_503: a saturated pool surfaces as a 503 page with Retry-After.
+"""
+
+
+def test_pool_rejects_when_saturated():
+    pool = HashingPool(workers=1, max_queue=1, timeout=5)
+    release = threading.Event()
+    threads = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        # wait until both slots (1 running + 1 queued) are taken
+        while pool._slots._value:
+            time.sleep(0.001)
+        with pytest.raises(HasherBusy):
+            pool.run(lambda: None)
+        assert pool.rejected == 1
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+    assert pool.run(lambda: 'done') == 'done'
+
+
+def test_login_rehashes_old_cost(app, client, test_user):
+    """
+        test_user is hashed with the testing cost (4); raising the configured cost
+        must upgrade the stored hash on the next successful login.
+    """
+    app.config['BCRYPT_LOG_ROUNDS'] = 5
+    client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+    db.session.refresh(test_user)
+    assert BCRYPT_COST.match(test_user.password).group(1) == '05'
+
+    # the upgraded hash still verifies
+    client.get('/logout')
+    response = client.post('/login', data={'email': 'test@example.com', 'password': 'password'},
+                           follow_redirects=True)
+    assert b'Logged in for account test@example.com' in response.data
+
+
+def test_busy_pool_returns_503(client, test_user):
+    with patch('flask_blog.users.passwords.HashingPool.run', side_effect=HasherBusy()):
+        response = client.post('/login', data={'email': 'test@example.com', 'password': 'password'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert b'Server busy' in response.data
@@ -0,0 +1,107 @@
+import pytest
+from flask_blog.ratelimit import MemoryStore, RateLimited, RateLimiter, SQLiteStore
+
+"""
+Tests for the admission control of the auth endpoints (ratelimit).
+
+Tests:
+    - test_sliding_window: hits of the previous window count in proportion to their overlap.
+    - test_sqlite_store_shared: two stores on the same file (two workers) share their counts.
+    - test_purge_keeps_longer_periods: sweeping old IP windows leaves a longer account window intact.
+    - test_rejected_attempt_not_counted: an attempt rejected for its account leaves the IP's count untouched.
+    - test_login_limited_per_account: attempts beyond the account limit get a 429 without any SQL query.
+    - test_limited_per_ip: attempts on different accounts from one IP are limited together.
+    - test_get_not_limited: showing the forms is never limited.
+    - test_rejections_exported: rejections are counted in /metrics.
+"""
+
+
+def limit(app, ip=(20, 60), account=(5, 60)):
+    app.extensions['rate_limiter'].limits = {'ip': ip, 'account': account}
+
+
+def login(client, email):
+    return client.post('/login', data={'email': email, 'password': 'wrong password'})
+
+
+def test_sliding_window():
+    store = MemoryStore()
+    assert [store.hit('ip:1', 3, 10, now) for now in (100, 101, 102, 103)] == [True, True, True, False]
+    # new window, the 3 previous hits still fully overlap
+    assert not store.hit('ip:1', 3, 10, 110)
+    # half way: 3 * 0.5 + 0 + 1 <= 3
+    assert store.hit('ip:1', 3, 10, 115)
+    assert store.hit('ip:2', 3, 10, 103)
+
+
+def test_sqlite_store_shared(tmp_path):
+    worker_1 = SQLiteStore(str(tmp_path / 'rate_limit.db'))
+    worker_2 = SQLiteStore(str(tmp_path / 'rate_limit.db'))
+
+    assert worker_1.hit('account:a', 2, 60, 1000)
+    assert worker_2.hit('account:a', 2, 60, 1001)
+    assert not worker_1.hit('account:a', 2, 60, 1002)
+    assert not worker_2.hit('account:a', 2, 60, 1003)
+
+
+def test_purge_keeps_longer_periods(tmp_path):
+    for store in (MemoryStore(), SQLiteStore(str(tmp_path / 'rate_limit.db'))):
+        store.PURGE_EVERY = 1
+        limiter = RateLimiter(store, {'ip': (1000, 60), 'account': (5, 900)})
+        # one attempt every 30 s: several 60 s IP windows go by inside one 900 s account window
+        for attempt in range(5):
+            limiter.check(f'10.0.0.{attempt}', 'account', now=1000 * 900 + attempt * 30)
+        with pytest.raises(RateLimited):
+            limiter.check('10.0.0.9', 'account', now=1000 * 900 + 600)
+        assert limiter.stats()['rejected_by_account'] == 1
+
+
+def test_rejected_attempt_not_counted(tmp_path):
+    for store in (MemoryStore(), SQLiteStore(str(tmp_path / 'rate_limit.db'))):
+        limiter = RateLimiter(store, {'ip': (3, 60), 'account': (1, 60)})
+        limiter.check('10.0.0.1', 'locked', now=1000 * 60)
+        for attempt in range(5):
+            with pytest.raises(RateLimited):
+                limiter.check('10.0.0.1', 'locked', now=1000 * 60 + attempt)
+        # the IP still has its two remaining attempts for other accounts
+        limiter.check('10.0.0.1', 'other', now=1000 * 60 + 10)
+        limiter.check('10.0.0.1', 'another', now=1000 * 60 + 11)
+        with pytest.raises(RateLimited):
+            limiter.check('10.0.0.1', 'third', now=1000 * 60 + 12)
+        assert limiter.stats() == {'allowed': 3, 'rejected': 6, 'rejected_by_ip': 1, 'rejected_by_account': 5}
+
+
+def test_login_limited_per_account(app, client, test_user, count_queries):
+    limit(app, account=(2, 60))
+    assert login(client, 'test@example.com').status_code == 200
+    assert login(client, 'TEST@example.com ').status_code == 200
+
+    with count_queries() as statements:
+        response = login(client, 'test@example.com')
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= 60
+    assert statements == []
+    assert login(client, 'other@example.com').status_code == 200
+
+
+def test_limited_per_ip(app, client):
+    limit(app, ip=(3, 60))
+    statuses = [login(client, f'user{number}@example.com').status_code for number in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert client.post('/reset_password', data={'email': 'user9@example.com'}).status_code == 429
+    assert client.post('/login', data={}, environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+
+def test_get_not_limited(app, client):
+    limit(app, ip=(1, 60))
+    assert [client.get('/login').status_code for _ in range(3)] == [200, 200, 200]
+
+
+def test_rejections_exported(app, client):
+    limit(app, account=(1, 60))
+    login(client, 'test@example.com')
+    login(client, 'test@example.com')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'flask_blog_auth_rate_limit_rejected_by_account_total 1\n' in body
+    assert 'flask_blog_auth_rate_limit_allowed_total 1\n' in body
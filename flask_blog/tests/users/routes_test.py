@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 import pytest
 from flask import url_for
+from flask_blog import db
 
 # -------------------
 # Register Route Test
@@ -155,3 +156,26 @@ def test_user_posts(client, test_user):
     response = client.get(f'/user/{test_user.username}')
     assert response.status_code == 200
     assert b'Posts by' in response.data
+
+
+# -------------------
+# User Posts Query Count Test
+# -------------------
+def test_user_posts_query_count(client, test_posts, count_queries):
+    """
+        Renders a user's posts page.
+        Confirms the number of SQL statements does not grow with the number of posts:
+        one for the user (with its maintained post_count), one for the page with authors joined.
+
+        Args:
+            client: pytest fixture that provides a simulated browser (HTTP client) for testing your Flask app.
+            test_posts: pytest fixture that provides posts written by several authors.
+            count_queries: pytest fixture that counts SQL statements executed.
+    """
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get('/user/alice')
+    assert response.status_code == 200
+    assert b'Posts by Alice (2 posts)' in response.data
+    assert len(statements) == 2
+    assert not any('count(' in statement.lower() for statement in statements)
@@ -0,0 +1,206 @@
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor, wait
+import click
+from flask import current_app, url_for
+
+'''
+Avatar processing pipeline
+account() only streams the upload to a private staging folder (AVATAR_UPLOAD_DIR, outside static/
+so raw uploads are never served) and submits it here; a worker pool then
+    1. opens the image with draft mode, so JPEGs are decoded at a reduced scale (1/2 .. 1/8)
+       instead of full resolution
+    2. crops it to a centred square (avatars are displayed square) and writes every size in
+       AVATAR_SIZES as JPEG and WebP: <name>_<size>.jpg / <name>_<size>.webp
+    3. writes <name>.jpg (largest size) as the fallback image and only then points
+       User.image_file at it, so pages never reference a file that does not exist yet
+Templates call avatar_url(image_file, size) to get the smallest variant at least `size` px wide,
+falling back to the image itself for pictures without variants (e.g. default.jpg before
+`flask users build-avatars` has run).
+The staged upload is deleted once processed, whatever the outcome; a job failing with an
+unexpected error is logged.
+'''
+AVATAR_SIZES = (40, 64, 125, 250)
+
+
+def pictures_path(*parts):
+    return os.path.join(current_app.static_folder, 'profile_pics', *parts)
+
+
+def store_upload(form_picture):
+    """
+        Save the raw upload under AVATAR_UPLOAD_DIR without decoding it.
+
+        Args:
+            form_picture (FileStorage): Picture file data.
+
+        Returns:
+            str: Path of the stored upload.
+    """
+    _, file_extension = os.path.splitext(form_picture.filename)
+    folder = current_app.config['AVATAR_UPLOAD_DIR']
+    os.makedirs(folder, exist_ok=True)
+    upload_path = os.path.join(folder, secrets.token_hex(8) + file_extension.lower())
+    try:
+        form_picture.save(upload_path)
+    except BaseException:
+        # a client disconnecting mid-upload must not leave a partial file behind
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+        raise
+    return upload_path
+
+
+def build_variants(source_path, name, folder):
+    """
+        Crop an image to a square and resize it into every AVATAR_SIZES variant, as JPEG and WebP.
+
+        Args:
+            source_path (str): Image to resize.
+            name (str): File name stem of the variants.
+            folder (str): Directory to write to.
+
+        Returns:
+            str: File name of the fallback JPEG (<name>.jpg).
+    """
+    from PIL import Image, ImageOps
+
+    largest = max(AVATAR_SIZES)
+    with Image.open(source_path) as image:
+        # JPEG only: let libjpeg decode at the smallest scale still >= the largest variant
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        side = min(largest, *image.size)
+        image = ImageOps.fit(image, (side, side))
+        for size in sorted(AVATAR_SIZES, reverse=True):
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            variant.save(os.path.join(folder, f'{name}_{size}.jpg'), 'JPEG', quality=85, optimize=True, progressive=True)
+            variant.save(os.path.join(folder, f'{name}_{size}.webp'), 'WEBP', quality=80, method=4)
+        image.save(os.path.join(folder, f'{name}.jpg'), 'JPEG', quality=85, optimize=True, progressive=True)
+    return f'{name}.jpg'
+
+
+def avatar_url(image_file, size, image_format='jpg'):
+    """
+        URL of the smallest variant of a profile picture at least `size` px wide.
+
+        Args:
+            image_file (str): User.image_file.
+            size (int): Displayed size in px.
+            image_format (str): 'jpg' or 'webp'.
+
+        Returns:
+            str | None: URL of the variant; for 'jpg' falls back to the picture itself,
+                        for 'webp' None when no variant exists.
+    """
+    name = os.path.splitext(image_file)[0]
+    for variant_size in sorted(AVATAR_SIZES):
+        if variant_size >= size:
+            variant = f'{name}_{variant_size}.{image_format}'
+            if os.path.exists(pictures_path(variant)):
+                return url_for('static', filename='profile_pics/' + variant)
+            break
+    if image_format == 'jpg':
+        return url_for('static', filename='profile_pics/' + image_file)
+    return None
+
+
+class AvatarPipeline:
+    """
+        Flask extension processing uploaded profile pictures on a worker pool.
+
+        Configuration:
+            AVATAR_WORKERS (int): Processing threads. Defaults to 2.
+            AVATAR_UPLOAD_DIR (str): Staging folder of raw uploads. Defaults to <instance>/avatar_uploads.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AVATAR_WORKERS', 2)
+        app.config.setdefault('AVATAR_UPLOAD_DIR', os.path.join(app.instance_path, 'avatar_uploads'))
+        app.extensions['avatar_pipeline'] = ThreadPoolExecutor(max_workers=app.config['AVATAR_WORKERS'],
+                                                               thread_name_prefix='avatar')
+        # futures of the jobs not finished yet, see wait()
+        app.extensions['avatar_jobs'] = set()
+
+    def submit(self, user_id, upload_path):
+        """
+            Process an upload in the background and make it the user's picture when done.
+
+            Args:
+                user_id (int): Owner of the new picture.
+                upload_path (str): Path returned by store_upload().
+
+            Returns:
+                Future: Resolves to the new image_file, or None if the upload is not a valid image.
+        """
+        app = current_app._get_current_object()
+        jobs = app.extensions['avatar_jobs']
+        future = app.extensions['avatar_pipeline'].submit(self._process, app, user_id, upload_path)
+        jobs.add(future)
+        future.add_done_callback(lambda done: self._log_failure(app, user_id, done))
+        future.add_done_callback(jobs.discard)
+        return future
+
+    def wait(self, timeout=None):
+        """
+            Block until every job submitted so far has finished, e.g. to time uploads end to end.
+
+            Args:
+                timeout (float | None): Seconds to wait at most, None to wait as long as needed.
+
+            Returns:
+                bool: True if no job is left pending.
+        """
+        _, pending = wait(list(current_app.extensions['avatar_jobs']), timeout)
+        return not pending
+
+    @staticmethod
+    def _log_failure(app, user_id, future):
+        # nobody waits on the future of a request's upload: an unexpected error would vanish silently
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            app.logger.error('Avatar job for user %s failed', user_id, exc_info=error)
+
+    @staticmethod
+    def _process(app, user_id, upload_path):
+        from PIL import Image, UnidentifiedImageError
+        from flask_blog import db, fragment_cache, identity_cache
+        from flask_blog.models import User
+
+        try:
+            with app.app_context():
+                name = os.path.splitext(os.path.basename(upload_path))[0]
+                try:
+                    image_file = build_variants(upload_path, name, pictures_path())
+                except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+                    app.logger.warning('Could not process avatar upload %s: %s', upload_path, error)
+                    return None
+                user = db.session.get(User, user_id)
+                if user is None:
+                    return None
+                user.image_file = image_file
+                db.session.commit()
+                identity_cache.invalidate(user_id)
+                fragment_cache.invalidate(f'author:{user_id}')
+                return image_file
+        finally:
+            if os.path.exists(upload_path):
+                os.remove(upload_path)
+
+
+@click.command('build-avatars')
+def build_avatars_command():
+    """Build size/WebP variants for profile pictures that have none (e.g. default.jpg)."""
+    folder = pictures_path()
+    for file_name in sorted(os.listdir(folder)):
+        name, extension = os.path.splitext(file_name)
+        if extension.lower() not in ('.jpg', '.jpeg', '.png') or '_' in name:
+            continue
+        if all(os.path.exists(os.path.join(folder, f'{name}_{size}.webp')) for size in AVATAR_SIZES):
+            continue
+        build_variants(os.path.join(folder, file_name), name, folder)
+        click.echo(f'✅ Built variants for {file_name}')
@@ -33,7 +33,7 @@ class RegistrationForm(FlaskForm):
             raise ValidationError('This username is taken. Please choose a different one.')
 
     def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
+        user = User.find_by_email(email.data)
         if user:
             raise ValidationError('This email is taken. Please choose a different one.')
 
@@ -80,8 +80,8 @@ class UpdateAccountForm(FlaskForm):
                 raise ValidationError('This username is taken. Please choose a different one.')
 
     def validate_email(self, email):
-        if email.data != current_user.email:
-            user = User.query.filter_by(email=email.data).first()
+        if email.data.lower() != current_user.email.lower():
+            user = User.find_by_email(email.data)
             if user:
                 raise ValidationError('This email is taken. Please choose a different one.')
 
@@ -101,7 +101,7 @@ class RequestResetForm(FlaskForm):
     submit = SubmitField('Request Password Reset')
 
     def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
+        user = User.find_by_email(email.data)
         if user is None:
             raise ValidationError('Email is not registered. Please register first.')
 
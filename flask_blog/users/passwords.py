@@ -0,0 +1,141 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+
+'''
+Password hashing off the request thread
+bcrypt is deliberately slow (hundreds of milliseconds at the default cost). Hashing runs on a
+small bounded thread pool (bcrypt releases the GIL while hashing) so a login storm can only
+use PASSWORD_HASH_WORKERS cores; once PASSWORD_HASH_MAX_QUEUE jobs are waiting, new requests
+are rejected at once with HasherBusy (a 503 error) instead of queueing behind minutes of work.
+The work factor is BCRYPT_LOG_ROUNDS of the config class; hashes made with a lower cost are
+upgraded on the next successful login (see needs_rehash).
+'''
+
+# bcrypt hashes look like $2b$12$<salt+hash>, the number is the log2 cost
+BCRYPT_COST = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HasherBusy(ServiceUnavailable):
+    """
+        Raised when the hashing pool is saturated.
+        Being an HTTP 503 error, it is rendered by the errors blueprint like abort(503).
+    """
+    description = 'The server is busy, please try again in a moment.'
+
+    def __init__(self):
+        super().__init__(retry_after=1)
+
+
+class HashingPool:
+    """
+        Bounded executor: at most `workers` hashes run at once and `max_queue` wait.
+
+        Attributes:
+            workers (int): Number of hashing threads.
+            max_queue (int): Jobs allowed to wait for a free thread.
+            timeout (float): Seconds a request waits for its result.
+            rejected (int): Jobs refused because the pool was saturated or too slow.
+    """
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise HasherBusy()
+
+
+class PasswordHasher:
+    """
+        Flask extension hashing and checking passwords on the app's HashingPool.
+
+        Configuration:
+            BCRYPT_LOG_ROUNDS (int): bcrypt work factor. Defaults to 12.
+            PASSWORD_HASH_WORKERS (int): Hashing threads. Defaults to 4.
+            PASSWORD_HASH_MAX_QUEUE (int): Waiting jobs before rejecting. Defaults to 16.
+            PASSWORD_HASH_TIMEOUT (float): Seconds to wait for a result. Defaults to 10.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 4)
+        app.config.setdefault('PASSWORD_HASH_MAX_QUEUE', 16)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        app.extensions['password_hasher'] = HashingPool(app.config['PASSWORD_HASH_WORKERS'],
+                                                        app.config['PASSWORD_HASH_MAX_QUEUE'],
+                                                        app.config['PASSWORD_HASH_TIMEOUT'])
+
+    @property
+    def pool(self):
+        return current_app.extensions['password_hasher']
+
+    def generate(self, password):
+        """
+            Hash a password with the configured work factor.
+
+            Args:
+                password (str): Plain text password.
+
+            Returns:
+                str: bcrypt hash, ready to store in User.password.
+
+            Raises:
+                HasherBusy: If the hashing pool is saturated.
+        """
+        from flask_blog import bcrypt
+
+        rounds = current_app.config['BCRYPT_LOG_ROUNDS']
+        return self.pool.run(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        """
+            Check a password against a stored hash.
+
+            Args:
+                pw_hash (str): Stored bcrypt hash.
+                password (str): Plain text password to check.
+
+            Returns:
+                bool: True if the password matches.
+
+            Raises:
+                HasherBusy: If the hashing pool is saturated.
+        """
+        from flask_blog import bcrypt
+
+        return self.pool.run(bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """
+            Tell whether a hash was made with a lower work factor than configured.
+
+            Args:
+                pw_hash (str): Stored bcrypt hash.
+
+            Returns:
+                bool: True if the hash should be regenerated.
+        """
+        match = BCRYPT_COST.match(pw_hash)
+        return match is not None and int(match.group(1)) < current_app.config['BCRYPT_LOG_ROUNDS']
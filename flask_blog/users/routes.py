@@ -1,17 +1,30 @@
 from flask import render_template, url_for, flash, redirect, request, Blueprint
 from flask_login import login_user, current_user, logout_user, login_required
-from flask_blog import db, bcrypt
+from sqlalchemy.orm import joinedload, defer
+from flask_blog import db, password_hasher, fragment_cache, identity_cache
+from flask_blog.cache import listing_tags, listing_version
+from flask_blog.conditional import render_cached_page
+from flask_blog.streaming import stream_page
 from flask_blog.models import User, Post
 from flask_blog.users.forms import (RegistrationForm, LoginForm, UpdateAccountForm,
                                    RequestResetForm, ResetPasswordForm)
 from flask_blog.users.utils import save_picture, send_reset_email
+from flask_blog.users.avatars import avatar_url, build_avatars_command
+from flask_blog.pagination import paginate_keyset
+from flask_blog.ratelimit import auth_rate_limit
+from flask_blog.feeds import FEED_SIZE, generate_atom, render_cached_feed
 
 
 # create instance of Blueprint
 users = Blueprint('users', __name__)
+# {{ avatar_url(image_file, size) }} in every template
+users.add_app_template_global(avatar_url)
+# `flask users build-avatars`
+users.cli.add_command(build_avatars_command)
 
 
 @users.route("/register", methods=['GET', 'POST'])
+@auth_rate_limit
 def register():
     """
         Handle user registration.
@@ -32,8 +45,8 @@ def register():
 
     form = RegistrationForm()
     if form.validate_on_submit():
-        # get hashed password
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        # get hashed password (runs on the hashing pool, 503 if saturated)
+        hashed_password = password_hasher.generate(form.password.data)
         # creating user
         user = User(username=form.username.data, email=form.email.data, password=hashed_password)
         # adding user to db
@@ -46,6 +59,7 @@ def register():
 
 
 @users.route("/login", methods=['GET', 'POST']) # name of route
+@auth_rate_limit
 def login(): # name of function
     """
         Handle user login.
@@ -66,9 +80,13 @@ def login(): # name of function
     form = LoginForm()
     if form.validate_on_submit():
         # check if user exists in database
-        user = User.query.filter_by(email=form.email.data).first()
-        # check password matches in database
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
+        user = User.find_by_email(form.email.data)
+        # check password matches in database (runs on the hashing pool, 503 if saturated)
+        if user and password_hasher.check(user.password, form.password.data):
+            # transparently upgrade hashes made with an older, lower work factor
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.generate(form.password.data)
+                db.session.commit()
             login_user(user, remember=form.remember.data)
             # add next_page routing to where page user was trying to access but prompted for login
             # sample url: http://localhost:5001/login?next=%2Faccount
@@ -99,6 +117,7 @@ def account():
         Display and update the current user's account information.
 
         - Allows users to update their username, email, and profile picture.
+        - Profile pictures are processed in the background by the avatar pipeline.
         - Pre-populates the form with current values on GET request.
         - Commits changes on POST and redirects to avoid form resubmission.
 
@@ -107,20 +126,28 @@ def account():
     """
     form = UpdateAccountForm()
     if form.validate_on_submit():
-        if form.picture.data:
-            picture_file = save_picture(form.picture.data)
-            current_user.image_file = picture_file
-        # update username and email via current_user and commiting to db
-        current_user.username = form.username.data
-        current_user.email = form.email.data
+        # current_user is a cached, detached snapshot: load the user to save changes
+        user = db.session.get(User, current_user.id)
+        # username is rendered in cached post fragments
+        author_changed = form.username.data != user.username
+        # update username and email and commiting to db
+        user.username = form.username.data
+        user.email = form.email.data
         db.session.commit()
+        identity_cache.invalidate(user.id)
+        if author_changed:
+            fragment_cache.invalidate(f'author:{user.id}')
         flash('Your account has been updated!', 'success')  # flash: to send a one-time alert
+        if form.picture.data:
+            # resized in the background, image_file is updated once the variants exist
+            save_picture(form.picture.data, user.id)
+            flash('Your new profile picture is being processed and will appear shortly.', 'info')
         return redirect(url_for('users.account')) # redirect required due to post-get-redirect pattern
     elif request.method == 'GET': # populate fields with current_user data
         form.username.data = current_user.username
         form.email.data = current_user.email
-    image_file = url_for('static', filename='profile_pics/' + current_user.image_file)
-    return render_template('account.html', title='Account', image_file=image_file, form=form)
+    # rendered at 125px by the avatar macro
+    return render_template('account.html', title='Account', image_file=current_user.image_file, form=form)
 
 
 @users.route("/user/<string:username>")
@@ -133,18 +160,62 @@ def user_posts(username):
 
        Returns:
            Response: Renders a paginated list of blog posts by the user.
+           The post list is served from the fragment cache when possible,
+           304 Not Modified when the client's ETag is current.
    """
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     # getting user from username
     user = User.query.filter_by(username=username).first_or_404()
-    posts = Post.query\
-            .filter_by(author=user)\
-            .order_by(Post.date_posted.desc())\
-            .paginate(page=page, per_page=5)
-    return render_template('user_posts.html', posts=posts, user=user)
+    # maintained with every post insert/delete instead of a COUNT(*) per request
+    total = user.post_count
+
+    def load_posts():
+        # joinedload: authors are fetched in the same SELECT as the page instead of lazily per post
+        # defer: listings render Post.excerpt, the full content column is never read
+        posts = paginate_keyset(Post.query.options(joinedload(Post.author), defer(Post.content))
+                                .filter_by(author=user), cursor=cursor, per_page=5)
+        tags = listing_tags(posts, head_tag=f'user:{user.id}:head') | {f'author:{user.id}'}
+        return posts, tags, listing_version(posts), None
+
+    return render_cached_page(
+        ('user', user.id, cursor), load_posts,
+        render_fragment=lambda posts: render_template('fragments/post_list.html', posts=posts,
+                                                      endpoint='users.user_posts',
+                                                      endpoint_args={'username': user.username}),
+        render_page=lambda post_list: stream_page('user_posts.html', post_list=post_list, user=user, total=total),
+        page_version=(user.username, total), stream=True)
+
+
+@users.route("/user/<string:username>/feed.atom")
+def user_feed(username):
+    """
+       Atom feed of the newest posts of one user, mirroring their posts page.
+
+       Args:
+           username (str): Author of the posts.
+
+       Returns:
+           Response: application/atom+xml feed, cached until the next post write by the author,
+           304 Not Modified when the feed reader's ETag is current.
+   """
+    user = User.query.filter_by(username=username).first_or_404()
+
+    def load_posts():
+        posts = paginate_keyset(Post.query.options(joinedload(Post.author), defer(Post.content))
+                                .filter_by(author=user), per_page=FEED_SIZE)
+        tags = listing_tags(posts, head_tag=f'user:{user.id}:head') | {f'author:{user.id}'}
+        return posts, tags, listing_version(posts)
+
+    return render_cached_feed(
+        ('feed', 'user', user.id), load_posts,
+        render=lambda posts: generate_atom(f'Posts by {user.username.title()} - Flask Blog',
+                                           url_for('users.user_feed', username=user.username, _external=True),
+                                           url_for('users.user_posts', username=user.username, _external=True),
+                                           posts.items))
 
 
 @users.route("/reset_password", methods=['GET', 'POST'])
+@auth_rate_limit
 def reset_request():
     """
         Handle password reset request.
@@ -160,7 +231,7 @@ def reset_request():
         return redirect(url_for('main.index'))
     form = RequestResetForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
+        user = User.find_by_email(form.email.data)
         send_reset_email(user)
         flash('An email has been sent with instructions to reset your password.', 'info')
         return redirect(url_for('users.login'))
@@ -168,6 +239,7 @@ def reset_request():
 
 
 @users.route("/reset_password/<token>", methods=['GET', 'POST'])
+@auth_rate_limit
 def reset_token(token):
     """
         Handle password reset using a secure token.
@@ -191,11 +263,12 @@ def reset_token(token):
         return redirect(url_for('users.reset_request'))
     form = ResetPasswordForm()
     if form.validate_on_submit():
-        # get hashed password
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        # get hashed password (runs on the hashing pool, 503 if saturated)
+        hashed_password = password_hasher.generate(form.password.data)
         # set new password
         user.password = hashed_password
         db.session.commit()
+        identity_cache.invalidate(user.id)
         # show feedback
         flash(f'Password successfully reset for {user.email}! You are able to login with your new password!', 'success') # flash: to send a one-time alert
         return redirect(url_for('users.login'))
@@ -1,33 +1,25 @@
-import os
-import secrets
-from PIL import Image
-from flask import url_for, current_app
-from flask_mail import Message
-from flask_blog import mail
+from flask import url_for
+from flask_blog import mail_dispatcher, avatar_pipeline
+from flask_blog.users.avatars import store_upload
 from string import Template
 
 
-def save_picture(form_picture):
+def save_picture(form_picture, user_id):
     """
-       Randomize picture file name, resized picture and save picture file locally.
+       Store the uploaded picture and process it in the background.
+
+       The upload is saved as-is (no decoding on the request thread); the avatar pipeline
+       then builds the resized JPEG/WebP variants and sets the user's image_file when done.
 
        Args:
            form_picture (FileStorage): Picture file data.
+           user_id (int): ID of the user the picture belongs to.
 
        Returns:
-           str: Picture file name.
+           Future: Resolves to the new picture file name once processed.
     """
-    random_hex = secrets.token_hex(8)
-    file_name, file_extension = os.path.splitext(form_picture.filename)
-    picture_file_name = random_hex + file_extension
-    picture_path = os.path.join(current_app.root_path, 'static/profile_pics', picture_file_name)
-
-    output_size = (125, 125)
-    resized_image = Image.open(form_picture)
-    resized_image.thumbnail(output_size)
-    resized_image.save(picture_path)
-
-    return picture_file_name
+    upload_path = store_upload(form_picture)
+    return avatar_pipeline.submit(user_id, upload_path)
 
 
 def send_reset_email(user):
@@ -35,8 +27,8 @@ def send_reset_email(user):
         Sends a password reset email to the specified user.
 
         This function generates a secure token for the user and constructs a password
-        reset URL. It then sends an email with this URL to the user's registered email
-        address using Flask-Mail.
+        reset URL. It then queues an email with this URL to the user's registered email
+        address; the mail dispatcher sends it in the background using Flask-Mail.
 
         Args:
             user (User): The user object for whom the password reset is requested.
@@ -49,7 +41,8 @@ def send_reset_email(user):
     token = user.get_reset_token()
     reset_url = url_for('users.reset_token', token=token, _external=True)
 
-    # message subject line
+    # message subject line (Flask-Mail is imported here, not by every worker at startup)
+    from flask_mail import Message
     msg = Message('Password Reset Request', sender='noreply@demo.com', recipients=[user.email])
 
     # message body
@@ -67,6 +60,6 @@ def send_reset_email(user):
 
     msg.body = msg_template.substitute(name=user.username.title(), reset_link=reset_url)
 
-    # send email
-    mail.send(msg)
+    # queue email, returns without waiting for the SMTP server
+    mail_dispatcher.enqueue(msg)
     return None
\ No newline at end of file
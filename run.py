@@ -3,11 +3,17 @@ from flask_blog import create_app, db
 
 
 app = create_app()
+# when serving real traffic use the tuned profile (SQLite WAL, pool sizing):
+#   from flask_blog.config import ProductionConfig
+#   app = create_app(ProductionConfig)
 
-# to run on first app run
-# with app.app_context():
-#     db.create_all()
-#     print("✅ Database tables created!")
+# to create or upgrade the database schema (first app run and after pulling changes):
+#   flask --app run db upgrade
+# see flask_blog/migrations/versions.py for the list of schema versions
+# to bundle css/js into fingerprinted, precompressed files (before deploying):
+#   flask --app run assets build
+# to precompile every template into the Jinja bytecode cache (instance/jinja_cache):
+#   flask --app run templates warm
 
 # __name__ = main when we run script with python directly in CLI(command-line interface)
 if __name__ == '__main__':